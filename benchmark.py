@@ -0,0 +1,82 @@
+import os, sys, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # runs without a window
+
+import pygame
+import main
+
+FRAMES = 300
+
+def bench_drawing(g, render_mode, frames=FRAMES):
+    g.render_mode = render_mode
+    g.do_game_drawing() # warm up sprite cache
+    start = time.perf_counter()
+    for _ in range(frames):
+        g.do_game_drawing()
+    return (time.perf_counter() - start) * 1000 / frames
+
+def swarm_level(g, walkers):
+    objects = {category:[] for category in g.objects}
+    width = walkers * 10
+    objects["collision_rects"] += [main.CollisionRect(-30, 0, 30, 300), main.CollisionRect(width, 0, 30, 300)]
+    objects["collision_rects"] += [main.CollisionRect(x, 300, 300, 60) for x in range(0, width, 300)]
+    objects["collision_rects"].append(main.CollisionRect(-1000, 300, 300, 60)) # player stands out of the way
+    g.player.set_position_to(-900, 300 - g.player.height)
+    for i in range(walkers):
+        e = main.WalkEnemy(i * 10, 270 - (i % 7) * 40, i % 3 == 0)
+        e.turned_on = True
+        objects["enemies"].append(e)
+    g.set_objects(objects)
+
+def bench_logic(g, frames=FRAMES):
+    g.frame_time = 1000 / g.framerate
+    start = time.perf_counter()
+    for _ in range(frames):
+        g.do_game_logic()
+    return (time.perf_counter() - start) * 1000 / frames
+
+def bench_swarm(g, walkers=5000):
+    for engine in (False, True):
+        swarm_level(g, walkers)
+        g.use_enemy_engine(engine)
+        logic = bench_logic(g, 120)
+        draw = bench_drawing(g, main.RENDER_BATCHED, 120)
+        sequential, pipelined = bench_pipeline(g, 120)
+        print(f"swarm of {walkers} walkers, enemy engine {engine}: logic {logic:.3f} ms, batched draw {draw:.3f} ms, "
+              f"frame sequential {sequential:.3f} ms, pipelined {pipelined:.3f} ms")
+    g.use_enemy_engine(False)
+
+def bench_pipeline(g, frames=FRAMES):
+    g.frame_time = 1000 / g.framerate
+    results = []
+    for pipelined in (False, True):
+        g.pipelined = pipelined
+        g.render_mode = main.RENDER_BATCHED
+        start = time.perf_counter()
+        for _ in range(frames):
+            g.do_frame()
+            g.finish_frame()
+        results.append((time.perf_counter() - start) * 1000 / frames)
+    g.pipelined = False
+    return results
+
+def run():
+    pygame.init()
+    g = main.Game(start=False)
+    levels = [int(a) for a in sys.argv[1:]] or range(5)
+    for level in levels:
+        g.level = level
+        g.load_saved_object_state()
+        count = sum(len(objs) for objs in g.objects.values())
+        immediate = bench_drawing(g, main.RENDER_IMMEDIATE)
+        batched = bench_drawing(g, main.RENDER_BATCHED)
+        print(f"level{level}: {count} objects, draw immediate {immediate:.3f} ms, batched {batched:.3f} ms")
+        g.load_saved_object_state()
+        sequential, pipelined = bench_pipeline(g)
+        print(f"level{level}: frame sequential {sequential:.3f} ms, pipelined {pipelined:.3f} ms")
+    bench_swarm(g)
+    if g.logic_thread != None:
+        g.logic_thread.shutdown()
+    pygame.quit()
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,448 @@
+import os, io, sys, time, heapq, random, contextlib
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # runs without a window
+from multiprocessing import Pool
+
+import numpy as np
+import pygame
+import main
+import level_analyzer
+import multi_env
+
+# Plays levels through to check they can still be won. The route comes from the level analyzer's graph: every way on
+# from a node gets how far the win flag is from there, over edges that include pipes and climbing rects. A beam of
+# copies in the batched simulator tries short held-key moves, and after every move the copies that are closest to the
+# flag along the route get copied over the rest. The beam is narrow while it gets closer and wide where it doesn't, and
+# when it dies out or gets stuck it goes back to a saved beam and searches on from there wide. The winning moves are
+# played in a real game through KeyState, which is what the report is about. Jump throw enemies turn at random, so a one
+# copy tracker follows the game, and near them the rest of the plan is tried on a few copies first. If some of those
+# die, it plans again from where the game is. Near them plans only go HORIZON moves ahead, and only the first PLAYED
+# of those get played before the next one.
+
+SEGMENT = 8 # frames a move is held
+COPIES = 128
+BEAM = 32 # copies kept after each move, at most
+WIDE_COPIES = 512 # where the search doesn't get on
+WIDE_BEAM = 64
+WIDEN = 8 # moves without getting closer to the flag before the search gets wide
+WIDE_FOR = 24 # moves it stays wide at least
+STALL = 50 # moves without getting closer before the search goes back to a checkpoint, and the way it's stuck on gets longer
+DETOUR = 2000 # px
+CHECKPOINT = 10 # moves between the kept beams that are saved to go back to
+RING = 8 # checkpoints saved
+RETRIES = 10 # times in a row a plan goes back without getting closer than before, then it gives up
+BUDGET = 3 # times the moves left in the level a plan simulates at most, going back included
+BUCKET = 30 # px, kept copies on the same node are at least this far apart
+AHEAD = 100 # px, ways into boxes bigger than this are measured on from where in them a copy would get
+HOP_COST = 60 # px added per edge of the route, fewer jumps are safer
+ATTEMPTS = 3 # games played before a level counts as lost
+REPLANS = 30 # per game
+CHECK_COPIES = 16
+CHECK_FRAMES = 90 # how far ahead the plan is tried
+CHECK_EVERY = 3 # moves, the tried stretches overlap
+HORIZON = 30 # moves planned ahead near jump throw enemies, from where the game is
+PLAYED = 20 # of those, then it plans again
+DANGER_RANGE = 600 # px, jump throw enemies this close make the plan get tried first
+R, L, U, D, S = multi_env.ACTION_RIGHT, multi_env.ACTION_LEFT, multi_env.ACTION_UP, multi_env.ACTION_DOWN, multi_env.ACTION_SPACE
+MOVES = [(), (R,), (L,), (R,S), (L,S), (S,), (U,), (U,R), (U,L), (D,), (R,U,S)]
+
+def move_table():
+    table = np.zeros((len(MOVES), multi_env.ACTIONS), dtype=bool)
+    for i, keys in enumerate(MOVES):
+        table[i, list(keys)] = True
+    return table
+
+def box_distance(px, py, box): # from points to boxes (x0, y0, x1, y1), 0 inside
+    dx = np.maximum(np.maximum(box[...,0] - px, px - box[...,2]), 0)
+    dy = np.maximum(np.maximum(box[...,1] - py, py - box[...,3]), 0)
+    return np.hypot(dx, dy)
+
+def padded(lists): # lists of indices as rows of an array, -1 after the end
+    table = np.full((len(lists), max([len(l) for l in lists] + [1])), -1, dtype=np.intp)
+    for i, l in enumerate(lists):
+        table[i,:len(l)] = l
+    return table
+
+class Route: # how far the win flag is from everywhere, following the level graph
+    def __init__(self, objects):
+        graph = self.graph = level_analyzer.LevelGraph(objects)
+        pw, ph = graph.pw, graph.ph
+        # boxes the middle of the player's feet is in while on a node
+        self.boxes = np.stack((graph.x0 + pw/2, graph.ya, graph.x1 + pw/2, graph.yb), axis=1).reshape(-1, 4)
+        n = len(graph.nodes)
+
+        # every way on from a node is (node, box to get into, node it leads to, where it comes out, edge cost), -1 is the flag
+        rects = np.array([(r.x, r.y, r.x + r.width, r.y + r.height) for r in level_analyzer.solid_rects(objects)], dtype=np.float64).reshape(-1, 4)
+        ways = []
+        for s in range(n):
+            centre = ((self.boxes[s,0]+self.boxes[s,2])/2, self.boxes[s,1])
+            for t in graph.edges[s]:
+                if graph.pipe_edges.get(s) == t: # stand in the middle of the pipe and go down
+                    pipe = graph.nodes[s][5]
+                    middle = pipe.x + pipe.width/2
+                    ways.append((s, (middle - 1, pipe.y, middle + 1, pipe.y), t, tuple(pipe.teleport_pos), HOP_COST))
+                elif not self.covered(rects, s, t):
+                    box = self.boxes[t]
+                    ways.append((s, tuple(box), t, (min(max(centre[0], box[0]), box[2]), min(max(centre[1], box[1]), box[3])), HOP_COST))
+        for f in objects["flags"]:
+            if isinstance(f, main.WinFlag):
+                box = (f.x - pw/2, f.y - f.length, f.x + pw/2, f.y + ph)
+                for s in np.nonzero(graph.touches(level_analyzer.flag_box(f)))[0].tolist():
+                    ways.append((s, box, -1, None, 0))
+
+        self.ways = ways
+        self.into = [[] for _ in range(n)]
+        for k, way in enumerate(ways):
+            if way[2] >= 0:
+                self.into[way[2]].append(k)
+        self.detour = np.zeros(len(ways)) # added to ways the search got stuck on, something the graph doesn't know about is in the way
+        self.way_cost = self.measure()
+
+        # ways as arrays, per node the ways out of it and per way the ways out of where it leads
+        out = [[] for _ in range(n + 1)] # the last row is for copies that aren't anywhere yet
+        for k, way in enumerate(ways):
+            out[way[0]].append(k)
+        self.way_box = np.array([way[1] for way in ways], dtype=np.float64).reshape(-1, 4)
+        self.way_hop = np.array([way[4] for way in ways], dtype=np.float64)
+        self.way_ahead = np.array([way[2] >= 0 and way[2] != graph.pipe_edges.get(way[0]) and len(out[way[2]]) > 0 and
+                                   max(way[1][2] - way[1][0], way[1][3] - way[1][1]) > AHEAD for way in ways], dtype=bool)
+        self.node_ways = padded(out)
+        self.way_next = padded([out[way[2]] if way[2] >= 0 else [] for way in ways])
+
+    def covered(self, rects, s, t): # one solid rect is over all of node s and t, between them, the graph doesn't know about ceilings
+        g = self.graph
+        if g.ya[t] >= g.ya[s] - g.ph:
+            return False
+        lo, hi = min(g.x0[s], g.x0[t]), max(g.x1[s], g.x1[t]) + g.pw
+        return bool(((rects[:,0] <= lo) & (rects[:,2] >= hi) & (rects[:,1] >= g.ya[t]) & (rects[:,3] <= g.ya[s] - g.ph)).any())
+
+    def measure(self): # dijkstra from the flag backwards over the ways, each measured from where the one before comes out
+        ways = self.ways
+        cost = np.full(len(ways), np.inf)
+        heap = [(float(self.detour[k]), k) for k, way in enumerate(ways) if way[2] == -1]
+        for c, k in heap:
+            cost[k] = c
+        while heap:
+            c, k = heapq.heappop(heap)
+            if c > cost[k]:
+                continue
+            box = np.array(ways[k][1])
+            for before in self.into[ways[k][0]]:
+                through = c + ways[before][4] + float(self.detour[before]) + float(box_distance(ways[before][3][0], ways[before][3][1], box))
+                if through < cost[before]:
+                    cost[before] = through
+                    heapq.heappush(heap, (through, before))
+        return cost
+
+    def nodes_at(self, env, last): # node every copy stands on or climbs, last where it's in the air
+        g = self.graph
+        x, feet = env.x[:,None], (env.y + g.ph)[:,None]
+        on = (g.x0 < x) & (g.x1 > x)
+        standing = on & (g.kind != level_analyzer.NODE_CLIMB) & (g.ya - 1 <= feet) & (g.yb + 1 >= feet) & env.stood[:,None]
+        climbing = on & (g.kind == level_analyzer.NODE_CLIMB) & (g.ya <= feet) & (g.yb >= feet) & env.climb_mode[:,None]
+        found = standing | climbing
+        return np.where(found.any(axis=1), found.argmax(axis=1), last)
+
+    def start_node(self, env): # where copy 0 is, or lands
+        g = self.graph
+        node = int(self.nodes_at(env, np.full(env.n, -1))[0])
+        if node < 0:
+            node = g.landing_node(env.x[0], env.y[0] + g.ph)
+        return len(g.nodes) if node == None else node
+
+    def way_values(self, nodes, px, py): # how far the flag is along every way on from each copy's node
+        w = self.node_ways[nodes]
+        box = self.way_box[w]
+        value = box_distance(px[:,None], py[:,None], box) + self.way_cost[w]
+        # a way into a big box, like a moving rect's path, is measured on from the nearest point in it
+        r, k = np.nonzero(self.way_ahead[w] & (w >= 0))
+        if len(r):
+            way, b = w[r,k], box[r,k]
+            qx, qy = np.clip(px[r], b[:,0], b[:,2]), np.clip(py[r], b[:,1], b[:,3])
+            after = self.way_next[way]
+            on = box_distance(qx[:,None], qy[:,None], self.way_box[after]) + self.way_cost[after]
+            on = np.where(after >= 0, on, np.inf).min(axis=1)
+            value[r,k] = box_distance(px[r], py[r], b) + self.way_hop[way] + self.detour[way] + on
+        return np.where(w >= 0, value, np.inf)
+
+    def avoid(self, node, x, y): # makes the way on from node that a copy at x, y is closest to the flag along longer
+        values = self.way_values(np.array([node]), np.array([x + self.graph.pw/2]), np.array([y + self.graph.ph]))[0]
+        if np.isfinite(values).any():
+            self.detour[self.node_ways[node, np.argmin(values)]] += DETOUR
+            self.way_cost = self.measure()
+
+    def remaining(self, nodes, env): # how far every copy still has to go
+        g = self.graph
+        x, y = env.x, env.y
+        inside = np.nonzero(env.frozen > 0)[0]
+        if len(inside): # copies in a pipe are already where it comes out, or they'd look no better than the ones still on top
+            x, y, nodes = x.copy(), y.copy(), nodes.copy()
+            exit = env.pipe_exit[env.pipe_used[inside]]
+            x[inside], y[inside] = exit[:,0], exit[:,1]
+            for r in inside.tolist():
+                node = g.landing_node(x[r], y[r] + g.ph)
+                nodes[r] = len(g.nodes) if node == None else node
+        return self.way_values(nodes, x + g.pw/2, y + g.ph).min(axis=1)
+
+def unwind(history, move=None): # the moves of a history, oldest first
+    steps = [] if move == None else [move]
+    while history != None:
+        history, move = history
+        steps.append(move)
+    return steps[::-1]
+
+def plan(envs, store, route, rng, start, horizon=None): # moves that win in the simulator from copy 0 of start on, None if none were found
+    if not np.isfinite(route.way_cost).any(): # the flag can't be reached along the graph
+        return None
+    table = move_table()
+    wide = 0 # envs[0] has COPIES, envs[1] WIDE_COPIES
+    env = envs[wide]
+    env.clone(np.arange(env.n), np.zeros(env.n, dtype=np.intp), start)
+    history = [None] * env.n # (history before, move) per copy
+    nodes = np.full(env.n, route.start_node(start))
+    moves = rng.integers(len(MOVES), size=env.n)
+    segments = (env.max_steps - int(start.steps[0])) // SEGMENT
+    if horizon != None:
+        segments = min(segments, horizon)
+    best, best_segment = np.inf, 0 # of this try
+    record, back = np.inf, None # of the whole plan, and the checkpoint the last retry went back to
+    wide_until = -1
+    saves = {} # checkpoint: (segment, histories, nodes, count) of the beam kept there, the copies are in store
+    retries = 0
+    segment, simulated = 0, 0
+    while segment < segments and simulated < BUDGET * segments:
+        ended = np.zeros(env.n, dtype=bool)
+        for frame in range(SEGMENT):
+            env.step(table[moves])
+            if env.won.any():
+                winner = int(np.argmax(env.won))
+                return unwind(history[winner], int(moves[winner]))
+            ended |= env.done
+        simulated += 1
+        history = [(history[r], int(moves[r])) for r in range(env.n)]
+        nodes = route.nodes_at(env, nodes)
+        remaining = route.remaining(nodes, env)
+        remaining[ended] = np.inf
+        if remaining.min() < best - 1:
+            best, best_segment = remaining.min(), segment
+        if remaining.min() < record - 1:
+            record, back, retries = remaining.min(), None, 0
+        stuck = segment - best_segment > STALL
+        if os.environ.get("DBG") and (segment % 20 == 0 or not np.isfinite(remaining.min())): print(segment, wide, round(float(remaining.min()),1), round(float(env.x[np.argmin(remaining)])), round(float(env.y[np.argmin(remaining)])), int(nodes[np.argmin(remaining)]), file=sys.stderr)
+        if not np.isfinite(remaining.min()) or stuck:
+            # every copy died or they got nowhere, so go back a checkpoint further than last time and search from there wide
+            if retries == RETRIES or not saves:
+                break
+            r = int(np.argmin(remaining))
+            if stuck and (env.stood[r] or env.climb_mode[r]): # the route leads somewhere that doesn't go on
+                route.avoid(int(nodes[r]), env.x[r], env.y[r])
+                if os.environ.get("DBG"): print("avoid at", segment, int(nodes[r]), env.x[r], env.y[r], [route.ways[k][:3:2] for k in np.nonzero(route.detour)[0]], file=sys.stderr)
+                record, back = np.inf, None
+            retries += 1
+            back = max(min(max(saves), back - 1) if back != None else max(saves), min(saves))
+            for k in [k for k in saves if k > back]:
+                del saves[k]
+            failed = segment
+            segment, history, nodes, count = saves[back]
+            env, wide, wide_until = envs[1], 1, failed + WIDE_FOR
+            rows = back % RING * WIDE_BEAM + np.arange(count)
+            src = np.repeat(rows, -(-env.n // count))[:env.n]
+            env.clone(np.arange(env.n), src, store)
+            history = [history[r] for r in (src - rows[0]).tolist()]
+            nodes = nodes[src - rows[0]]
+            moves = rng.integers(len(MOVES), size=env.n)
+            best, best_segment = np.inf, segment
+            continue
+        to = wide # wider where the search doesn't get on, narrower again once it has for a while
+        if not wide and segment - best_segment >= WIDEN:
+            to, wide_until = 1, segment + WIDE_FOR
+        elif wide and segment >= wide_until and segment - best_segment < WIDEN:
+            to = 0
+        beam = WIDE_BEAM if to else BEAM
+        keep, taken = [], set()
+        for r in np.argsort(remaining, kind="stable").tolist():
+            if remaining[r] == np.inf or len(keep) == beam:
+                break
+            bucket = (int(nodes[r]), int(env.x[r] // BUCKET), int(env.y[r] // BUCKET))
+            if bucket not in taken:
+                taken.add(bucket)
+                keep.append(r)
+        segment += 1
+        if segment % CHECKPOINT == 0:
+            k = segment // CHECKPOINT
+            store.clone(k % RING * WIDE_BEAM + np.arange(len(keep)), np.array(keep), env)
+            saves[k] = (segment, [history[r] for r in keep], nodes[keep], len(keep))
+            saves.pop(k - RING, None)
+        copies = envs[to].n
+        src = np.repeat(keep, -(-copies // len(keep)))[:copies]
+        envs[to].clone(np.arange(copies), src, env)
+        env, wide = envs[to], to
+        history = [history[r] for r in src.tolist()]
+        nodes = nodes[src]
+        previous = moves[src]
+        moves = rng.integers(len(MOVES), size=copies)
+        first = np.concatenate(([True], src[1:] != src[:-1])) # one try of each kept copy goes on with what it did
+        moves[first] = previous[first]
+    if horizon == None or history[0] == None:
+        return None
+    return unwind(history[0]) # a plan that only has to get past danger: the moves of the best copy kept last
+
+class Tracker: # a copy that follows a real game, for planning on from where the game is
+    def __init__(self, objects, g, like):
+        self.env = multi_env.BatchedEnv(objects, 1, like=like)
+        self.g = g
+        self.enemies = [e for e in g.enemies if type(e) in main.EnemyEngine.kinds] # in the order of the copy's enemies
+        self.coins = list(g.coins)
+        self.throwers = [k for k, e in enumerate(self.enemies) if type(e) == main.JumpThrowEnemy]
+
+    def step(self, action):
+        self.env.step(action[None])
+
+    def sync(self): # the copy gets what the game knows better: the player, what is left and where the live enemies and axes are
+        env, g, p = self.env, self.g, self.g.player
+        env.x[0], env.y[0], env.x_vel[0], env.y_vel[0], env.jump_timer[0] = p.x, p.y, p.x_vel, p.y_vel, p.jump_timer
+        env.jump_mode[0], env.climb_mode[0], env.stood[0] = p.jump_mode, p.climb_mode, p.stood_on_ground_previous_frame
+        env.camera_x[0], env.camera_y[0], env.camera_offset[0] = g.camera.x, g.camera.y, g.camera.x_offset
+        env.time[0] = g.level_time
+        present = set(map(id, g.enemies))
+        env.enemy_alive[0] = [id(e) in present for e in self.enemies]
+        present = set(map(id, g.coins))
+        env.coins_taken[0] = [id(c) not in present for c in self.coins]
+        engine = env.live_engine
+        for slot, k in enumerate(env.live.tolist()):
+            e = self.enemies[k]
+            if not e.turned_on:
+                continue
+            if env.switched_on[0,k] == multi_env.NOT_SWITCHED_ON: # the camera saw it a bit earlier in the game
+                env.switched_on[0,k] = env.frame[0]
+            row = engine.row_of[0, slot]
+            for name, attr, kinds in engine.fields:
+                if kinds == None or engine.kinds[type(e)] in kinds:
+                    getattr(engine, name)[row] = getattr(e, attr, 0)
+        axes = [e for e in g.enemies if type(e) == main.Axe][-multi_env.AXES:]
+        env.axe_on[0] = False
+        for slot, axe in enumerate(axes):
+            env.axe_x[0,slot], env.axe_y[0,slot], env.axe_speed[0,slot], env.axe_y_vel[0,slot] = axe.x, axe.y, axe.x_speed, axe.y_vel
+            env.axe_on[0,slot] = True
+        env.axe_next[0] = len(axes)
+
+    def in_danger(self): # a jump throw enemy in the game is close, it may have gone another way than planned
+        p = self.g.player
+        alive = self.env.enemy_alive[0]
+        return any(alive[k] and self.enemies[k].turned_on and abs(self.enemies[k].x - p.x) < DANGER_RANGE for k in self.throwers)
+
+def deadly(check, tracker, actions): # whether some of the check copies die playing actions on from where the tracker is
+    check.clone(np.arange(check.n), np.zeros(check.n, dtype=np.intp), tracker.env)
+    died = np.zeros(check.n, dtype=bool)
+    ended = np.zeros(check.n, dtype=bool)
+    for action in actions:
+        check.step(np.repeat(action[None], check.n, axis=0))
+        died |= check.died & ~ended
+        ended |= check.done
+        if ended.all():
+            break
+    return died.any()
+
+def play(objects, route, envs, store, check, rng): # plays the level in a real game, planning again where the plan looks deadly
+    g = multi_env.level_game(objects)
+    g.frame_time = multi_env.FRAME_TIME
+    keys = multi_env.KeyInput()
+    g.input_keys = keys.keys_state
+    tracker = Tracker(objects, g, check)
+    table = move_table()
+    graph = route.graph
+    visited, pipes = set(), set()
+    actions, frame, replans = None, 0, 0
+    result = {"won":False}
+    while True:
+        if frame % SEGMENT == 0 and g.game_stopping_animation == None:
+            tracker.sync()
+            ran_out = actions is None or frame >= len(actions)
+            danger = not ran_out and frame % (SEGMENT * CHECK_EVERY) == 0 and tracker.in_danger()
+            if ran_out or (danger and deadly(check, tracker, actions[frame:frame + CHECK_FRAMES])):
+                if replans == REPLANS:
+                    break
+                moves = plan(envs, store, route, rng, tracker.env, HORIZON if danger else None)
+                replans += not ran_out
+                if moves == None:
+                    if ran_out:
+                        break
+                else:
+                    if danger:
+                        moves = moves[:PLAYED] # the rest only made sure those don't lead somewhere deadly
+                    actions, frame = np.repeat(table[moves], SEGMENT, axis=0), 0
+        action = actions[min(frame, len(actions) - 1)]
+        frame += 1
+        keys.update(g, action)
+        g.do_game_logic()
+        tracker.step(action)
+        p = g.player
+        animation = g.game_stopping_animation
+        if isinstance(animation, main.GameStoppingAnimationPlayerWinsLevel):
+            result = {"won":True, "nodes":len(visited), "coins":p.coins, "pipes":len(pipes)}
+            break
+        if isinstance(animation, main.GameStoppingAnimation) and animation.animation == main.GS_ANIMATION_PLAYER_DIES:
+            result = {"won":False, "died":True}
+            break
+        if isinstance(animation, main.GameStoppingAnimationPlayerInPipe):
+            pipes.add(animation.teleport_pos)
+        if p.stood_on_ground_previous_frame or p.climb_mode:
+            feet = p.y + p.height
+            on = (graph.x0 < p.x) & (graph.x1 > p.x) & (graph.ya - 1 <= feet) & (graph.yb + 1 >= feet)
+            visited |= set(np.nonzero(on)[0].tolist())
+        if g.level_time > multi_env.MAX_STEPS * multi_env.FRAME_TIME:
+            break
+    result.update({"time":g.level_time, "x":g.player.x, "y":g.player.y, "replans":replans})
+    return result
+
+def play_level(path, seed=0):
+    begin = time.perf_counter()
+    pygame.init()
+    objects = multi_env.load_level(path)
+    with contextlib.redirect_stdout(io.StringIO()): # the game prints when the player dies
+        route = Route(objects)
+        check = multi_env.BatchedEnv(objects, CHECK_COPIES, max_steps=multi_env.MAX_STEPS + CHECK_FRAMES)
+        envs = [multi_env.BatchedEnv(objects, COPIES, like=check), multi_env.BatchedEnv(objects, WIDE_COPIES, like=check)]
+        store = multi_env.BatchedEnv(objects, RING * WIDE_BEAM, like=check)
+        report = {"path":path, "deaths":0, "replans":0}
+        for attempt in range(ATTEMPTS):
+            random.seed(seed + attempt) # the game's jump throw enemies
+            np.random.seed(seed + attempt) # the copies' ones
+            result = play(objects, route, envs, store, check, np.random.default_rng(seed + attempt))
+            report["deaths"] += result.pop("died", False)
+            report["replans"] += result.pop("replans")
+            report.update(result)
+            if result["won"]:
+                break
+    report.update({"total_nodes":len(route.graph.nodes), "total_coins":len(objects["coins"]), "total_pipes":len(objects["pipes"]),
+                   "elapsed":time.perf_counter() - begin})
+    pygame.quit() # SDL keeps SIGTERM to itself until then, and the pool ends its workers with it
+    return report
+
+def format_report(report):
+    line = f"{report['path']}: "
+    if report["won"]:
+        line += (f"won in {report['time']/1000:.1f} s of level time, {report['deaths']} deaths, {report['replans']} replans, "
+                 f"visited {report['nodes']}/{report['total_nodes']} nodes, {report['coins']}/{report['total_coins']} coins, "
+                 f"{report['pipes']}/{report['total_pipes']} pipes")
+    else:
+        line += f"NOT won, {report['deaths']} deaths, {report['replans']} replans, last at ({report['x']:.0f}, {report['y']:.0f})"
+    return line + f" ({report['elapsed']:.1f} s)"
+
+def run(): # bot.py [level paths], all levelN.pickle without any. Exits with 1 if a level wasn't won
+    paths = sys.argv[1:]
+    if not paths:
+        i = 0
+        while os.path.exists("level"+str(i)+".pickle"):
+            paths.append("level"+str(i)+".pickle")
+            i += 1
+    start = time.perf_counter()
+    with Pool() as pool:
+        reports = pool.map(play_level, paths)
+    for report in reports:
+        print(format_report(report))
+    won = sum(r["won"] for r in reports)
+    print(f"{won}/{len(reports)} levels won in {time.perf_counter() - start:.1f} s")
+    sys.exit(0 if won == len(reports) else 1)
+
+if __name__ == "__main__":
+    run()
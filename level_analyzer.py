@@ -0,0 +1,245 @@
+import sys, io, time
+from multiprocessing import Pool
+import numpy as np
+import main
+
+# Finds out what the player can reach in a level without playing it. Standable surfaces, moving platform paths and
+# climbing rects become nodes, and an edge means the player can jump or fall from one to the other. The jump
+# envelope is simulated with the same constants as Player.logic. Ceilings in the way of a jump are not checked,
+# so the analysis is optimistic: something it reports as unreachable can't be reached. Enemies standing on a node
+# count as something to bounce off.
+
+FRAME_TIME = 1000 / 60
+NODE_SURFACE, NODE_MOVING, NODE_CLIMB = range(3)
+
+def jump_trajectory(frame_time=FRAME_TIME, stomp=False): # feet positions of a jump holding space and a direction, until falling kills
+    x = y = 0.0
+    if stomp: # bounce off an enemy, which happens at the end of a frame
+        y_vel = main.PLAYER_STOMP_VELOCITY
+        jump_timer = 0.2*main.PLAYER_JUMP_TIME
+    else:
+        y_vel = main.PLAYER_JUMP_VELOCITY
+        jump_timer = 0
+    jump_mode = True
+    first_frame = not stomp
+    points = [(x, y)]
+    while y_vel <= main.PLAYER_DEADLY_FALL_VELOCITY:
+        if jump_mode and not first_frame:
+            jump_timer += frame_time
+            if jump_timer >= main.PLAYER_JUMP_TIME:
+                jump_mode = False
+        first_frame = False
+        y_vel += (jump_timer/main.PLAYER_JUMP_TIME)*main.PLAYER_GRAVITY if jump_mode else main.PLAYER_GRAVITY
+        x += main.PLAYER_SPEED * frame_time
+        y += y_vel * frame_time
+        points.append((x, y))
+    return points
+
+class JumpEnvelope:
+    def __init__(self, frame_time=FRAME_TIME, stomp=False):
+        points = jump_trajectory(frame_time, stomp)
+        apex = min(range(len(points)), key=lambda i: points[i][1])
+        falling = points[apex:]
+        self.xs = np.array([p[0] for p in falling])
+        self.ys = np.array([p[1] for p in falling])
+        self.apex = self.ys[0] # negative, up
+        self.deadly_fall = self.ys[-2] # falling further than this kills
+        self.max_reach = self.xs[-2]
+
+    def reach(self, dy): # how far to the side the feet can get dy below the takeoff height, nan if they can't
+        dy = np.asarray(dy, dtype=np.float64)
+        return np.where((dy >= self.apex) & (dy <= self.deadly_fall), np.interp(dy, self.ys, self.xs), np.nan)
+
+def jump_height(e, frame_time=FRAME_TIME): # how high a jumping enemy gets, so how much higher it can be stomped
+    y_vel = getattr(e, "jump_velocity", 0)
+    height = 0
+    while y_vel < 0:
+        y_vel += e.y_speed
+        height -= y_vel * frame_time
+    return height
+
+def solid_rects(objects):
+    return [r for r in objects["collision_rects"] + objects["pipes"] if not isinstance(r, main.MovingCollisionRect)]
+
+def free_ranges(lo, hi, blocked): # parts of (lo, hi) not covered by the blocked ranges
+    ranges = []
+    for b_lo, b_hi in sorted(blocked):
+        if b_lo > lo:
+            ranges.append((lo, min(b_lo, hi)))
+        lo = max(lo, b_hi)
+        if lo >= hi:
+            break
+    if lo < hi:
+        ranges.append((lo, hi))
+    return [r for r in ranges if r[1] > r[0]]
+
+class LevelGraph:
+    def __init__(self, objects, envelope=None):
+        self.objects = objects
+        self.envelope = envelope or JumpEnvelope()
+        self.stomp_envelope = JumpEnvelope(stomp=True)
+        self.pw = main.PLAYER_WIDTH
+        self.ph = main.PLAYER_SMALL_HEIGHT
+        self.nodes = [] # (kind, x0, x1, ya, yb, source object), x is the player's left side, y its feet
+        self.build_nodes()
+        self.kind = np.array([n[0] for n in self.nodes], dtype=np.int8)
+        self.x0, self.x1, self.ya, self.yb = (np.array([n[i] for n in self.nodes], dtype=np.float64).reshape(-1) for i in (1,2,3,4))
+        self.bounce = np.zeros(len(self.nodes)) # height of the tallest enemy to bounce off on each node
+        for e in self.objects["enemies"]:
+            if e.can_be_jumped_on:
+                on = self.standing_on(e)
+                self.bounce[on] = np.maximum(self.bounce[on], e.height + jump_height(e))
+        self.build_edges()
+
+    def build_nodes(self):
+        rects = solid_rects(self.objects)
+        rx, ry, rw, rh = (np.array([getattr(r, a) for r in rects], dtype=np.float64) for a in ("x","y","width","height"))
+        for i, r in enumerate(rects): # top of every solid rect where the player fits
+            above = (ry < r.y) & (ry+rh > r.y-self.ph) & (rx < r.x+r.width+self.pw) & (rx+rw > r.x-self.pw)
+            blocked = [(rx[j]-self.pw, rx[j]+rw[j]) for j in np.nonzero(above)[0]]
+            for lo, hi in free_ranges(r.x-self.pw, r.x+r.width, blocked):
+                self.nodes.append((NODE_SURFACE, lo, hi, r.y, r.y, r))
+        for r in self.objects["collision_rects"]: # moving rects carry the player on top and push it at the sides
+            if isinstance(r, main.MovingCollisionRect):
+                xs = (r.start_pos[0], r.end_pos[0])
+                ys = (r.start_pos[1], r.end_pos[1])
+                self.nodes.append((NODE_MOVING, min(xs)-self.pw, max(xs)+r.width, min(ys), max(ys)+r.height+self.ph, r))
+        for r in self.objects["climbing_rects"]:
+            self.nodes.append((NODE_CLIMB, r.x-self.pw, r.x+r.width, r.y, r.y+r.height+self.ph, r))
+
+    def standing_on(self, e): # mask of nodes something with the rect of e stands on or is inside of
+        return (self.x0 < e.x+e.width) & (self.x1 > e.x-self.pw) & (self.ya-e.height-self.ph <= e.y) & (self.yb >= e.y)
+
+    @staticmethod
+    def envelope_reach(envelope, sx0, sx1, sya, syb, tx0, tx1, tya, tyb):
+        dy = np.minimum(tyb - sya, envelope.deadly_fall)
+        possible = dy >= np.maximum(envelope.apex, tya - syb)
+        gap = np.maximum(0, np.maximum(tx0 - sx1, sx0 - tx1))
+        with np.errstate(invalid="ignore"):
+            return possible & (gap <= envelope.reach(dy))
+
+    def can_reach(self, sx0, sx1, sya, syb, bounce, tx0, tx1, tya, tyb): # sources and targets broadcast against each other
+        reach = self.envelope_reach(self.envelope, sx0, sx1, sya, syb, tx0, tx1, tya, tyb)
+        return reach | ((bounce > 0) & self.envelope_reach(self.stomp_envelope, sx0, sx1, sya-bounce, syb-bounce, tx0, tx1, tya, tyb))
+
+    def reachable_from(self, s, x0, x1, ya, yb): # mask of targets the player can get to from node s
+        return self.can_reach(self.x0[s], self.x1[s], self.ya[s], self.yb[s], self.bounce[s], x0, x1, ya, yb)
+
+    def landing_node(self, x, y): # node the player ends up on when dropped with its left side at x and feet at y
+        under = (self.kind != NODE_CLIMB) & (self.x0 <= x) & (self.x1 >= x) & (self.yb >= y) & (self.ya - y <= self.envelope.deadly_fall)
+        climb = (self.kind == NODE_CLIMB) & (self.x0 <= x) & (self.x1 >= x) & (self.ya <= y) & (self.yb >= y)
+        candidates = np.nonzero(under | climb)[0]
+        if len(candidates) == 0:
+            return None
+        return int(candidates[np.argmin(np.maximum(self.ya[candidates] - y, 0))])
+
+    def build_edges(self):
+        n = len(self.nodes)
+        self.edges = [[] for _ in range(n)]
+        self.pipe_edges = {}
+        order = np.argsort(self.x0)
+        sorted_x0 = self.x0[order]
+        widest = float((self.x1 - self.x0).max()) if n else 0
+        for s in range(n):
+            max_reach = max(self.envelope.max_reach, self.stomp_envelope.max_reach)
+            lo = np.searchsorted(sorted_x0, self.x0[s] - widest - max_reach, "left")
+            hi = np.searchsorted(sorted_x0, self.x1[s] + max_reach, "right")
+            window = order[lo:hi]
+            mask = self.reachable_from(s, self.x0[window], self.x1[window], self.ya[window], self.yb[window])
+            self.edges[s] = [int(t) for t in window[mask] if t != s]
+        for s, node in enumerate(self.nodes):
+            pipe = node[5]
+            if isinstance(pipe, main.Pipe) and pipe.width > self.pw: # the player must stand fully on the pipe to go down
+                t = self.landing_node(pipe.teleport_pos[0]-self.pw/2, pipe.teleport_pos[1])
+                if t != None:
+                    self.pipe_edges[s] = t
+                    self.edges[s].append(t)
+        self.reverse_edges = [[] for _ in range(n)]
+        for s in range(n):
+            for t in self.edges[s]:
+                self.reverse_edges[t].append(s)
+
+    def touches(self, box): # mask of nodes from which the player can touch a box (x0, y0, x1, y1)
+        bx0, by0, bx1, by1 = box
+        # as a target: player left sides that overlap the box, feet anywhere the body overlaps it
+        return self.can_reach(self.x0, self.x1, self.ya, self.yb, self.bounce, bx0-self.pw, bx1, by0, by1+self.ph)
+
+    @staticmethod
+    def search(start, edges):
+        seen = set(start)
+        stack = list(start)
+        while stack:
+            for t in edges[stack.pop()]:
+                if t not in seen:
+                    seen.add(t)
+                    stack.append(t)
+        return seen
+
+def coin_box(coin):
+    return (coin.x-coin.radius, coin.y-coin.radius, coin.x+coin.radius, coin.y+coin.radius)
+
+def flag_box(flag):
+    return (flag.x, flag.y-flag.length, flag.x, flag.y)
+
+def analyze(objects, start=(0,0)):
+    begin = time.perf_counter()
+    graph = LevelGraph(objects)
+    start_node = graph.landing_node(start[0], start[1]+main.PLAYER_SMALL_HEIGHT)
+    reached = graph.search([] if start_node == None else [start_node], graph.edges)
+    reached_mask = np.zeros(len(graph.nodes), dtype=bool)
+    reached_mask[list(reached)] = True
+
+    def unreachable(things, box):
+        return [t for t in things if not (graph.touches(box(t)) & reached_mask).any()]
+
+    win_flags = [f for f in objects["flags"] if isinstance(f, main.WinFlag)]
+    finishing = set()
+    for f in win_flags:
+        finishing |= set(np.nonzero(graph.touches(flag_box(f)))[0].tolist())
+    can_finish = graph.search(list(finishing), graph.reverse_edges)
+
+    can_die = set()
+    for s, (kind, x0, x1, ya, yb, obj) in enumerate(graph.nodes): # a pit next to it or an enemy on it
+        for x in (x0 - 1, x1 + 1):
+            if graph.landing_node(x, yb) == None:
+                can_die.add(s)
+    for e in objects["enemies"]:
+        can_die |= set(np.nonzero(graph.standing_on(e))[0].tolist())
+    soft_locks = [graph.nodes[s] for s in sorted(reached - can_finish - can_die)]
+
+    entered_pipes = set(graph.nodes[s][5] for s in graph.pipe_edges if s in reached)
+    return {"nodes":len(graph.nodes),
+            "start_found":start_node != None,
+            "completable":bool(reached & can_finish) and bool(win_flags),
+            "unreachable_coins":[(c.x, c.y) for c in unreachable(objects["coins"], coin_box)],
+            "unreachable_flags":[(type(f).__name__, f.x, f.y) for f in unreachable(objects["flags"], flag_box)],
+            "unreachable_pipes":[(p.x, p.y) for p in objects["pipes"] if p not in entered_pipes],
+            "soft_locks":[(x0, ya, x1+graph.pw, yb) for kind, x0, x1, ya, yb, obj in soft_locks],
+            "time":time.perf_counter() - begin}
+
+def format_report(name, report):
+    lines = [name + ": " + ("completable" if report["completable"] else "NOT completable") +
+             f" ({report['nodes']} nodes, {report['time']*1000:.0f} ms)"]
+    if not report["start_found"]:
+        lines.append("  no ground under the start position")
+    for key, label in (("unreachable_coins","unreachable coin"),("unreachable_flags","unreachable flag"),
+                       ("unreachable_pipes","pipe that can't be entered"),("soft_locks","soft-lock region")):
+        for thing in report[key]:
+            lines.append("  " + label + " at " + str(tuple(round(v) if isinstance(v, float) else v for v in thing)))
+    return "\n".join(lines)
+
+def analyze_level_data(name, data): # the report on pickled level objects
+    return format_report(name, analyze(main.LevelUnpickler(io.BytesIO(data)).load()))
+
+def analyze_level_file(path):
+    with open(path, "rb") as f:
+        return analyze_level_data(path, f.read())
+
+def run():
+    paths = sys.argv[1:] or ["level"+str(i)+".pickle" for i in range(5)]
+    with Pool() as pool:
+        for report in pool.map(analyze_level_file, paths):
+            print(report)
+
+if __name__ == "__main__":
+    run()
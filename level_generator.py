@@ -0,0 +1,152 @@
+import os, sys, time, random, pickle
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # coins and flags want a game, which wants a display
+
+import pygame
+import main
+import level_analyzer
+
+# Builds big levels for stress tests from a seed. The level is a row of platforms from left to right, the gaps and
+# height changes between them come from the jump envelope, so every platform can be reached from the one before.
+# Wider gaps get a moving platform, higher steps a climbing rect, and some platforms have a pipe to one further on.
+# Enemies and coins get more common with the density, which goes from 0 to 1.
+
+GRID = 30
+PLATFORM_HEIGHT = GRID*2
+PIPE_WIDTH = GRID*2
+PIPE_HEIGHT = GRID*2
+RESPAWN_EVERY = 10 # platforms
+ANALYZE_MAX_OBJECTS = 20000 # the analyzer gets slow on bigger levels, which are completable by construction anyway
+
+SEGMENT_PLAIN, SEGMENT_MOVING, SEGMENT_CLIMB = range(3)
+
+def grid(v):
+    return int(v // GRID) * GRID
+
+class LevelGenerator:
+    def __init__(self, g, seed=0, density=0.5):
+        self.g = g
+        self.rng = random.Random(seed)
+        self.density = density
+        self.envelope = level_analyzer.JumpEnvelope()
+        self.objects = {category:[] for category in g.objects}
+        self.pending_pipes = [] # (pipe on an earlier platform, its color value, platform index it leads to)
+
+    def add(self, obj):
+        self.objects[self.g.object_mappings[type(obj)]].append(obj)
+        return obj
+
+    def generate(self, segments):
+        self.segments = segments
+        rng = self.rng
+        x, y = -GRID*3, GRID # the player starts at 0,0 and lands on the first platform
+        width = GRID*10
+        for i in range(segments):
+            last = i == segments - 1
+            platform = self.add(main.CollisionRect(x, y, width, PLATFORM_HEIGHT))
+            self.fill_platform(i, platform, last)
+            if last:
+                break
+
+            segment = rng.choices((SEGMENT_PLAIN, SEGMENT_MOVING, SEGMENT_CLIMB), (0.75, 0.15, 0.1))[0]
+            next_width = rng.randint(4, 14) * GRID
+            if segment == SEGMENT_MOVING: # too far to jump, ride over
+                mover_width = GRID*3
+                gap = grid(self.envelope.max_reach * rng.uniform(1, 2))
+                start = (x + width + GRID, y)
+                end = (x + width + gap - mover_width - GRID, y)
+                self.add(main.MovingCollisionRect(start, end, mover_width, GRID, rng.choice((0.02, 0.04, 0.06))))
+                x += width + gap
+            elif segment == SEGMENT_CLIMB: # a wall too high to jump on, with a climbing rect in front of it
+                rise = rng.randint(4, 8) * GRID
+                self.add(main.ClimbingRect(x + width - GRID, y - rise, GRID, rise))
+                x += width
+                self.add(main.CollisionRect(x, y - rise, next_width, rise))
+                y -= rise
+            else:
+                dy = rng.randint(-2, 3) * GRID # down is positive, up to two cells up is in the jump
+                reach = float(self.envelope.reach(dy))
+                x += width + max(GRID, grid(reach * rng.uniform(0.2, 0.7)))
+                y += dy
+            width = next_width if not last else max(next_width, GRID*8)
+        return self.objects
+
+    def fill_platform(self, i, platform, last):
+        rng = self.rng
+        cells = int(platform.width // GRID)
+        x, y = platform.x, platform.y
+        free = list(range(1, cells - 1)) # cells things can stand on, the edges stay clear for landing
+
+        for pipe, color_value, target in self.pending_pipes: # the other end of a pipe from an earlier platform
+            if target == i and len(free) >= 3:
+                cell = free[len(free)//2]
+                exit_pipe = self.add(main.Pipe(x + cell*GRID, y - PIPE_HEIGHT, PIPE_WIDTH, PIPE_HEIGHT, color_value,
+                                               (pipe.x + PIPE_WIDTH/2, pipe.y)))
+                pipe.teleport_pos = (exit_pipe.x + PIPE_WIDTH/2, exit_pipe.y)
+                free = [c for c in free if c < cell - 1 or c > cell + 2]
+        self.pending_pipes = [p for p in self.pending_pipes if p[2] != i]
+
+        if last:
+            self.add(main.WinFlag(self.g, x + (cells - 3)*GRID, y - GRID))
+            return
+        if i > 0 and i % RESPAWN_EVERY == 0:
+            self.add(main.RespawnFlag(self.g, x + GRID, y - GRID))
+            free = [c for c in free if c > 2]
+        elif i > 0 and len(free) >= 4 and rng.random() < 0.1: # pipe to a later platform, the exit gets made there
+            cell = free[0]
+            color_value = rng.randint(0, 2)
+            pipe = self.add(main.Pipe(x + cell*GRID, y - PIPE_HEIGHT, PIPE_WIDTH, PIPE_HEIGHT, color_value, (0, 0)))
+            self.pending_pipes.append((pipe, color_value, min(i + rng.randint(2, 5), self.segments - 1)))
+            free = [c for c in free if c > cell + 2]
+
+        if free and rng.random() < 0.2 * self.density: # block with a mushroom, hit from below
+            cell = rng.choice(free)
+            self.add(main.ItemizedCollisionRect(x + cell*GRID, y - GRID*3, GRID, GRID))
+        for cell in free:
+            if rng.random() < 0.3 * self.density:
+                self.add(main.Coin(self.g, x + cell*GRID, y - GRID*rng.randint(1, 2)))
+        if i == 0:
+            return # nothing hits the player where it starts
+        for _ in range(int(len(free) * 0.25 * self.density + rng.random())):
+            self.add_enemy(x + rng.choice(free)*GRID, y)
+
+    def add_enemy(self, x, ground_y):
+        rng = self.rng
+        kind = rng.randrange(5)
+        if kind == 0:
+            e = main.WalkEnemy(x, 0, rng.random() < 0.7)
+        elif kind == 1:
+            e = main.JumpEnemy(x, 0, rng.random() < 0.5, rng.random() < 0.5)
+        elif kind == 2:
+            e = main.JumpThrowEnemy(x, 0)
+        elif kind == 3:
+            e = main.FlyingEnemy(x, 0, rng.randint(0, 3), rng.randint(0, 3), rng.random() < 0.3)
+        else:
+            e = main.WalkEnemy(x, 0, True)
+        e.y = ground_y - e.height - (GRID*4 if isinstance(e, main.FlyingEnemy) else 0)
+        self.add(e)
+
+def generate(g, seed=0, segments=100, density=0.5):
+    return LevelGenerator(g, seed, density).generate(segments)
+
+def save_level(objects, path):
+    with open(path, "wb") as f:
+        pickle.dump(objects, f, pickle.HIGHEST_PROTOCOL)
+
+def run(): # level_generator.py path [seed] [segments] [density]
+    path = sys.argv[1] if len(sys.argv) > 1 else "level_generated.pickle"
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    segments = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    density = float(sys.argv[4]) if len(sys.argv) > 4 else 0.5
+    pygame.init()
+    g = main.Game(start=False)
+    start = time.perf_counter()
+    objects = generate(g, seed, segments, density)
+    save_level(objects, path)
+    count = sum(len(objs) for objs in objects.values())
+    print(f"{path}: {count} objects from seed {seed} in {time.perf_counter() - start:.2f} s")
+    if count <= ANALYZE_MAX_OBJECTS:
+        print(level_analyzer.format_report(path, level_analyzer.analyze(objects)))
+    pygame.quit()
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,260 @@
+import os, sys, io, time, hashlib
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # runs without a window
+import numpy as np
+import pygame
+import main
+
+# Overviews of whole levels. Objects aren't drawn one by one: every layer is a raster of how many objects cover each
+# cell, and the image comes from those counts. Adding or removing objects adds or subtracts their footprints, so an
+# edit only touches the cells it covers. Rasters are cached on disk under a hash of the level file, so showing a level
+# that didn't change doesn't need to unpickle it. The game shows one as a widget (M), run as a script it writes thumbnails.
+
+CELL = 8 # px of the level per raster cell, levels too big for MAX_CELLS of them get twice that, or four times, ...
+MAX_CELLS = 1 << 19 # per layer
+VERSION = 1 # of the cached rasters, older ones are made again
+CACHE_DIR = "minimaps" # <level file hash>.npz
+GROW = 64 # cells the raster grows by beyond what it needs, so placing objects along an edge doesn't grow it every time
+SLICE_CELLS = 100 # footprints are added one at a time while there are fewer than one per this many cells of the raster,
+# more go through a difference array, which takes a pass over all of it
+SOLID, CLIMBING, PIPES, FLAGS, COINS, ENEMIES = range(6) # layers, later ones are drawn over earlier ones
+LAYERS = {"collision_rects":SOLID, "climbing_rects":CLIMBING, "pipes":PIPES, "flags":FLAGS, "coins":COINS, "enemies":ENEMIES}
+COLORS = np.array([(150,150,150), (40,170,40), (20,120,20), (60,120,255), (255,210,0), (230,40,40)], dtype=np.float64)
+BACKGROUND = (30,30,40)
+SHADES = 3 # cells covered by more objects are brighter, up to this many
+WIDGET_SIZE = (200, 100) # most the widget takes of the screen
+WIDGET_REFRESH = 250 # ms between updates of where coins and enemies are
+
+def palette(): # color of layer*(SHADES+1) + covering objects, where nothing covers a cell it's 0, the background
+    colors = np.empty((len(COLORS) * (SHADES + 1), 3), dtype=np.uint8)
+    colors[:] = BACKGROUND
+    for layer, color in enumerate(COLORS):
+        for shade in range(1, SHADES + 1):
+            colors[layer * (SHADES + 1) + shade] = color * (0.6 + 0.4 * (shade - 1) / (SHADES - 1))
+    return colors
+PALETTE = palette()
+
+def footprint(category, obj): # level rect an object covers on the minimap. By category, not class, since the game's
+    # classes are in __main__ when it runs as a script
+    if category == "coins":
+        return obj.x - obj.radius, obj.y - obj.radius, obj.radius*2, obj.radius*2
+    if category == "flags":
+        return obj.x, obj.y - obj.length, obj.flag_width, obj.length
+    if hasattr(obj, "path_rect"): # a moving rect, all of its way, it doesn't stay anywhere
+        return tuple(obj.path_rect())
+    return obj.x, obj.y, obj.width, obj.height
+
+def footprints(items): # rows of layer, x, y, width, height for (category, object) items
+    rows = [(LAYERS[category],) + footprint(category, obj) for category, obj in items if category in LAYERS]
+    return np.array(rows, dtype=np.float64).reshape(-1, 5)
+
+class LevelRaster:
+    def __init__(self, counts=None, origin=(0, 0), cell=CELL):
+        self.counts = counts if counts is not None else np.zeros((len(COLORS), 0, 0), dtype=np.int16) # [layer, cell y, cell x]
+        self.origin = origin # level cell of counts[:, 0, 0]
+        self.cell = cell
+        self.version = 0 # goes up with every change, for whoever caches what it drew
+
+    @classmethod
+    def from_objects(cls, objects):
+        rects = footprints((category, obj) for category in LAYERS for obj in objects.get(category, []))
+        cell = CELL
+        if len(rects):
+            width = (rects[:,1] + rects[:,3]).max() - rects[:,1].min()
+            height = (rects[:,2] + rects[:,4]).max() - rects[:,2].min()
+            while (width / cell + 2) * (height / cell + 2) > MAX_CELLS:
+                cell *= 2
+        raster = cls(cell=cell)
+        raster.apply(rects, 1)
+        return raster
+
+    def cells(self, rects): # rows of layer, first cell x, y, cell after the last x, y
+        x0, y0 = np.floor(rects[:,1] / self.cell), np.floor(rects[:,2] / self.cell)
+        x1 = np.maximum(np.ceil((rects[:,1] + rects[:,3]) / self.cell), x0 + 1)
+        y1 = np.maximum(np.ceil((rects[:,2] + rects[:,4]) / self.cell), y0 + 1)
+        return np.stack([rects[:,0], x0, y0, x1, y1], axis=1).astype(np.int64)
+
+    def grow(self, cells): # so the counts cover every footprint, False if that would take more than MAX_CELLS
+        ox, oy = self.origin
+        height, width = self.counts.shape[1:]
+        x0, y0 = min(ox, int(cells[:,1].min())), min(oy, int(cells[:,2].min()))
+        x1, y1 = max(ox + width, int(cells[:,3].max())), max(oy + height, int(cells[:,4].max()))
+        if (x0, y0, x1, y1) == (ox, oy, ox + width, oy + height):
+            return True
+        if (x1 - x0) * (y1 - y0) > MAX_CELLS:
+            return False
+        if width: # not the first objects, leave room for more
+            margin = (x0 - GROW if x0 < ox else x0, y0 - GROW if y0 < oy else y0,
+                      x1 + GROW if x1 > ox + width else x1, y1 + GROW if y1 > oy + height else y1)
+            if (margin[2] - margin[0]) * (margin[3] - margin[1]) <= MAX_CELLS:
+                x0, y0, x1, y1 = margin
+        counts = np.zeros((len(COLORS), y1 - y0, x1 - x0), dtype=np.int16)
+        counts[:, oy-y0:oy-y0+height, ox-x0:ox-x0+width] = self.counts
+        self.counts, self.origin = counts, (x0, y0)
+        return True
+
+    def apply(self, rects, sign): # False if the raster can't cover them at its cell size, nothing changed then
+        if not len(rects):
+            return True
+        cells = self.cells(rects)
+        if not self.grow(cells):
+            return False
+        cells -= (0, self.origin[0], self.origin[1], self.origin[0], self.origin[1])
+        if len(cells) * SLICE_CELLS < self.counts[0].size:
+            for layer, x0, y0, x1, y1 in cells.tolist():
+                self.counts[layer, y0:y1, x0:x1] += sign
+        else: # +1 and -1 at the corners of every footprint, summed along both axes that fills them in
+            layers, height, width = self.counts.shape
+            corners = np.zeros((layers, height + 1, width + 1), dtype=np.int32)
+            l, x0, y0, x1, y1 = cells.T
+            np.add.at(corners, (l, y0, x0), sign)
+            np.add.at(corners, (l, y0, x1), -sign)
+            np.add.at(corners, (l, y1, x0), -sign)
+            np.add.at(corners, (l, y1, x1), sign)
+            self.counts += corners.cumsum(axis=1).cumsum(axis=2)[:, :height, :width].astype(np.int16)
+        self.version += 1
+        return True
+
+    def add(self, objs, mappings): # mappings: type to category, like Game.object_mappings
+        return self.apply(footprints((mappings.get(type(obj)), obj) for obj in objs), 1)
+
+    def remove(self, objs, mappings):
+        return self.apply(footprints((mappings.get(type(obj)), obj) for obj in objs), -1)
+
+    def colors(self, layers=LAYERS.values()): # rgb indexed [x, y] for pygame, the top layer of a cell colors it
+        index = np.zeros(self.counts.shape[1:], dtype=np.int16)
+        for layer in sorted(layers):
+            counts = self.counts[layer]
+            np.copyto(index, layer * (SHADES + 1) + np.minimum(counts, SHADES), where=counts > 0)
+        return PALETTE[index].transpose(1, 0, 2)
+
+    def surface(self, layers=LAYERS.values()):
+        return pygame.surfarray.make_surface(self.colors(layers))
+
+def digest(data): # of a level file
+    return hashlib.sha1(data).hexdigest()
+
+def cache_path(level_digest, directory=CACHE_DIR):
+    return os.path.join(directory, level_digest + ".npz")
+
+def load_cached(level_digest, directory=CACHE_DIR): # None if it isn't there
+    try:
+        with np.load(cache_path(level_digest, directory)) as data:
+            if int(data["version"]) != VERSION:
+                return None
+            return LevelRaster(data["counts"], tuple(int(v) for v in data["origin"]), int(data["cell"]))
+    except (OSError, KeyError, ValueError):
+        return None
+
+def store(level_digest, raster, directory=CACHE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = cache_path(level_digest, directory)
+    with open(path + ".tmp", "wb") as f:
+        np.savez_compressed(f, counts=raster.counts, origin=np.array(raster.origin), cell=raster.cell, version=VERSION)
+    os.replace(path + ".tmp", path)
+
+def level_raster(objects, level_digest=None): # from the cache when the level file is known and cached
+    raster = load_cached(level_digest) if level_digest != None else None
+    if raster == None:
+        raster = LevelRaster.from_objects(objects)
+        if level_digest != None:
+            store(level_digest, raster)
+    return raster
+
+def file_raster(path): # (raster, whether it came from the cache) of a level file
+    with open(path, "rb") as f:
+        data = f.read()
+    level_digest = digest(data)
+    raster = load_cached(level_digest)
+    if raster != None:
+        return raster, True
+    objects = main.LevelUnpickler(io.BytesIO(data)).load()
+    raster = LevelRaster.from_objects(objects)
+    store(level_digest, raster)
+    return raster, False
+
+class MinimapWidget: # the level as it was built, with where the coins and enemies are now, the camera and the player
+    def __init__(self):
+        self.raster = None
+        self.objects = None # the objects dict the raster is for, a new one means a new level or a restore
+        self.static = None # scaled surface of the geometry, made again when the raster changes
+        self.static_version = None
+        self.surface = None
+        self.scale = 1 # widget px per level px
+        self.timer = 0
+
+    def objects_changed(self, g, added, removed): # edits change the raster, play mode keeps the level as it was built
+        if self.raster != None and self.objects is g.objects:
+            if self.raster.add(added, g.object_mappings):
+                self.raster.remove(removed, g.object_mappings)
+            else: # the level got too big for the cell size
+                self.raster = LevelRaster.from_objects(g.objects)
+
+    def level_saved(self, g): # the raster is already up to date, so it goes in the cache for the new level file
+        if self.raster != None and self.objects is g.objects:
+            store(g.level_digest, self.raster)
+
+    def update(self, g):
+        if self.objects is not g.objects:
+            self.raster = level_raster(g.objects, g.level_digest)
+            self.objects = g.objects
+            self.surface = None
+        if self.static_version != self.raster.version or self.static == None:
+            height, width = self.raster.counts.shape[1:]
+            self.scale = min(WIDGET_SIZE[0] / max(width, 1), WIDGET_SIZE[1] / max(height, 1)) / self.raster.cell
+            size = (max(1, round(width * self.raster.cell * self.scale)), max(1, round(height * self.raster.cell * self.scale)))
+            self.static = pygame.transform.smoothscale(self.raster.surface((SOLID, CLIMBING, PIPES, FLAGS)), size)
+            self.static_version = self.raster.version
+            self.surface = None
+        self.timer += g.frame_time
+        if self.surface == None or self.timer >= WIDGET_REFRESH:
+            self.timer = 0
+            self.surface = self.static.copy()
+            pixels = pygame.surfarray.pixels3d(self.surface)
+            for layer, objs in ((COINS, g.coins), (ENEMIES, g.enemies)):
+                if objs:
+                    x, y = self.to_widget(np.array([(obj.x, obj.y) for obj in objs], dtype=np.float64).T)
+                    inside = (x >= 0) & (x < pixels.shape[0]) & (y >= 0) & (y < pixels.shape[1])
+                    pixels[x[inside], y[inside]] = COLORS[layer].astype(np.uint8)
+            del pixels
+
+    def to_widget(self, pos): # level position to widget px
+        x0, y0 = self.raster.origin[0] * self.raster.cell, self.raster.origin[1] * self.raster.cell
+        return ((pos[0] - x0) * self.scale).astype(np.int64), ((pos[1] - y0) * self.scale).astype(np.int64)
+
+    def add_sprites(self, g, blits):
+        self.update(g)
+        left = g.width - self.surface.get_width() - 5
+        top = g.height - self.surface.get_height() - 5
+        blits.append((self.surface, (left, top)))
+        x, y = self.to_widget(np.array([g.camera.x, g.camera.y]))
+        view = g.sprite_cache.frame(max(2, round(g.width * self.scale)), max(2, round(g.height * self.scale)), (255,255,255), 1)
+        blits.append((view, (left + int(x), top + int(y))))
+        x, y = self.to_widget(np.array([g.player.x, g.player.y]))
+        blits.append((g.sprite_cache.rect(3, 3, (255,255,255)), (left + int(x) - 1, top + int(y) - 1)))
+
+    def draw(self, g):
+        blits = []
+        self.add_sprites(g, blits)
+        g.screen.blits(blits, False)
+
+def level_paths():
+    paths = []
+    while os.path.exists("level"+str(len(paths))+".pickle"):
+        paths.append("level"+str(len(paths))+".pickle")
+    return paths
+
+def run(): # level_minimap.py [output dir] [level paths], a thumbnail per level
+    output = sys.argv[1] if len(sys.argv) > 1 else "thumbnails"
+    paths = sys.argv[2:] or level_paths()
+    os.makedirs(output, exist_ok=True)
+    for path in paths:
+        start = time.perf_counter()
+        raster, cached = file_raster(path)
+        elapsed = (time.perf_counter() - start) * 1000
+        height, width = raster.counts.shape[1:]
+        name = os.path.splitext(os.path.basename(path))[0] + ".png"
+        pygame.image.save(raster.surface(), os.path.join(output, name))
+        print(f"{path}: {width}x{height} cells of {raster.cell} px, {'cached' if cached else 'rasterized'} in {elapsed:.1f} ms")
+
+if __name__ == "__main__":
+    run()
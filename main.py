@@ -1,1274 +1,2978 @@
-import asyncio
-import pygame, math, random, pickle
-
-MUSHROOM_WIDTH = 20
-MUSHROOM_HEIGHT = 20
-MUSHROOM_COLOR = (0,255,0)
-
-PLAYER_SMALL_HEIGHT = 25
-PLAYER_BIG_HEIGHT = 40
-PLAYER_WIDTH = 20
-
-class Game:
-    def __init__(self):
-        self.width = 700 # screen 
-        self.height = 495
-        self.screen = pygame.display.set_mode([self.width, self.height])
-        pygame.display.set_caption("SquareJumper")
-        self.clock = pygame.time.Clock()
-        self.framerate = 60
-        self.frame_time = 0 # time for last frame to take place
-
-        self.level = 0
-
-        self.edit_action_font = pygame.font.Font(None, 25)
-        self.hud_font = pygame.font.Font(None, 20)
-        self.player = Player()
-        self.objects = {"collision_rects":[],"climbing_rects":[],"enemies":[],"mushrooms":[],"animations":[],"particles":[],
-                        "camera_lines":[],"pipes":[],"coins":[],"flags":[],"clouds":[]}
-        self.object_mappings = {CollisionRect:"collision_rects",MovingCollisionRect:"collision_rects",ItemizedCollisionRect:"collision_rects",
-                                ClimbingRect:"climbing_rects",Pipe:"pipes",
-                                WalkEnemy:"enemies",JumpEnemy:"enemies",JumpThrowEnemy:"enemies",Axe:"enemies",FlyingEnemy:"enemies",
-                                Mushroom:"mushrooms",
-                                AnimationMushroom:"animations",AnimationPlayerInPipe:"animations",
-                                Particle:"particles",
-                                CameraLine:"camera_lines",
-                                Coin:"coins",
-                                RespawnFlag:"flags", WinFlag:"flags",
-                                Cloud:"clouds"}
-        self.load_saved_object_state()
-        self.game_stopping_animation = None
-
-        self.camera = Camera(self)
-        self.hud = Hud()
-
-        self.play_mode = True # if false: edit mode
-
-        self.mouse_clicked_this_frame = [False, False, False] # left, middle, right
-        self.space_pressed_this_frame = False
-        self.up_pressed_this_frame = False
-        self.down_pressed_this_frame = False
-
-        asyncio.run(self.start_game())
-
-    def load_saved_object_state(self):
-        self.game_stopping_animation = None
-        self.player.visible = True
-
-        with open("level"+str(self.level)+".pickle", "rb") as f:
-            try:
-                self.objects = pickle.load(f)
-            except:
-                print("empty level")
-
-        self.logic_order = ["collision_rects","player","enemies","mushrooms","animations","particles","flags","clouds"] # note the omitted
-        self.draw_order = ["animations","pipes","coins","collision_rects","flags","enemies","particles","mushrooms","player","climbing_rects","clouds"]
-        self.collision_rects = self.objects["collision_rects"]
-        self.climbing_rects = self.objects["climbing_rects"]
-        self.enemies = self.objects["enemies"]
-        self.mushrooms = self.objects["mushrooms"]
-        self.animations = self.objects["animations"]
-        self.particles = self.objects["particles"]
-        self.camera_lines = self.objects["camera_lines"]
-        self.pipes = self.objects["pipes"]
-        self.coins = self.objects["coins"]
-        self.flags = self.objects["flags"]
-        if "clouds" in self.objects:
-            self.clouds = self.objects["clouds"]
-        else:
-            self.objects["clouds"] = []
-
-        self.objects_to_add = []
-        self.objects_to_remove = []
-
-    def save_object_state(self):
-        with open("level"+str(self.level)+".pickle", "wb") as f:
-            pickle.dump(self.objects, f)
-
-    def load_new_level(self, way=1):
-        self.level += way
-        self.player.set_position_to(0,0)
-        self.player.respawn_point = (0,0)
-        self.camera.teleport_to((-self.width/2, -self.height/2))
-        self.load_saved_object_state()
-
-    async def start_game(self):
-        running = True
-        while running:
-            self.mouse_clicked_this_frame = [False, False, False]
-            self.space_pressed_this_frame = False
-            self.up_pressed_this_frame = False
-            self.down_pressed_this_frame = False
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_k: 
-                        if self.play_mode: # into edit mode
-                            self.load_saved_object_state()
-                            
-                        else: # move player to camera
-                            self.save_object_state()
-                            self.player.set_position_to(self.camera.x+self.width/2-self.player.width/2,self.camera.y+self.height/2-self.player.height/2)
-                        
-                        self.play_mode = not self.play_mode
-
-                    if event.key == pygame.K_SPACE:
-                        self.space_pressed_this_frame = True
-                    if event.key == pygame.K_o:
-                        self.camera.change_edit_action(-1)
-                    if event.key == pygame.K_p:
-                        self.camera.change_edit_action(1)
-                    if event.key == pygame.K_u:
-                        self.camera.change_edit_y_place(-1)
-                    if event.key == pygame.K_j:
-                        self.camera.change_edit_y_place(1)
-                    if event.key == pygame.K_w or event.key == pygame.K_UP:
-                        self.up_pressed_this_frame = True
-                    if event.key == pygame.K_s or event.key == pygame.K_DOWN:
-                        self.down_pressed_this_frame = True
-                    #if event.key == pygame.K_h:
-                        
-
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if 1 <= event.button <= 3:
-                        self.mouse_clicked_this_frame[event.button - 1] = True
-
-            self.do_game_logic()
-
-            self.do_game_drawing()
+import asyncio, sys, os, io, time, gc, struct, threading, queue, hashlib
+IMPORT_START = time.perf_counter() # the startup trace counts from here
+import pygame, math, random, pickle, zlib
+PYGAME_IMPORTED = time.perf_counter() # pygame's import is most of the startup, it brings in numpy when it's there
+from collections import OrderedDict, deque
+np = None # numpy takes a while to import, load_numpy does it when the enemy engine or the analyzer need it
+
+MUSHROOM_WIDTH = 20
+MUSHROOM_HEIGHT = 20
+MUSHROOM_COLOR = (0,255,0)
+
+PLAYER_SMALL_HEIGHT = 25
+PLAYER_BIG_HEIGHT = 40
+PLAYER_WIDTH = 20
+
+PLAYER_SPEED = 0.2
+PLAYER_CLIMB_SPEED = 0.1
+PLAYER_JUMP_VELOCITY = -0.175
+PLAYER_STOMP_VELOCITY = -0.3 # bounce from jumping on an enemy
+PLAYER_GRAVITY = 0.0175
+PLAYER_JUMP_TIME = 1000 # how long holding jump slows down gravity
+PLAYER_DEADLY_FALL_VELOCITY = 2
+
+SIDE_UP, SIDE_DOWN, SIDE_LEFT, SIDE_RIGHT = range(4) # side of a rect something collided with
+
+def load_numpy(): # None without numpy
+    global np
+    if np == None:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+RENDER_IMMEDIATE, RENDER_BATCHED = range(2)
+COLLISION_DISCRETE, COLLISION_SWEPT = range(2)
+SNAPSHOT_VERSION = 2
+TASK_PRIORITY_LOW, TASK_PRIORITY_NORMAL, TASK_PRIORITY_HIGH = range(3)
+AUTOSAVE_PATH = "autosave.snapshot"
+AUTOSAVE_HEADER = struct.Struct("<16sI") # session and level the autosave was made in, before the snapshot
+GHOST_DIR = "ghosts" # finished runs, levelN_<ms>.ghost
+GHOST_MAGIC = b"GHO1"
+GHOST_INTERVAL = 33 # ms of level time between samples
+GHOST_SCALE = 4 # positions are stored in quarter pixels
+GHOST_COUNT = 3 # fastest runs of a level that are played back
+GHOST_CHUNK = 4096 # bytes a ghost reads from its file at a time
+GHOST_COLOR = (80,80,80)
+GHOST_DX, GHOST_DY, GHOST_SIZE, GHOST_VISIBLE = 1, 2, 4, 8 # bits of the mask byte that starts every sample
+TELEMETRY_DIR = "telemetry" # a file per session, session_<time>.tel
+TELEMETRY_MAGIC = b"TEL1"
+TELEMETRY_RECORD = struct.Struct("<BBHIff") # kind, level, value, level time in ms, x, y
+TELEMETRY_RING = 4096 # records the game can get ahead of the writer thread, more are dropped
+TELEMETRY_BATCH = 256 # records handed to the writer at a time
+TELEMETRY_SPIKE = 50 # ms, frames that take longer are events too
+TELEMETRY_DEATH, TELEMETRY_HIT, TELEMETRY_COIN, TELEMETRY_MUSHROOM, TELEMETRY_PIPE, TELEMETRY_SPIKE_FRAME, TELEMETRY_MISSED_COIN = range(7)
+TELEMETRY_NAMES = ["deaths", "hits", "coins", "mushrooms", "pipes", "spikes", "missed coins"]
+RECORDING_DIR = "recordings" # sessions recorded with R, session_<time>.rec, replay_renderer.py turns them into images
+RECORDING_MAGIC = b"REC1"
+RECORDING_FRAME = struct.Struct("<HBBB") # frame time in ms, held keys, keys pressed this frame, quality level
+RECORDING_CHECKPOINT = 300 # frames between snapshots, a replay can start at any of them
+RECORDING_KEYS = ((pygame.K_RIGHT, pygame.K_d), (pygame.K_LEFT, pygame.K_a), (pygame.K_UP, pygame.K_w), (pygame.K_DOWN, pygame.K_s), (pygame.K_SPACE,)) # a bit each
+QUALITY_FULL, QUALITY_FEWER_PARTICLES, QUALITY_NO_TRANSLUCENCY, QUALITY_FROZEN_OFFSCREEN = range(4) # each level also keeps the cuts of the ones before
+
+class Game:
+    def __init__(self, start=True, window_size=None, fullscreen=False, startup_trace=None):
+        self.startup_trace = startup_trace if startup_trace != None else StartupTrace()
+        self.width = 700 # screen, the internal resolution everything is drawn at
+        self.height = 495
+        self.target = RenderTarget((self.width, self.height), window_size, fullscreen)
+        self.screen = self.target.surface
+        pygame.display.set_caption("SquareJumper")
+        self.startup_trace.mark("display")
+        self.clock = pygame.time.Clock()
+        self.framerate = 60
+        self.render_mode = RENDER_IMMEDIATE
+        self.collision_mode = COLLISION_DISCRETE # swept stops fast movers at thin rects, even with long frames
+        self.sprite_cache = SpriteCache()
+        self.sprite_blits = [] # reused every frame by the batched renderer
+        self.pipelined = False # logic of the next frame runs on a thread while this one is drawn, play mode with the batched renderer only
+        self.logic_thread = None
+        self.pending_logic = None
+        self.next_snapshot = None # blit list the worker collected after its logic step, for the next frame to draw
+        self.frame_time = 0 # time for last frame to take place
+        self.quality = QualityGovernor(1000/self.framerate)
+        self.profiler = SpikeProfiler() # F3 turns it on
+
+        self.level = 0
+
+        self.edit_action_font = None # made when edit mode first draws
+        self.hud_font = pygame.font.Font(None, 20)
+        self.startup_trace.mark("font")
+        self.text_cache = TextCache()
+        self.player = Player()
+        self.objects = {"collision_rects":[],"climbing_rects":[],"enemies":[],"mushrooms":[],"animations":[],"particles":[],
+                        "camera_lines":[],"pipes":[],"coins":[],"flags":[],"clouds":[]}
+        self.object_mappings = {CollisionRect:"collision_rects",MovingCollisionRect:"collision_rects",ItemizedCollisionRect:"collision_rects",
+                                ClimbingRect:"climbing_rects",Pipe:"pipes",
+                                WalkEnemy:"enemies",JumpEnemy:"enemies",JumpThrowEnemy:"enemies",Axe:"enemies",FlyingEnemy:"enemies",
+                                Mushroom:"mushrooms",
+                                AnimationMushroom:"animations",AnimationPlayerInPipe:"animations",
+                                Particle:"particles",
+                                CameraLine:"camera_lines",
+                                Coin:"coins",
+                                RespawnFlag:"flags", WinFlag:"flags",
+                                Cloud:"clouds"}
+        self.enemy_engine = None # EnemyEngine when enemies are simulated as arrays
+        self.collision_index = CollisionIndex()
+        self.scheduler = TaskScheduler()
+        self.task_budget = 0.9 # part of the frame that logic, drawing and background tasks together may use
+        self.level_cache = {} # level number: pickle bytes read ahead in the background
+        self.edit_overlay = EditOverlay()
+        self.ghost_recorder = GhostRecorder()
+        self.ghosts = [] # ghosts of the fastest runs of this level
+        self.show_ghosts = True # G toggles them
+        self.telemetry = Telemetry() # written while the game runs its own loop
+        self.session_recorder = SessionRecorder()
+        self.minimap = None # level_minimap.MinimapWidget, M shows it
+        self.level_digest = None # hash of the level file the objects came from, None after a restore
+        self.autosave_interval = 30000
+        self.session_id = os.urandom(16) # F9 only falls back to an autosave made by this run of the game
+        self.autosave_timer = 0
+        self.startup_trace.mark("game state")
+        self.load_saved_object_state()
+        self.game_stopping_animation = None
+        self.startup_trace.mark("level")
+
+        self.camera = Camera(self)
+        self.hud = Hud()
+        self.startup_trace.mark("camera")
+
+        self.play_mode = True # if false: edit mode
+
+        self.input_keys = None # KeyState that replaces the keyboard, for scripted input
+        self.mouse_clicked_this_frame = [False, False, False] # left, middle, right
+        self.space_pressed_this_frame = False
+        self.up_pressed_this_frame = False
+        self.down_pressed_this_frame = False
+
+        self.quicksave = None # snapshot made with F5, restored with F9, which falls back to the autosave
+        self.analyze_on_save = True # print reachability problems when a level is saved from the editor
+        self.analyze_pool = None # worker process the analyzer runs in, made on the first save
+
+        if start:
+            asyncio.run(self.start_game())
+
+    def load_saved_object_state(self):
+        self.game_stopping_animation = None
+        self.player.visible = True
+
+        objects = self.objects
+        data = self.level_cache.pop(self.level, None)
+        if data == None:
+            with open("level"+str(self.level)+".pickle", "rb") as f:
+                data = f.read()
+        self.level_digest = hashlib.sha1(data).hexdigest()
+        try:
+            objects = LevelUnpickler(io.BytesIO(data)).load()
+        except:
+            print("empty level")
+        self.set_objects(objects)
+        self.schedule_level_tasks()
+        self.ghost_recorder.start(self.player.respawn_point == (0,0)) # only a run from the start is worth racing
+        self.load_ghosts()
+
+    def set_objects(self, objects):
+        self.objects = objects
+        self.logic_order = ["collision_rects","player","enemies","mushrooms","animations","particles","flags","clouds"] # note the omitted
+        self.draw_order = ["animations","pipes","coins","collision_rects","flags","enemies","particles","mushrooms","ghosts","player","climbing_rects","clouds"]
+        self.collision_rects = self.objects["collision_rects"]
+        self.climbing_rects = self.objects["climbing_rects"]
+        self.enemies = self.objects["enemies"]
+        self.mushrooms = self.objects["mushrooms"]
+        self.animations = self.objects["animations"]
+        self.particles = self.objects["particles"]
+        self.camera_lines = self.objects["camera_lines"]
+        self.pipes = self.objects["pipes"]
+        self.coins = self.objects["coins"]
+        self.flags = self.objects["flags"]
+        if "clouds" in self.objects:
+            self.clouds = self.objects["clouds"]
+        else:
+            self.objects["clouds"] = []
+
+        self.objects_to_add = []
+        self.objects_to_remove = []
+        self.level_time = 0 # ms played on this level, moving platforms are where this puts them
+        self.collision_index.rebuild(self)
+        self.edit_overlay.invalidate()
+
+    def save_object_state(self):
+        data = pickle.dumps(self.objects)
+        with open("level"+str(self.level)+".pickle", "wb") as f:
+            f.write(data)
+        self.level_cache.pop(self.level, None)
+        self.level_digest = hashlib.sha1(data).hexdigest()
+        if self.minimap != None:
+            self.minimap.level_saved(self)
+        if self.analyze_on_save and load_numpy() != None:
+            self.scheduler.cancel("analyze") # a report on what was saved before isn't worth printing now
+            self.scheduler.add("analyze", self.analyze_task("level"+str(self.level), data), TASK_PRIORITY_LOW)
+
+    def analyze_task(self, name, data): # the analysis takes seconds on big levels, so a worker does it and this waits for it
+        if self.analyze_pool == None:
+            from concurrent.futures import ProcessPoolExecutor
+            self.analyze_pool = ProcessPoolExecutor(max_workers=1)
+        report = self.analyze_pool.submit(analyze_level, name, data)
+        while not report.done():
+            yield
+        print(report.result())
+
+    def snapshot(self, with_random=False): # the whole live game state as compressed bytes
+        if self.enemy_engine != None:
+            self.enemy_engine.sync_to_objects()
+        state = {"version":SNAPSHOT_VERSION, "level":self.level, "level_time":self.level_time, "objects":self.objects, "player":self.player,
+                 "game_stopping_animation":self.game_stopping_animation,
+                 "objects_to_add":self.objects_to_add, "objects_to_remove":self.objects_to_remove,
+                 "camera":(self.camera.x, self.camera.y, self.camera.x_offset, self.camera.cloud_timer),
+                 "random":random.getstate() if with_random else None}
+        return zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL), 1)
+
+    def restore(self, snapshot):
+        state = pickle.loads(zlib.decompress(snapshot))
+        if state["version"] != SNAPSHOT_VERSION:
+            raise ValueError("snapshot version " + str(state["version"]) + " can't be restored")
+        entered = state["level"] != self.level
+        self.level = state["level"]
+        self.player = state["player"]
+        self.set_objects(state["objects"])
+        self.level_digest = None
+        self.level_time = state["level_time"]
+        self.collision_index.time = self.level_time
+        self.ghost_recorder.clean = False # the run jumped in time
+        self.objects_to_add = state["objects_to_add"]
+        self.objects_to_remove = state["objects_to_remove"]
+        self.game_stopping_animation = state["game_stopping_animation"]
+        self.camera.x, self.camera.y, self.camera.x_offset, self.camera.cloud_timer = state["camera"]
+        if state["random"] != None:
+            random.setstate(state["random"])
+        if self.session_recorder.recording: # the recording jumps here too
+            self.session_recorder.checkpoint_next = True
+        if entered: # what load_saved_object_state does for a level besides loading it
+            self.schedule_level_tasks()
+            self.load_ghosts()
+
+    def schedule_level_tasks(self):
+        self.scheduler.cancel("prefetch level")
+        self.scheduler.cancel("warm sprites")
+        if os.path.exists("level"+str(self.level+1)+".pickle") and self.level+1 not in self.level_cache:
+            self.scheduler.add("prefetch level", self.prefetch_level_task(self.level+1), TASK_PRIORITY_NORMAL)
+        self.scheduler.add("warm sprites", self.warm_sprites_task(), TASK_PRIORITY_LOW)
+
+    def prefetch_level_task(self, level): # so the next level doesn't wait for the disk
+        chunks = []
+        with open("level"+str(level)+".pickle", "rb") as f:
+            while True:
+                chunk = f.read(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                yield
+        self.level_cache[level] = b"".join(chunks)
+
+    def warm_sprites_task(self): # render every sprite of the level once, so the batched renderer doesn't on the way
+        blits = []
+        for category in self.draw_order:
+            if category == "player" or category == "ghosts":
+                continue
+            for i, obj in enumerate(list(self.objects[category])):
+                if self.render_mode == RENDER_BATCHED:
+                    obj.add_sprites(self, blits)
+                    blits.clear()
+                if i % 50 == 49:
+                    yield
+
+    def autosave_task(self):
+        data = self.snapshot()
+        yield
+        with open(AUTOSAVE_PATH + ".tmp", "wb") as f: # replaced at the end, a cancelled save keeps the last one
+            f.write(AUTOSAVE_HEADER.pack(self.session_id, self.level))
+            for i in range(0, len(data), 65536):
+                f.write(data[i:i+65536])
+                yield
+        os.replace(AUTOSAVE_PATH + ".tmp", AUTOSAVE_PATH)
+
+    def load_ghosts(self): # the fastest recorded runs of this level
+        for ghost in self.ghosts:
+            ghost.close()
+        self.ghosts = []
+        if not self.show_ghosts or not os.path.isdir(GHOST_DIR):
+            return
+        prefix = "level"+str(self.level)+"_"
+        paths = sorted(name for name in os.listdir(GHOST_DIR) if name.startswith(prefix) and name.endswith(".ghost"))
+        for name in paths[:GHOST_COUNT]:
+            try:
+                self.ghosts.append(Ghost(os.path.join(GHOST_DIR, name)))
+            except (OSError, ValueError) as e:
+                print("ghost not loaded: " + str(e))
+
+    def save_ghost(self):
+        path = self.ghost_recorder.save(self.level, self.level_time)
+        if path != None:
+            print("ghost saved: " + path)
+
+    def next_heatmap(self): # edit mode overlay, off and then every kind of telemetry event in turn
+        overlay = self.edit_overlay
+        if overlay.heatmap == None:
+            if load_numpy() == None:
+                print("heatmaps need numpy")
+                return
+            import telemetry_heatmap
+            self.telemetry.flush(wait=True) # this session's events too
+            overlay.heatmap = telemetry_heatmap.HeatmapAggregator(self.camera.grid_size)
+            self.scheduler.cancel("heatmap")
+            self.scheduler.add("heatmap", overlay.heatmap.read_task(telemetry_heatmap.telemetry_paths()), TASK_PRIORITY_NORMAL)
+            overlay.heatmap_kind = 0
+        elif overlay.heatmap_kind + 1 < len(TELEMETRY_NAMES):
+            overlay.heatmap_kind += 1
+        else:
+            self.scheduler.cancel("heatmap")
+            overlay.heatmap = None
+        overlay.heatmap_key = None
+
+    def toggle_minimap(self):
+        if self.minimap != None:
+            self.minimap = None
+        elif load_numpy() == None:
+            print("the minimap needs numpy")
+        else:
+            import level_minimap
+            self.minimap = level_minimap.MinimapWidget()
+
+    def track(self, kind, x, y, value=0): # a telemetry event at a level position
+        self.telemetry.emit(kind, self.level, self.level_time, x, y, value)
+
+    def stop_recording(self):
+        if self.session_recorder.recording:
+            path = self.session_recorder.stop(self)
+            print("recording saved: " + path)
+
+    def read_autosave(self): # None unless this run made it on this level, an older one would jump somewhere unexpected
+        if not os.path.exists(AUTOSAVE_PATH):
+            return None
+        with open(AUTOSAVE_PATH, "rb") as f:
+            header = f.read(AUTOSAVE_HEADER.size)
+            if len(header) < AUTOSAVE_HEADER.size or AUTOSAVE_HEADER.unpack(header) != (self.session_id, self.level):
+                return None
+            return f.read()
+
+    def load_new_level(self, way=1):
+        self.level += way
+        self.player.set_position_to(0,0)
+        self.player.respawn_point = (0,0)
+        self.camera.teleport_to((-self.width/2, -self.height/2))
+        self.load_saved_object_state()
+
+    async def start_game(self):
+        self.telemetry.open()
+        running = True
+        while running:
+            frame_start = time.perf_counter()
+            self.profiler.begin_frame(frame_start)
+            running = self.handle_events()
+            self.profiler.mark("events")
+
+            self.do_frame()
             await asyncio.sleep(0)
-
-            self.frame_time = self.clock.tick(self.framerate)
-    def do_game_logic(self):
-
-        if self.play_mode:
-            self.do_game_play_logic()
-        else:
-            self.do_game_edit_logic()
-
-        # add and remove necessary objects
-        for obj in self.objects_to_remove:
-            self.objects[self.object_mappings[type(obj)]].remove(obj)
-        for obj in self.objects_to_add:
-            self.objects[self.object_mappings[type(obj)]].append(obj)
-        self.objects_to_add = []
-        self.objects_to_remove = []
-
-    def do_game_play_logic(self):
-        if self.game_stopping_animation == None:
-            for category in self.logic_order: # logic for all objects
-                if category == "player":
-                    self.player.logic(self)
-                else:
-                    for obj in self.objects[category]:
-                        obj.logic(self)
-
-            self.camera.play_logic(self)
-            
-        else: # game stopping animation
-            self.game_stopping_animation.logic(self)
-
-    def do_game_edit_logic(self):
-        self.camera.edit_logic(self)
-
-    def do_game_drawing(self):
-        # Fill the background with white
-        self.screen.fill((255, 255, 255))
-
-        for category in self.draw_order:
-            if category == "player":
-                self.player.draw(self)
-            else:
-                for obj in self.objects[category]:
-                    obj.draw(self)
-
-        if self.play_mode:
-            self.hud.draw(self)
-        else:
-            self.camera.draw_edit_things(self)
-
-        # Flip the display
-        pygame.display.flip()
-
-class General: # rects are objects with x,y,width,height
-    @staticmethod
-    def rects_collide_tuples(f, s): # first and second object
-        return f[0]+f[2] > s[0] and f[0] < s[0]+s[2] and f[1]+f[3] > s[1] and f[1] < s[1]+s[3]
-    @staticmethod
-    def rects_collide(f, s): # first and second object. Both require x,y,width,height variables
-        return General.rects_collide_tuples((f.x,f.y,f.width,f.height),(s.x,s.y,s.width,s.height))
-    @staticmethod
-    def point_in_rect(p, r): # point and rect. Both require x,y,width,height variables
-        return General.rects_collide_tuples((p[0],p[1],0,0),(r.x,r.y,r.width,r.height))
-    @staticmethod
-    def line_in_rect (x1, y1, x2, y2, minX, minY, maxX, maxY):
-        # Completely outside.
-        if (x1 <= minX and x2 <= minX) or (y1 <= minY and y2 <= minY) or (x1 >= maxX and x2 >= maxX) or (y1 >= maxY and y2 >= maxY):
-            return False
-        if x2 - x1 == 0:
-            m = 0
-        else:
-            m = (y2 - y1) / (x2 - x1)
-        y = m * (minX - x1) + y1
-        if y > minY and y < maxY: return True
-        y = m * (maxX - x1) + y1
-        if y > minY and y < maxY: return True
-        if m == 0:
-            x = x1
-        else:
-            x = (minY - y1) / m + x1
-        if x > minX and x < maxX: return True
-        if m == 0:
-            x = x1
-        else:
-            x = (maxY - y1) / m + x1
-        if x > minX and x < maxX: return True
-        return False
-    @staticmethod
-    def line_in_tuple_rect(start_pos, end_pos, r): # pos is for line
-        # check start and end position
-        if General.rects_collide_tuples(start_pos+(0,0),r) or General.rects_collide_tuples(end_pos+(0,0),r):
-            return True
-        if General.line_in_rect(start_pos[0],start_pos[1],end_pos[0],end_pos[1],r[0],r[1],r[0]+r[2],r[1]+r[3]):
-            return True
-        return False
-    @staticmethod
-    def get_rect_of_two_points(p1, p2, grid_size):
-        x1, x2 = (p1[0], p2[0]) if p2[0] >= p1[0] else (p2[0], p1[0])
-        y1, y2 = (p1[1], p2[1]) if p2[1] >= p1[1] else (p2[1], p1[1])
-        w, h = (x2 - x1 + grid_size, y2 - y1 + grid_size)
-        return (x1, y1, w, h)
-    @staticmethod
-    def circle_in_rect(circle_pos, circle_radius, rect):
-        dx = abs(circle_pos[0] - (rect.x+rect.width/2))
-        dy = abs(circle_pos[1] - (rect.y+rect.height/2))
-        if dx + dy <= circle_radius*1.5:
-            return True
-        return False
-
-class Hud:
-    def draw(self, g):
-        text = "Coins:"+str(g.player.coins) + " FPS:" + str(int(g.clock.get_fps()))
-        text_surface = g.hud_font.render(text, True, (0,0,0))
-        g.screen.blit(text_surface, (0,0))
-
-EDIT_ACTIONS = 7 # how many different objects there are to place
-EDIT_COL_RECT, EDIT_MOVING_COL_RECT, EDIT_ENEMY, EDIT_CAM_LINE, EDIT_PIPE, EDIT_COIN, EDIT_FLAG = range(EDIT_ACTIONS)
-
-EDIT_OPTIONS = [2, 1, 8, 0, 1, 0, 1]
-EDIT_TEXTS = [["Collision Rect","Has item?","Climbing?"],["Moving Collsion Rect, first width, then start+end pos","Speed?"],
-              ["Enemy","Turns at edges?","Jumps?","Jump: walks on ground?", "Jump: walks in air?", "Throws?","Flying?",
-               "Flying Speed", "Flying Range"],["Camera Line"],["Pipe","Color?"],["Coin"],["Flag","Respawn/Win?"]]
-EDIT_COL_RECT_ITEM, EDIT_COL_RECT_CLIMBING = range(2)
-EDIT_MOVING_COL_RECT_SPEED = 0
-EDIT_ENEMY_EDGES,EDIT_ENEMY_JUMPS,EDIT_ENEMY_JUMP_WALKS_GROUND,EDIT_ENEMY_JUMP_WALKS_AIR,EDIT_ENEMY_THROW, \
-    EDIT_ENEMY_FLYING, EDIT_ENEMY_FLYING_SPEED, EDIT_ENEMY_FLYING_RANGE = range(8)
-EDIT_PIPE_COLOR = 0
-EDIT_FLAG_RESPAWN_WIN = 0
-class Camera:
-    def __init__(self, g):
-        self.x = -g.width/2
-        self.y = -g.height/2
-        self.grid_size = 30
-        self.x_offset = 0
-        self.x_offset_max = g.width*0.1
-        """self.x_vel = 0
-        self.y_vel = 0"""
-        self.cloud_timer = 0
-        
-        self.edit_action = EDIT_COL_RECT # what object to place
-        self.edit_y_place = 0 # 0 is the category, others are options
-        self.options = []
-        for i in range(EDIT_ACTIONS):
-            self.options.append([])
-            for _ in range(EDIT_OPTIONS[i]):
-                self.options[i].append(0)
-
-        print(self.options)
-
-        self.edit_points_clicked = []
-
-    def bad_play_logic(self, g):
-        dif = 0.5
-
-        x_endpoint = g.player.x + g.player.width/2 - g.width/2
-        x_increase = ((x_endpoint - self.x)/300) * g.frame_time
-        if abs(self.x_vel - x_increase) > dif:
-            self.x_vel += dif if x_increase > self.x_vel else -dif
-        screen_rect = (self.x + self.x_vel, self.y, g.width, g.height)
-        
-        for cl in g.camera_lines:
-            if General.line_in_tuple_rect(cl.start_pos,cl.end_pos, screen_rect):
-                self.x_vel = 0
-                break
-        else:
-            self.x += self.x_vel
-        
-        y_endpoint = (g.player.y+g.player.height/2) - g.height/2
-        y_increase = ((y_endpoint - self.y)/150) * g.frame_time
-        if abs(self.y_vel - y_increase) > dif:
-            self.y_vel += dif if y_increase > self.y_vel else -dif
-        screen_rect = (self.x, self.y + self.y_vel, g.width, g.height)
-
-        for cl in g.camera_lines:
-            if General.line_in_tuple_rect(cl.start_pos,cl.end_pos, screen_rect):
-                self.y_vel = 0
-                break
-        else:
-            self.y += self.y_vel
-    def play_logic(self, g):
-
-        x_endpoint = g.player.x + g.player.width/2 + self.x_offset - g.width/2
-        x_increase = ((x_endpoint - self.x)/300) * g.frame_time
-        
-        self.x_offset += x_increase/3
-        self.x_offset = max(-self.x_offset_max, min(self.x_offset_max, self.x_offset))
-
-        screen_rect = (self.x + x_increase, self.y, g.width, g.height)
-        
-        for cl in g.camera_lines:
-            if General.line_in_tuple_rect(cl.start_pos,cl.end_pos, screen_rect):
-                break
-        else:
-            self.x += x_increase
-        
-        y_endpoint = (g.player.y+g.player.height/2) - g.height/2
-        y_increase = ((y_endpoint - self.y)/150) * g.frame_time
-        screen_rect = (self.x, self.y + y_increase, g.width, g.height)
-
-        for cl in g.camera_lines:
-            if General.line_in_tuple_rect(cl.start_pos,cl.end_pos, screen_rect):
-                break
-        else:
-            self.y += y_increase
-
-        # handle clouds
-        self.cloud_timer += g.frame_time
-        if self.cloud_timer > 2000:
-            g.objects_to_add.append(Cloud(g))
-            self.cloud_timer = 0
-
-    def edit_logic(self, g):
-        pressed_keys = pygame.key.get_pressed() # move
-        vel = 0.3*g.frame_time
-        if pressed_keys[pygame.K_RIGHT] or pressed_keys[pygame.K_d]:
-            self.x += vel
-        if pressed_keys[pygame.K_LEFT] or pressed_keys[pygame.K_a]:
-            self.x -= vel
-        if pressed_keys[pygame.K_UP] or pressed_keys[pygame.K_w]:
-            self.y -= vel
-        if pressed_keys[pygame.K_DOWN] or pressed_keys[pygame.K_s]:
-            self.y += vel
-
-        
-        # place objects
-        m_pos = pygame.mouse.get_pos()
-        exact_x = m_pos[0]+self.x
-        exact_y = m_pos[1]+self.y
-        x = exact_x - (exact_x % self.grid_size) # moved to grind lines
-        y = exact_y - (exact_y % self.grid_size)
-        if g.mouse_clicked_this_frame[0]: # left mouse button = create object in game
-            if self.edit_action == EDIT_COL_RECT:
-                if len(self.edit_points_clicked) == 0:
-                    self.edit_points_clicked.append((x, y))
-                else:
-                    x_, y_, w, h = General.get_rect_of_two_points((x,y), self.edit_points_clicked[0], self.grid_size)
-
-                    if bool(self.options[EDIT_COL_RECT][EDIT_COL_RECT_CLIMBING]):
-                        g.objects_to_add.append(ClimbingRect(x_,y_,w,h))
-                    elif self.options[EDIT_COL_RECT][EDIT_COL_RECT_ITEM] == 0:
-                        g.objects_to_add.append(CollisionRect(x_, y_, w, h))
-                    elif self.options[EDIT_COL_RECT][EDIT_COL_RECT_ITEM] == 1:
-                        g.objects_to_add.append(ItemizedCollisionRect(x_, y_, w, h))
-                    self.edit_points_clicked = []
-
-            elif self.edit_action == EDIT_MOVING_COL_RECT:
-                if len(self.edit_points_clicked) < 3:
-                    self.edit_points_clicked.append((x, y))
-                else:
-                    x1, y1 = self.edit_points_clicked[0]
-                    x2, y2 = self.edit_points_clicked[1]
-                    if x2 >= x1 and y2 >= y1: # legal
-                        w, h = (x2 - x1 + self.grid_size, y2 - y1 + self.grid_size)
-                        start_pos = self.edit_points_clicked[2]
-                        end_pos = (x, y)
-                        speed = 0.02 + self.options[EDIT_MOVING_COL_RECT][EDIT_MOVING_COL_RECT_SPEED] * 0.02
-                        g.objects_to_add.append(MovingCollisionRect(start_pos, end_pos, w, h, speed))
-                    self.edit_points_clicked = []
-
-            elif self.edit_action == EDIT_ENEMY:
-                turns = bool(self.options[EDIT_ENEMY][EDIT_ENEMY_EDGES])
-                throws = bool(self.options[EDIT_ENEMY][EDIT_ENEMY_THROW])
-                if self.options[EDIT_ENEMY][EDIT_ENEMY_FLYING]:
-                    speed = self.options[EDIT_ENEMY][EDIT_ENEMY_FLYING_SPEED]
-                    f_range = self.options[EDIT_ENEMY][EDIT_ENEMY_FLYING_RANGE]
-                    g.objects_to_add.append(FlyingEnemy(x, y, speed, f_range, throws))
-
-                elif self.options[EDIT_ENEMY][EDIT_ENEMY_JUMPS]:
-                    if throws:
-                        g.objects_to_add.append(JumpThrowEnemy(x, y))
-                    else:
-                        walks_on_ground = bool(self.options[EDIT_ENEMY][EDIT_ENEMY_JUMP_WALKS_GROUND])
-                        walks_in_air = bool(self.options[EDIT_ENEMY][EDIT_ENEMY_JUMP_WALKS_AIR])
-                        g.objects_to_add.append(JumpEnemy(x, y, walks_on_ground, walks_in_air))
-                else:
-                    g.objects_to_add.append(WalkEnemy(x, y, turns))
-
-            elif self.edit_action == EDIT_CAM_LINE:
-                if len(self.edit_points_clicked) == 0:
-                    self.edit_points_clicked.append((x, y))
-                else:
-                    g.objects_to_add.append(CameraLine(self.edit_points_clicked[0], (x,y)))
-                    self.edit_points_clicked = []
-            
-            elif self.edit_action == EDIT_PIPE:
-                if len(self.edit_points_clicked) < 3:
-                    self.edit_points_clicked.append((x, y))
-                else:
-                    x1, y1, w1, h1 = General.get_rect_of_two_points(self.edit_points_clicked[0], self.edit_points_clicked[1], self.grid_size)
-                    x2, y2, w2, h2 = General.get_rect_of_two_points(self.edit_points_clicked[2], (x, y), self.grid_size)
-                    color_value = self.options[EDIT_PIPE][EDIT_PIPE_COLOR]
-                    g.objects_to_add.append(Pipe(x1, y1, w1, h1, color_value,(x2+w2/2,y2)))
-                    g.objects_to_add.append(Pipe(x2, y2, w2, h2, color_value, (x1+w1/2,y1)))
-                    self.edit_points_clicked = []
-
-            elif self.edit_action == EDIT_COIN:
-                g.objects_to_add.append(Coin(g,x,y))
-
-            elif self.edit_action == EDIT_FLAG:
-                if self.options[EDIT_FLAG][EDIT_FLAG_RESPAWN_WIN] == 0:
-                    g.objects_to_add.append(RespawnFlag(g, x, y))
-                else:
-                    g.objects_to_add.append(WinFlag(g, x, y))
-                
-        elif g.mouse_clicked_this_frame[2]: # right = remove object in game
-            for r in g.collision_rects + g.climbing_rects + g.pipes + g.enemies:
-                if General.point_in_rect((exact_x, exact_y), r):
-                    g.objects_to_remove.append(r)
-                    break # only remove one per frame, (nicer)
-            else:
-                for cl in g.camera_lines: # camera line
-                    if cl.start_pos[0] == x and cl.start_pos[1] == y:
-                        g.objects_to_remove.append(cl)
-                        break
-                else:
-                    for f in g.flags: # respawn flag
-                        if General.rects_collide_tuples((f.x,f.y,self.grid_size,self.grid_size),(x,y+self.grid_size,10,10)):
-                            g.objects_to_remove.append(f)
-                            break
-                    else:
-                        for coin in g.coins:
-                            if General.rects_collide_tuples((coin.x,coin.y,0,0),(x,y,self.grid_size,self.grid_size)):
-                                g.objects_to_remove.append(coin)
-                                break
-
-    def translate_position(self, x, y): # translates real position to position in relation to the camera
-        return x - self.x, y - self.y
-
-    def draw_edit_things(self, g):
-        self.draw_grid(g)
-        self.draw_edit_action(g)
-        self.draw_camera_lines(g)
-
-    def draw_camera_lines(self, g):
-        for cl in g.camera_lines:
-            cl.draw(g)
-
-    def draw_grid(self, g):
-        x = - self.x % self.grid_size
-        while x < g.width:
-            pygame.draw.line(g.screen, (0,0,0), (int(x),0),(int(x),g.height))
-            x += self.grid_size
-        y = - self.y % self.grid_size
-        while y < g.height:
-            pygame.draw.line(g.screen, (0,0,0), (0,int(y)),(g.width,int(y)))
-            y += self.grid_size
-
-    def draw_edit_action(self, g):
-        for i in range(EDIT_OPTIONS[self.edit_action] + 1):
-            if i == 0:
-                text = EDIT_TEXTS[self.edit_action][0]
-            else:
-                text = EDIT_TEXTS[self.edit_action][i] + ": " + str(self.options[self.edit_action][i-1])
-            color = (0,255,0) if self.edit_y_place == i else (0,0,0)
-            text_surface = g.edit_action_font.render(text, True, color)
-            pos = (0,i*15)
-            g.screen.blit(text_surface, pos)
-
-    def change_edit_action(self, way):
-        if self.edit_y_place == 0:
-            self.edit_action += way
-            if self.edit_action < 0: self.edit_action = EDIT_ACTIONS - 1
-            elif self.edit_action >= EDIT_ACTIONS: self.edit_action = 0
-        else:
-            self.options[self.edit_action][self.edit_y_place-1] += way
-
-    def change_edit_y_place(self, way):
-        self.edit_y_place += way
-        if self.edit_y_place < 0: self.edit_y_place = EDIT_OPTIONS[self.edit_action]
-        elif self.edit_y_place > EDIT_OPTIONS[self.edit_action]: self.edit_y_place = 0
-
-    def teleport_to(self, pos):
-        self.x = pos[0]
-        self.y = pos[1]
-
-class CameraLine:
-    def __init__(self, start_pos, end_pos): # cl_type = camera line type
-        self.start_pos = start_pos
-        self.end_pos = end_pos
-    def draw(self, g):
-        x1, y1 = g.camera.translate_position(self.start_pos[0], self.start_pos[1])
-        x2, y2 = g.camera.translate_position(self.end_pos[0], self.end_pos[1])
-        pygame.draw.line(g.screen, (255,0,0), (int(x1),int(y1)), (int(x2),int(y2)), 3)
-
-class InteractiveObject:
-    def __init__(self, x, y, width, height):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.y_vel = 0
-        self.x_vel = 0
-        self.stood_on_ground_previous_frame = False
-    def closest_side_of_rect(self, r): # requires x,y,width,height
-        left_x_dif = abs((self.x)-(r.x-self.width))
-        right_x_dif = abs((self.x)-(r.x+r.width))
-        up_y_dif = abs((self.y)-(r.y-self.height))
-        down_y_dif = abs((self.y)-(r.y+r.height))
-
-        if up_y_dif < down_y_dif: # closest to up
-            if right_x_dif < left_x_dif:
-                if up_y_dif < right_x_dif:
-                    return "up"
-                else:
-                    return "right"
-            else:
-                if up_y_dif < left_x_dif:
-                    return "up"
-                else:
-                    return "left"
-        else: 
-            if right_x_dif < left_x_dif: # closest to down
-                if down_y_dif < right_x_dif:
-                    return "down"
-                else:
-                    return "right"
-            else:
-                if down_y_dif < left_x_dif:
-                    return "down"
-                else:
-                    return "left"
-    def handle_moving_like_physical_object(self, r, collide_part):
-        if collide_part == "up":
-            self.y = r.y - self.height
-            self.y_vel = min(0, self.y_vel)
-            self.stood_on_ground_previous_frame = True
-            if type(r) == MovingCollisionRect:
-                self.x_vel += r.x_vel
-                self.y_vel += max(0, r.y_vel)
-        elif collide_part == "down":
-            self.y = r.y + r.height
-            self.y_vel = max(0, self.y_vel)   
-        elif collide_part == "right":
-            self.x = r.x + r.width
-            self.x_vel = max(0, self.x_vel)
-        elif collide_part == "left":
-            self.x = r.x - self.width
-            self.x_vel = min(0, self.x_vel)
-    def interact_with_collision_rects(self, g):
-        self.stood_on_ground_previous_frame = False
-
-        # VERB: correct placement, if it's illegal
-        for r in g.collision_rects + g.pipes: # rect = r
-            if General.rects_collide(self,r):
-                collide_part = self.closest_side_of_rect(r)
-                self.collide_rect_handle_before(r, collide_part, g)
-                self.handle_moving_like_physical_object(r, collide_part)
-                
-    def collide_rect_handle_before(self, r, collide_part, g):
-        pass
-    def got_jumped_on(self, g):
-        for _ in range(random.randint(10,30)):
-            g.objects_to_add.append(Particle(self.x,self.y,self.width,self.height, self.color))
-        g.objects_to_remove.append(self)
-
-class Player(InteractiveObject):
-    def __init__(self):
-        super().__init__(0, 0, PLAYER_WIDTH, PLAYER_SMALL_HEIGHT)
-
-        self.jump_mode = False
-        self.jump_time = 1000
-        self.jump_timer = self.jump_time
-
-        self.climb_mode = False
-
-        self.big = False # you get big when you eat a mushroom
-
-        self.invincibility_timer = 0
-        self.invincibility_time = 1500
-
-        self.respawn_point = (0,0)
-
-        self.pipe_player_is_on = None
-
-        self.color = (255,255,255)
-        self.visible = True
-
-        self.coins = 0
-
-    def set_position_to(self, x, y):
-        self.x = x
-        self.y = y
-        self.x_vel = 0
-        self.y_vel = 0
-        self.jump_mode = False
-
-    def logic(self, g):
-        # move according to player input and physics
-
-        pressed_keys = pygame.key.get_pressed()
-        # interact with climbable rects
-        if self.climb_mode:
-            if self.allowed_to_climb(g):
-                # climb
-                speed = 0.1
-                self.y_vel = 0
-                if pressed_keys[pygame.K_RIGHT] or pressed_keys[pygame.K_d]:
-                    self.x_vel = speed
-                if pressed_keys[pygame.K_LEFT] or pressed_keys[pygame.K_a]:
-                    self.x_vel = -speed
-                if pressed_keys[pygame.K_UP] or pressed_keys[pygame.K_w]:
-                    self.y_vel = -speed
-                if pressed_keys[pygame.K_DOWN] or pressed_keys[pygame.K_s]:
-                    self.y_vel = speed
-            else:
-                self.climb_mode = False
-        else:
-            speed = 0.2 # move regularly
-        
-            if pressed_keys[pygame.K_RIGHT] or pressed_keys[pygame.K_d]:
-                self.x_vel += speed
-            if pressed_keys[pygame.K_LEFT] or pressed_keys[pygame.K_a]:
-                self.x_vel -= speed
-
-            # possibly climb
-            if g.up_pressed_this_frame and self.allowed_to_climb(g):
-                self.climb_mode = True
-                self.jump_mode = False
-
-        # jump stuff
-        if self.jump_mode:
-            self.jump_timer += g.frame_time
-            if self.jump_timer >= self.jump_time or not pressed_keys[pygame.K_SPACE]:
-                self.jump_mode = False
-                self.jump_timer = self.jump_time
-        if (True if self.climb_mode else self.stood_on_ground_previous_frame) and g.space_pressed_this_frame:
-            self.y_vel = -0.175
-            self.jump_mode = True
-            self.jump_timer = 0
-            self.climb_mode = False
-
-        if not self.climb_mode:
-            gravity = 0.0175
-            if self.jump_mode:
-                self.y_vel += pow(self.jump_timer/self.jump_time,1)*gravity
-            else:
-                self.y_vel += gravity
-
-        self.x += self.x_vel * g.frame_time
-        self.x_vel = 0
-        self.y += self.y_vel * g.frame_time
-        
-        self.interact_with_collision_rects(g)
-
-        # die from being bad stuff
-        if self.y_vel > 2:
-            self.die(g)
-
-        # invincibility stuff
-        if self.invincibility_timer > 0:
-            self.invincibility_timer -= g.frame_time
-            self.invincibility_timer = max(0, self.invincibility_timer)
-
-        # interact with enemies
-        for e in g.enemies:
-            if General.rects_collide(self, e):
-                if e.can_be_jumped_on:
-                    # check who attacks who
-                    if General.rects_collide_tuples((self.x,self.y,self.width,self.height),(e.x,e.y+e.height/2,e.width,e.height/2)):
-                        # player touched bottom half => player dies
-                        self.get_hit(g)
-                    else:
-                        # player is on top => enemy dies
-                        self.y_vel = -0.3
-                        self.jump_mode = True
-                        self.jump_timer = 0.2*self.jump_time
-                        self.climb_mode = False
-                        e.got_jumped_on(g) # removes enemy from array
-                else:
-                    self.get_hit(g) # without recourse
-                break
-        # interact with mushrooms
-        for m in g.mushrooms:
-            if General.rects_collide(self, m):
-                self.eat_mushroom(g, m)
-
-        # interact with pipes
-        if g.down_pressed_this_frame:
-            if self.pipe_player_is_on != None:
-                g.game_stopping_animation = GameStoppingAnimationPlayerInPipe(g, self.pipe_player_is_on.teleport_pos)
-        self.pipe_player_is_on = None # reset
-
-        # interact with coins
-        for coin in g.coins:
-            if General.circle_in_rect((coin.x,coin.y),coin.radius, self):
-                # collect coin
-                coin.got_picked_up(g) # increases coins and kills coin
-        
-        # interact with flags
-        for flag in g.flags:
-            if General.rects_collide_tuples((self.x,self.y,self.width,self.height),(flag.x,flag.y-flag.length,0,flag.length)):
-                flag.get_raised(g)
-                if type(flag) == RespawnFlag:
-                    self.respawn_point = (flag.x - 0.01,flag.y-self.height)
-                if type(flag) == WinFlag:
-                    pass
-
-    def allowed_to_climb(self, g):
-        for r in g.climbing_rects:
-            if General.rects_collide(self,r):
-                return True
-        return False
-
-    def collide_rect_handle_before(self, r, collide_part, g):
-        if collide_part == "down":
-            if self.y_vel < 0: # It only gets hit when jumped at from below, not above
-                r.got_hit(g)
-            self.jump_mode = False
-        if collide_part == "up":
-            if type(r) == Pipe and self.x > r.x and self.x+self.width < r.x+r.width:
-                self.pipe_player_is_on = r
-
-    def get_hit(self, g):
-        if self.invincibility_timer == 0:
-            if self.big:
-                self.big = False
-                self.invincibility_timer = self.invincibility_time
-                g.game_stopping_animation = GameStoppingAnimation(GS_ANIMATION_PLAYER_GET_SMALLER)
-            else:
-                # die
-                self.die(g)
-
-    def die(self, g):
-        print("die")
-        g.game_stopping_animation = GameStoppingAnimation(GS_ANIMATION_PLAYER_DIES)
-
-    def respawn(self, g):
-        self.coins = 0
-        g.load_saved_object_state()
-        self.set_position_to(self.respawn_point[0], self.respawn_point[1])
-
-    def eat_mushroom(self, g, m): # m = mushroom
-        if not self.big:
-            self.big = True
-            g.game_stopping_animation = GameStoppingAnimation(GS_ANIMATION_PLAYER_GET_BIGGER)
-        g.objects_to_remove.append(m)
-
-    def draw(self, g):
-        if self.visible:
-            x, y = g.camera.translate_position(self.x, self.y)
-            if self.invincibility_timer == 0 or self.invincibility_timer % 2 == 0:
-                pygame.draw.rect(g.screen, (0,0,0), (int(x),int(y),int(self.width),int(self.height)), 1)
-
-class SelfSovereignBeing(InteractiveObject): # moves around freely, turns at walls, possibly turns at edges
-    def __init__(self, x, y, width, height, x_speed, y_speed, turns_around_at_edges=False, color=(50,50,255), can_be_jumped_on=False):
-        super().__init__(x, y, width, height)
-
-        self.x_speed = x_speed
-        self.y_speed = y_speed
-        self.color = color
-
-        self.x_dir = -1
-        self.turn_around_at_edges = turns_around_at_edges
-        self.turn_around = False
-
-        self.turned_on = False
-
-        self.can_be_jumped_on = can_be_jumped_on
-
-    def logic(self, g):
-        if self.turned_on:
-            self.logic_movement(g)
-            self.logic_interacting(g)
-        else:
-            if General.rects_collide_tuples((g.camera.x,g.camera.y,g.width,g.height),(self.x,self.y,self.width,self.height)):
-                self.turned_on = True
-        
-    def logic_movement(self, g):
-        self.x_vel += self.x_dir * self.x_speed
-        self.x += self.x_vel * g.frame_time
-        self.x_vel = 0
-
-        self.y_vel += self.y_speed
-        self.y += self.y_vel * g.frame_time
-
-    def logic_interacting(self, g):
-        self.interact_with_collision_rects(g)
-        if self.turn_around:
-            self.x_dir *= -1
-            self.turn_around = False
-
-    def collide_rect_handle_before(self, r, collide_part, g):
-        if collide_part == "up":
-            # turn around at edges
-            if self.turn_around_at_edges:
-                if (self.x < r.x and self.x_dir < 0) or (self.x+self.width > r.x+r.width and self.x_dir > 0):
-                    self.turn_around = True
-        elif collide_part == "right":
-            self.turn_around = True
-        elif collide_part == "left":
-            self.turn_around = True
-    
-    def remove_self_if_under_camera(self, g):
-        x, y = g.camera.translate_position(self.x, self.y)
-        if y > g.height: #or x > g.width or x < 0:
-            # remove
-            g.objects_to_remove.append(self)
-
-    def draw(self, g):
-        x, y = g.camera.translate_position(self.x, self.y)
-        pygame.draw.rect(g.screen, self.color, (int(x),int(y),self.width,self.height))
-
-class WalkEnemy(SelfSovereignBeing):
-    def __init__(self, x, y, turns_around_at_edges=False):
-        super().__init__(x, y, 25, 30, 0.1, 0.005, turns_around_at_edges, (50,50,255), True)
-
-class JumpEnemy(SelfSovereignBeing):
-    def __init__(self, x, y, walks_on_ground=True, walks_in_air=True):
-        super().__init__(x, y, 25, 40, 0.1, 0.01, True, (50,100,255), True)
-
-        self.wait_timer = 0
-        self.wait_time = 750 # time to wait on ground til next jump
-        self.walks_on_ground = walks_on_ground
-        self.walks_in_air = walks_in_air
-
+            self.profiler.mark("yield")
+            self.finish_frame()
+            self.profiler.mark("logic wait")
+            if not self.startup_trace.done:
+                self.startup_trace.finish()
+            self.scheduler.run(frame_start + self.task_budget/self.framerate) # whatever time is left
+            self.profiler.mark("tasks")
+            self.profiler.end_frame(self)
+
+            self.frame_time = self.clock.tick(self.framerate)
+            self.quality.update(self.frame_time, self.clock.get_rawtime())
+            if self.frame_time > TELEMETRY_SPIKE and self.play_mode:
+                self.track(TELEMETRY_SPIKE_FRAME, self.player.x + self.player.width/2, self.player.y + self.player.height/2, self.frame_time)
+            self.autosave_timer += self.frame_time
+            if self.autosave_timer >= self.autosave_interval and self.play_mode:
+                self.autosave_timer = 0
+                if not self.scheduler.pending("autosave"):
+                    self.scheduler.add("autosave", self.autosave_task(), TASK_PRIORITY_HIGH)
+        if self.logic_thread != None:
+            self.logic_thread.shutdown()
+        if self.analyze_pool != None:
+            self.analyze_pool.shutdown(wait=False, cancel_futures=True)
+        self.telemetry.close()
+        self.stop_recording()
+
+    def handle_events(self):
+        self.mouse_clicked_this_frame = [False, False, False]
+        self.space_pressed_this_frame = False
+        self.up_pressed_this_frame = False
+        self.down_pressed_this_frame = False
+
+        running = True
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN:
+                self.next_snapshot = None # a key can change what the worker's snapshot shows
+                if event.key == pygame.K_k: 
+                    if self.play_mode: # into edit mode
+                        self.stop_recording()
+                        self.load_saved_object_state()
+                            
+                    else: # move player to camera
+                        self.save_object_state()
+                        self.player.set_position_to(self.camera.x+self.width/2-self.player.width/2,self.camera.y+self.height/2-self.player.height/2)
+                        self.ghost_recorder.clean = False
+                        
+                    self.play_mode = not self.play_mode
+
+                if event.key == pygame.K_SPACE:
+                    self.space_pressed_this_frame = True
+                if event.key == pygame.K_o:
+                    self.camera.change_edit_action(-1)
+                if event.key == pygame.K_p:
+                    self.camera.change_edit_action(1)
+                if event.key == pygame.K_u:
+                    self.camera.change_edit_y_place(-1)
+                if event.key == pygame.K_j:
+                    self.camera.change_edit_y_place(1)
+                if event.key == pygame.K_F5 and self.play_mode:
+                    self.quicksave = self.snapshot()
+                if event.key == pygame.K_F9 and self.play_mode:
+                    snapshot = self.quicksave if self.quicksave != None else self.read_autosave()
+                    if snapshot != None:
+                        self.restore(snapshot)
+                if event.key == pygame.K_b:
+                    self.render_mode = RENDER_BATCHED if self.render_mode == RENDER_IMMEDIATE else RENDER_IMMEDIATE
+                if event.key == pygame.K_t:
+                    self.pipelined = not self.pipelined
+                if event.key == pygame.K_F3:
+                    self.profiler.set_enabled(not self.profiler.enabled)
+                if event.key == pygame.K_g:
+                    self.show_ghosts = not self.show_ghosts
+                    self.load_ghosts()
+                if event.key == pygame.K_w or event.key == pygame.K_UP:
+                    self.up_pressed_this_frame = True
+                if event.key == pygame.K_s or event.key == pygame.K_DOWN:
+                    self.down_pressed_this_frame = True
+                if event.key == pygame.K_h and not self.play_mode:
+                    self.next_heatmap()
+                if event.key == pygame.K_m and not event.mod & pygame.KMOD_CTRL:
+                    self.toggle_minimap()
+                if event.mod & pygame.KMOD_CTRL and not self.play_mode:
+                    self.camera.selection.command(self, event.key)
+                if event.key == pygame.K_DELETE and not self.play_mode:
+                    self.camera.selection.delete(self)
+                if event.key == pygame.K_r and self.play_mode:
+                    if self.session_recorder.recording:
+                        self.stop_recording()
+                    else:
+                        self.session_recorder.start(self)
+                        print("recording")
+
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                if 1 <= event.button <= 3:
+                    self.mouse_clicked_this_frame[event.button - 1] = True
+        return running
+
+    def do_frame(self):
+        if self.session_recorder.recording and self.play_mode: # before the logic, which is idle here even when pipelined
+            self.session_recorder.record(self)
+        if self.pipelined and self.play_mode and self.render_mode == RENDER_BATCHED:
+            # draw what the last logic step left behind while the worker already computes the next one and collects its sprites
+            frame = self.next_snapshot if self.next_snapshot != None else self.render_snapshot()
+            self.next_snapshot = None
+            if self.logic_thread == None:
+                from concurrent.futures import ThreadPoolExecutor
+                self.logic_thread = ThreadPoolExecutor(max_workers=1)
+            self.pending_logic = self.logic_thread.submit(self.pipelined_step)
+            self.profiler.mark("snapshot")
+            self.draw_render_snapshot(frame)
+            self.profiler.mark("drawing")
+        else:
+            self.next_snapshot = None
+            self.do_game_logic()
+            self.profiler.mark("logic")
+            self.do_game_drawing()
+            self.profiler.mark("drawing")
+
+    def pipelined_step(self): # on the worker, which collects the sprites too, so the main thread only blits and presents
+        self.do_game_logic()
+        self.next_snapshot = self.render_snapshot()
+
+    def finish_frame(self): # nothing may touch objects from the main thread until the worker is done
+        if self.pending_logic != None:
+            pending, self.pending_logic = self.pending_logic, None
+            pending.result()
+
+    def do_game_logic(self):
+
+        if self.play_mode:
+            self.do_game_play_logic()
+        else:
+            self.do_game_edit_logic()
+
+        # add and remove necessary objects
+        self.bulk_update(self.objects_to_add, self.objects_to_remove)
+        self.objects_to_add = []
+        self.objects_to_remove = []
+
+    def bulk_update(self, added, removed): # a pass over every category that lost objects, what indexes them is updated once
+        if not added and not removed:
+            return
+        changed = set()
+        gone = {} # category: ids of its removed objects
+        for obj in removed:
+            gone.setdefault(self.object_mappings[type(obj)], set()).add(id(obj))
+        for category, ids in gone.items(): # in place, the category lists are shared
+            self.objects[category][:] = [obj for obj in self.objects[category] if id(obj) not in ids]
+            changed.add(category)
+        for obj in added:
+            category = self.object_mappings[type(obj)]
+            self.objects[category].append(obj)
+            changed.add(category)
+        if self.minimap != None and not self.play_mode:
+            self.minimap.objects_changed(self, added, removed)
+        if self.enemy_engine != None:
+            self.enemy_engine.objects_changed(self, added, removed)
+        if "collision_rects" in changed or "pipes" in changed:
+            self.collision_index.rebuild(self)
+        if "camera_lines" in changed:
+            self.edit_overlay.invalidate()
+
+    def do_game_play_logic(self):
+        if self.game_stopping_animation == None:
+            self.level_time += self.frame_time
+            for category in self.logic_order: # logic for all objects
+                if category == "player":
+                    self.player.logic(self)
+                elif category == "enemies" and self.enemy_engine != None:
+                    self.enemy_engine.logic(self)
+                elif category == "collision_rects": # only moving platforms near the camera, the others move when something collides with them
+                    self.collision_index.advance(self)
+                else:
+                    for obj in self.objects[category]:
+                        obj.logic(self)
+            self.ghost_recorder.record(self)
+            for ghost in self.ghosts:
+                ghost.logic(self)
+
+            self.camera.play_logic(self)
+            
+        else: # game stopping animation
+            self.game_stopping_animation.logic(self)
+
+    def pressed_keys(self):
+        return pygame.key.get_pressed() if self.input_keys == None else self.input_keys
+
+    def stats(self):
+        return {"fps":self.clock.get_fps(), "frame_time":self.frame_time, "work_time":self.clock.get_rawtime(),
+                "quality":self.quality.level, "objects":{category:len(objs) for category, objs in self.objects.items()}}
+
+    def use_enemy_engine(self, enabled):
+        if enabled and self.enemy_engine == None:
+            self.enemy_engine = EnemyEngine()
+        elif not enabled and self.enemy_engine != None:
+            self.enemy_engine.sync_to_objects()
+            self.enemy_engine = None
+
+    def do_game_edit_logic(self):
+        self.camera.edit_logic(self)
+
+    def do_game_drawing(self):
+        # Fill the background with white
+        self.screen.fill((255, 255, 255))
+
+        if self.render_mode == RENDER_BATCHED:
+            self.draw_objects_batched()
+        else:
+            self.draw_objects_immediate()
+
+        if self.play_mode:
+            self.hud.draw(self)
+        else:
+            self.camera.draw_edit_things(self)
+        if self.minimap != None:
+            self.minimap.draw(self)
+
+        # Flip the display
+        self.target.present()
+
+    def draw_objects_immediate(self):
+        for category in self.draw_order:
+            if category == "player":
+                self.player.draw(self)
+            elif category == "ghosts":
+                for ghost in self.ghosts:
+                    ghost.draw(self)
+            else:
+                for obj in self.objects[category]:
+                    obj.draw(self)
+
+    def draw_objects_batched(self): # every object adds pre-rendered sprites, which are then blitted in one call
+        self.blit_sprites(self.collect_sprites(self.sprite_blits))
+
+    def collect_sprites(self, blits):
+        blits.clear()
+        for category in self.draw_order:
+            if category == "player":
+                self.player.add_sprites(self, blits)
+            elif category == "ghosts":
+                for ghost in self.ghosts:
+                    ghost.add_sprites(self, blits)
+            else:
+                for obj in self.objects[category]:
+                    obj.add_sprites(self, blits)
+        return blits
+
+    def blit_sprites(self, blits):
+        if hasattr(self.screen, "fblits"): # pygame-ce
+            self.screen.fblits(blits)
+        else:
+            self.screen.blits(blits, False)
+
+    def render_snapshot(self): # a fresh blit list only holds cached surfaces and positions, so logic can change objects while it is drawn
+        blits = self.collect_sprites([])
+        self.hud.add_sprites(self, blits)
+        if self.minimap != None:
+            self.minimap.add_sprites(self, blits)
+        return blits
+
+    def draw_render_snapshot(self, blits):
+        self.screen.fill((255, 255, 255))
+        self.blit_sprites(blits)
+        self.target.present()
+
+def analyze_level(name, data): # in the analyzer's worker, which unpickles the level against its own main module
+    import level_analyzer
+    return level_analyzer.analyze_level_data(name, data)
+
+class LevelUnpickler(pickle.Unpickler): # levels are pickled from __main__, so resolve them against this module however it was imported
+    def find_class(self, module, name):
+        if module == "__main__" or module == "main":
+            return globals()[name]
+        return super().find_class(module, name)
+
+class General: # rects are objects with x,y,width,height
+    @staticmethod
+    def rects_collide_tuples(f, s): # first and second object
+        return f[0]+f[2] > s[0] and f[0] < s[0]+s[2] and f[1]+f[3] > s[1] and f[1] < s[1]+s[3]
+    @staticmethod
+    def rects_collide(f, s): # first and second object. Both require x,y,width,height variables
+        return f.x+f.width > s.x and f.x < s.x+s.width and f.y+f.height > s.y and f.y < s.y+s.height
+    @staticmethod
+    def rect_overlaps(f, x, y, width, height): # like rects_collide, without making an object or tuple for the second rect
+        return f.x+f.width > x and f.x < x+width and f.y+f.height > y and f.y < y+height
+    @staticmethod
+    def point_in_rect(p, r): # point and rect. Both require x,y,width,height variables
+        return p[0] > r.x and p[0] < r.x+r.width and p[1] > r.y and p[1] < r.y+r.height
+    @staticmethod
+    def line_in_rect (x1, y1, x2, y2, minX, minY, maxX, maxY):
+        # Completely outside.
+        if (x1 <= minX and x2 <= minX) or (y1 <= minY and y2 <= minY) or (x1 >= maxX and x2 >= maxX) or (y1 >= maxY and y2 >= maxY):
+            return False
+        if x2 - x1 == 0:
+            m = 0
+        else:
+            m = (y2 - y1) / (x2 - x1)
+        y = m * (minX - x1) + y1
+        if y > minY and y < maxY: return True
+        y = m * (maxX - x1) + y1
+        if y > minY and y < maxY: return True
+        if m == 0:
+            x = x1
+        else:
+            x = (minY - y1) / m + x1
+        if x > minX and x < maxX: return True
+        if m == 0:
+            x = x1
+        else:
+            x = (maxY - y1) / m + x1
+        if x > minX and x < maxX: return True
+        return False
+    @staticmethod
+    def line_in_tuple_rect(start_pos, end_pos, r): # pos is for line
+        # check start and end position
+        if General.rects_collide_tuples(start_pos+(0,0),r) or General.rects_collide_tuples(end_pos+(0,0),r):
+            return True
+        if General.line_in_rect(start_pos[0],start_pos[1],end_pos[0],end_pos[1],r[0],r[1],r[0]+r[2],r[1]+r[3]):
+            return True
+        return False
+    @staticmethod
+    def get_rect_of_two_points(p1, p2, grid_size):
+        x1, x2 = (p1[0], p2[0]) if p2[0] >= p1[0] else (p2[0], p1[0])
+        y1, y2 = (p1[1], p2[1]) if p2[1] >= p1[1] else (p2[1], p1[1])
+        w, h = (x2 - x1 + grid_size, y2 - y1 + grid_size)
+        return (x1, y1, w, h)
+    @staticmethod
+    def circle_in_rect(circle_x, circle_y, circle_radius, rect):
+        dx = abs(circle_x - (rect.x+rect.width/2))
+        dy = abs(circle_y - (rect.y+rect.height/2))
+        if dx + dy <= circle_radius*1.5:
+            return True
+        return False
+
+class SpikeProfiler: # cheap timings of the last frames all the time, a detailed capture when a frame takes too long
+    def __init__(self, threshold=50, history=8, profile_frames=30, directory="spikes"):
+        self.enabled = False
+        self.threshold = threshold # ms of work, without the framerate cap
+        self.history = deque(maxlen=history) # the spike and the frames before it
+        self.profile_frames = profile_frames # cProfile runs this many frames after a spike
+        self.directory = directory
+        self.phases = []
+        self.frame_start = self.last = 0
+        self.gc_start = 0
+        self.gc_time = 0
+        self.gc_collections = []
+        self.profile = None
+        self.profile_left = 0
+        self.profile_path = None
+        self.spikes = 0
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            gc.callbacks.append(self.gc_callback)
+        elif not enabled and self.enabled:
+            gc.callbacks.remove(self.gc_callback)
+            if self.profile != None:
+                self.stop_profile()
+        self.enabled = enabled
+        print("spike profiler " + ("on" if enabled else "off"))
+
+    def gc_callback(self, phase, info):
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+        else:
+            self.gc_time += (time.perf_counter() - self.gc_start) * 1000
+            self.gc_collections.append(info["generation"])
+
+    def begin_frame(self, frame_start):
+        if self.enabled:
+            self.frame_start = self.last = frame_start
+            self.phases = []
+
+    def mark(self, phase): # time since the last mark goes to this phase
+        if self.enabled:
+            now = time.perf_counter()
+            self.phases.append((phase, (now - self.last) * 1000))
+            self.last = now
+
+    def end_frame(self, g):
+        if not self.enabled:
+            return
+        total = (time.perf_counter() - self.frame_start) * 1000
+        self.history.append({"total":total, "phases":self.phases, "gc_time":self.gc_time, "gc_collections":self.gc_collections})
+        self.gc_time = 0
+        self.gc_collections = []
+        if self.profile != None:
+            self.profile_left -= 1
+            if self.profile_left <= 0:
+                self.stop_profile()
+        elif total > self.threshold:
+            self.capture(g, total)
+
+    def capture(self, g, total):
+        os.makedirs(self.directory, exist_ok=True)
+        self.spikes += 1
+        name = os.path.join(self.directory, "spike_" + time.strftime("%Y%m%d_%H%M%S") + "_" + str(self.spikes))
+        capture = {"frame_time":total, "threshold":self.threshold, "frames":list(self.history),
+                   "level":g.level, "play_mode":g.play_mode, "pipelined":g.pipelined, "quality":g.quality.level,
+                   "objects":{category:len(objs) for category, objs in g.objects.items()},
+                   "objects_to_add":len(g.objects_to_add), "objects_to_remove":len(g.objects_to_remove),
+                   "tasks":[task.name for task in g.scheduler.tasks],
+                   "gc_counts":gc.get_count(), "gc_stats":gc.get_stats()}
+        import json, cProfile # only needed once something spiked
+        with open(name + ".json", "w") as f:
+            json.dump(capture, f, indent=1)
+        print("frame took " + str(int(total)) + " ms, captured in " + name + ".json")
+        # a spike is over before it can be profiled, so the frames after it get profiled in case it happens again
+        self.profile = cProfile.Profile()
+        self.profile_left = self.profile_frames
+        self.profile_path = name + ".prof"
+        self.profile.enable()
+
+    def stop_profile(self):
+        self.profile.disable()
+        self.profile.dump_stats(self.profile_path)
+        self.profile = None
+
+class StartupTrace: # how long each stage from launch to the first frame took, printed with --startup-trace
+    def __init__(self, start=IMPORT_START):
+        self.start = start
+        self.stages = [] # (name, perf_counter when it ended)
+        self.done = False
+
+    def mark(self, stage, t=None):
+        if not self.done:
+            self.stages.append((stage, time.perf_counter() if t == None else t))
+
+    def finish(self): # after the first frame was shown
+        self.mark("first frame")
+        self.done = True
+        if "--startup-trace" in sys.argv:
+            print(self.report())
+
+    def durations(self):
+        last = self.start
+        for name, t in self.stages:
+            yield name, (t - last) * 1000
+            last = t
+
+    def report(self):
+        lines = [name.rjust(12) + " " + str(round(ms, 1)).rjust(7) + " ms" for name, ms in self.durations()]
+        total = (self.stages[-1][1] - self.start) * 1000 if self.stages else 0
+        return "\n".join(lines + ["total".rjust(12) + " " + str(round(total, 1)).rjust(7) + " ms"])
+
+class KeyState: # indexed like pygame.key.get_pressed(), for input from a script or a bot
+    def __init__(self, keys=()):
+        self.keys = set(keys)
+    def __getitem__(self, key):
+        return key in self.keys
+
+def write_varint(out, v): # zigzag, so small negative numbers take one byte too
+    v = v*2 if v >= 0 else -v*2-1
+    while v >= 0x80:
+        out.append(v & 0x7f | 0x80)
+        v >>= 7
+    out.append(v)
+
+class GhostRecorder: # samples the player every GHOST_INTERVAL ms of level time, storing how its velocity changed since the
+    # last sample, so running or falling steadily takes a byte per sample
+    def __init__(self):
+        self.start(False)
+
+    def start(self, clean):
+        self.clean = clean # recorded from the start of the level, only those runs are worth racing
+        self.data = bytearray(GHOST_MAGIC)
+        self.next_time = 0
+        self.last = (0, 0, 0, 0, PLAYER_WIDTH, PLAYER_SMALL_HEIGHT, True) # x, y, x and y velocity, width, height, visible
+        self.last_frame = None # level time and player position of the frame before
+
+    def record(self, g):
+        p = g.player
+        t = g.level_time
+        frame_t, frame_x, frame_y = self.last_frame if self.last_frame != None else (t, p.x, p.y)
+        while t >= self.next_time:
+            f = (self.next_time - frame_t) / (t - frame_t) if t > frame_t else 1 # where the player was at the sample time
+            f = min(1, max(0, f))
+            self.next_time += GHOST_INTERVAL
+            x, y = round((frame_x + (p.x - frame_x)*f)*GHOST_SCALE), round((frame_y + (p.y - frame_y)*f)*GHOST_SCALE)
+            width, height = round(p.width), round(p.height)
+            prev_x, prev_y, prev_x_vel, prev_y_vel, prev_width, prev_height, prev_visible = self.last # in quarter pixels
+            x_vel, y_vel = x - prev_x, y - prev_y
+            mask = 0
+            if x_vel != prev_x_vel: mask |= GHOST_DX
+            if y_vel != prev_y_vel: mask |= GHOST_DY
+            if width != prev_width or height != prev_height: mask |= GHOST_SIZE
+            if p.visible != prev_visible: mask |= GHOST_VISIBLE
+            self.data.append(mask)
+            if mask & GHOST_DX: write_varint(self.data, x_vel - prev_x_vel)
+            if mask & GHOST_DY: write_varint(self.data, y_vel - prev_y_vel)
+            if mask & GHOST_SIZE:
+                write_varint(self.data, width - prev_width)
+                write_varint(self.data, height - prev_height)
+            self.last = (x, y, x_vel, y_vel, width, height, p.visible)
+        self.last_frame = (t, p.x, p.y)
+
+    def save(self, level, run_time): # returns the path, None if the run doesn't count
+        if not self.clean or len(self.data) == len(GHOST_MAGIC):
+            return None
+        os.makedirs(GHOST_DIR, exist_ok=True)
+        path = os.path.join(GHOST_DIR, "level"+str(level)+"_"+str(int(run_time)).zfill(8)+".ghost") # sorts fastest first
+        with open(path + ".tmp", "wb") as f:
+            f.write(self.data)
+        os.replace(path + ".tmp", path)
+        self.clean = False
+        return path
+
+class Ghost: # plays a recording back along with the level time, reading the file a chunk at a time
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.rewind()
+
+    def rewind(self):
+        self.close()
+        self.file = open(self.path, "rb")
+        if self.file.read(len(GHOST_MAGIC)) != GHOST_MAGIC:
+            raise ValueError(self.path + " is not a ghost recording")
+        self.buffer = b""
+        self.pos = 0
+        self.state = [0, 0, 0, 0, PLAYER_WIDTH, PLAYER_SMALL_HEIGHT, True]
+        self.done = False
+        self.time = 0 # level time of the sample in self.next
+        self.previous = self.next = self.read_sample()
+        self.x, self.y, self.width, self.height, self.visible = 0, 0, PLAYER_WIDTH, PLAYER_SMALL_HEIGHT, False
+
+    def close(self):
+        if self.file != None:
+            self.file.close()
+            self.file = None
+
+    def read_byte(self):
+        if self.pos >= len(self.buffer):
+            self.buffer = self.file.read(GHOST_CHUNK)
+            self.pos = 0
+            if not self.buffer:
+                raise EOFError
+        b = self.buffer[self.pos]
+        self.pos += 1
+        return b
+
+    def read_varint(self):
+        v = shift = 0
+        while True:
+            b = self.read_byte()
+            v |= (b & 0x7f) << shift
+            shift += 7
+            if b < 0x80:
+                return v >> 1 if v & 1 == 0 else -(v >> 1) - 1
+
+    def read_sample(self): # x, y, width, height, visible of the next sample, None at the end
+        try:
+            mask = self.read_byte()
+            state = self.state
+            if mask & GHOST_DX: state[2] += self.read_varint()
+            if mask & GHOST_DY: state[3] += self.read_varint()
+            if mask & GHOST_SIZE:
+                state[4] += self.read_varint()
+                state[5] += self.read_varint()
+            if mask & GHOST_VISIBLE: state[6] = not state[6]
+        except EOFError:
+            self.done = True
+            return None
+        state[0] += state[2]
+        state[1] += state[3]
+        return (state[0]/GHOST_SCALE, state[1]/GHOST_SCALE, state[4], state[5], state[6])
+
+    def logic(self, g):
+        t = g.level_time
+        if t < self.time - GHOST_INTERVAL: # the level restarted
+            self.rewind()
+        while not self.done and self.time < t:
+            self.previous = self.next
+            sample = self.read_sample()
+            if sample != None:
+                self.next = sample
+                self.time += GHOST_INTERVAL
+        if self.done and self.time < t: # finished, it stays where the run ended
+            self.visible = False
+            return
+        f = 1 - (self.time - t) / GHOST_INTERVAL if self.previous is not self.next else 1
+        f = min(1, max(0, f))
+        x0, y0 = self.previous[0], self.previous[1]
+        self.x = x0 + (self.next[0] - x0) * f
+        self.y = y0 + (self.next[1] - y0) * f
+        self.width, self.height, self.visible = self.next[2], self.next[3], self.next[4]
+
+    def draw(self, g):
+        if self.visible:
+            x, y = g.camera.translate_position(self.x, self.y)
+            g.screen.blit(self.sprite(g), (int(x),int(y)))
+
+    def add_sprites(self, g, blits):
+        if self.visible:
+            x, y = g.camera.translate_position(self.x, self.y)
+            blits.append((self.sprite(g), (int(x),int(y))))
+
+    def sprite(self, g):
+        if not g.quality.translucency():
+            return g.sprite_cache.frame(self.width, self.height, GHOST_COLOR, 1)
+        return g.sprite_cache.translucent(self.width, self.height, GHOST_COLOR, 90)
+
+class Telemetry: # events with where they happened, packed into a ring of records that a thread writes out a batch at a time
+    def __init__(self):
+        self.ring = bytearray(TELEMETRY_RING * TELEMETRY_RECORD.size)
+        self.batch = 0 # the game fills slots batch*TELEMETRY_BATCH onwards
+        self.count = 0
+        self.queue = queue.Queue(TELEMETRY_RING // TELEMETRY_BATCH - 2) # with the batch being written and the one being filled that's the ring
+        self.file = None
+        self.thread = None
+        self.dropped = 0
+
+    def open(self, directory=TELEMETRY_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "session_" + time.strftime("%Y%m%d_%H%M%S") + "_" + str(os.getpid()) + ".tel")
+        self.file = open(self.path, "wb")
+        self.file.write(TELEMETRY_MAGIC)
+        self.thread = threading.Thread(target=self.write_batches, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def emit(self, kind, level, level_time, x, y, value=0): # does nothing until opened
+        if self.file == None:
+            return
+        TELEMETRY_RECORD.pack_into(self.ring, (self.batch*TELEMETRY_BATCH + self.count) * TELEMETRY_RECORD.size,
+                                   kind, level, min(int(value), 0xffff), int(level_time), x, y)
+        self.count += 1
+        if self.count == TELEMETRY_BATCH:
+            self.hand_off()
+
+    def hand_off(self):
+        if self.count == 0:
+            return
+        try:
+            self.queue.put_nowait((self.batch, self.count))
+            self.batch = (self.batch + 1) % (TELEMETRY_RING // TELEMETRY_BATCH)
+        except queue.Full: # the disk can't keep up, the batch gets filled again
+            self.dropped += self.count
+        self.count = 0
+
+    def write_batches(self): # on the telemetry thread, the slots of a queued batch aren't touched until it's written
+        view = memoryview(self.ring)
+        size = TELEMETRY_RECORD.size
+        while True:
+            item = self.queue.get()
+            if item != None:
+                batch, count = item
+                start = batch * TELEMETRY_BATCH * size
+                self.file.write(view[start:start + count*size])
+                self.file.flush()
+            self.queue.task_done()
+            if item == None:
+                break
+
+    def flush(self, wait=False): # wait: until everything emitted is in the file
+        if self.file == None:
+            return
+        self.hand_off()
+        if wait:
+            self.queue.join()
+
+    def close(self):
+        if self.file == None:
+            return
+        self.hand_off()
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        self.file = None
+
+class SessionRecorder: # the input every frame gets, and a snapshot now and then, so a session can be played back exactly
+    def __init__(self):
+        self.recording = False
+
+    def start(self, g):
+        self.recording = True
+        self.name = "session_" + time.strftime("%Y%m%d_%H%M%S")
+        self.frames = bytearray()
+        self.count = 0
+        self.checkpoints = [] # (frame, snapshot, numpy random state for the enemy engine, played)
+        self.checkpoint_next = True
+        self.levels = {} # level number: the level file, respawning and the next levels load them
+        level = 0
+        while os.path.exists("level"+str(level)+".pickle"):
+            with open("level"+str(level)+".pickle", "rb") as f:
+                self.levels[level] = f.read()
+            level += 1
+        self.render_mode = g.render_mode
+        self.enemy_engine = g.enemy_engine != None
+
+    def checkpoint(self, g, played): # played: the frames before led here, a restore or the start didn't
+        self.checkpoints.append((self.count, g.snapshot(with_random=True), np.random.get_state() if g.enemy_engine != None else None, played))
+
+    def record(self, g): # what the logic of this frame will use
+        if self.checkpoint_next or self.count - self.checkpoints[-1][0] >= RECORDING_CHECKPOINT:
+            self.checkpoint(g, not self.checkpoint_next)
+            self.checkpoint_next = False
+        keys = g.pressed_keys()
+        held = 0
+        for bit, alternatives in enumerate(RECORDING_KEYS):
+            if any(keys[key] for key in alternatives):
+                held |= 1 << bit
+        pressed = g.space_pressed_this_frame | g.up_pressed_this_frame << 1 | g.down_pressed_this_frame << 2
+        self.frames += RECORDING_FRAME.pack(min(int(g.frame_time), 0xffff), held, pressed, g.quality.level)
+        self.count += 1
+
+    def stop(self, g): # returns the path
+        self.recording = False
+        if self.checkpoints and self.count > self.checkpoints[-1][0]: # where the last frames led, to check a replay of them against
+            self.checkpoint(g, True)
+        os.makedirs(RECORDING_DIR, exist_ok=True)
+        path = os.path.join(RECORDING_DIR, self.name + ".rec")
+        session = {"frames":bytes(self.frames), "checkpoints":self.checkpoints, "levels":self.levels,
+                   "render_mode":self.render_mode, "enemy_engine":self.enemy_engine}
+        with open(path + ".tmp", "wb") as f:
+            f.write(RECORDING_MAGIC)
+            f.write(zlib.compress(pickle.dumps(session, pickle.HIGHEST_PROTOCOL), 1))
+        os.replace(path + ".tmp", path)
+        self.frames = bytearray() # a long session is a few MB, no need to keep it
+        self.checkpoints = []
+        return path
+
+class Task:
+    def __init__(self, name, job, priority):
+        self.name = name
+        self.job = job # generator, it can be paused at every yield
+        self.priority = priority
+        self.turn = 0 # tasks of the same priority take turns
+        self.done = False
+    def cancel(self):
+        if not self.done:
+            self.job.close()
+            self.done = True
+
+class TaskScheduler: # background jobs, run a step at a time in the part of the frame budget logic and drawing left over
+    def __init__(self):
+        self.tasks = []
+        self.turns = 0
+
+    def add(self, name, job, priority=TASK_PRIORITY_NORMAL):
+        task = Task(name, job, priority)
+        self.tasks.append(task)
+        return task
+
+    def pending(self, name):
+        return any(task.name == name and not task.done for task in self.tasks)
+
+    def cancel(self, name):
+        for task in self.tasks:
+            if task.name == name:
+                task.cancel()
+        self.tasks = [task for task in self.tasks if not task.done]
+
+    def run(self, deadline): # perf_counter time to stop at, a single step can go over it
+        self.tasks = [task for task in self.tasks if not task.done]
+        while self.tasks and time.perf_counter() < deadline:
+            task = min(self.tasks, key=lambda t: (-t.priority, t.turn))
+            self.turns += 1
+            task.turn = self.turns
+            try:
+                next(task.job)
+            except StopIteration:
+                task.done = True
+                self.tasks.remove(task)
+
+class RenderTarget: # the game draws at a fixed internal size, which gets scaled to the window
+    def __init__(self, size, window_size=None, fullscreen=False, hardware_scaling=True):
+        self.size = tuple(size)
+        flags = pygame.FULLSCREEN if fullscreen else 0
+        if window_size == None and not fullscreen: # window of the internal size, nothing to scale
+            self.window = pygame.display.set_mode(self.size)
+            self.surface = self.window
+        elif window_size == None and hardware_scaling: # SDL scales on the gpu and maps the mouse, it picks the window size itself
+            self.window = pygame.display.set_mode(self.size, flags | pygame.SCALED)
+            self.surface = self.window
+        else: # an exact window size, or no SCALED support: one scaling blit per frame
+            self.window = pygame.display.set_mode(window_size or (0,0), flags)
+            self.surface = pygame.Surface(self.size).convert()
+
+    def present(self):
+        if self.surface is not self.window:
+            pygame.transform.scale(self.surface, self.window.get_size(), self.window)
+        pygame.display.flip()
+
+    def window_to_internal(self, pos):
+        if self.surface is self.window:
+            return pos
+        window_width, window_height = self.window.get_size()
+        return (int(pos[0] * self.size[0] / window_width), int(pos[1] * self.size[1] / window_height))
+
+    def mouse_position(self):
+        return self.window_to_internal(pygame.mouse.get_pos())
+
+class TextCache: # rendered text surfaces, least recently used ones get thrown out
+    def __init__(self, max_size=128):
+        self.surfaces = OrderedDict()
+        self.max_size = max_size
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+class CollisionIndex: # collision rects and pipes as pygame.Rects, so pygame finds the candidates for a collision in one call
+    def __init__(self):
+        self.objects = []
+        self.rects = []
+        self.moving = []
+        self.moving_rects = []
+        self.is_moving = []
+        self.time = None # level time the moving platforms were last asked for
+        self.query = pygame.Rect(0,0,0,0)
+
+    def rebuild(self, g):
+        self.objects = g.collision_rects + g.pipes
+        self.rects = [pygame.Rect(0,0,0,0) for _ in self.objects]
+        self.moving = [i for i, r in enumerate(self.objects) if isinstance(r, MovingCollisionRect)]
+        self.is_moving = [False] * len(self.objects)
+        for i, r in enumerate(self.objects):
+            self.rects[i].update(r.x-1, r.y-1, r.width+3, r.height+3) # pygame.Rects are ints, the margin covers the rounding
+        for i in self.moving: # moving platforms are indexed with their whole path, so they don't need updating
+            x, y, width, height = self.objects[i].path_rect()
+            self.rects[i].update(x-1, y-1, width+3, height+3)
+            self.is_moving[i] = True
+        self.moving_rects = [self.rects[i] for i in self.moving]
+        self.time = g.level_time
+
+    def advance(self, g): # moves the platforms near the camera, for drawing
+        self.time = g.level_time
+        self.query.update(g.camera.x - g.width/2, g.camera.y - g.height/2, g.width*2, g.height*2)
+        for j in self.query.collidelistall(self.moving_rects):
+            self.objects[self.moving[j]].update_to(self.time)
+
+    def moved(self, hits): # the moving platforms among the candidates get to the current time first
+        for i in hits:
+            if self.is_moving[i]:
+                self.objects[i].update_to(self.time)
+        return hits
+
+    def candidates(self, obj): # indices of the objects that might collide with obj, in level order
+        self.query.update(obj.x-1, obj.y-1, obj.width+3, obj.height+3)
+        return self.moved(self.query.collidelistall(self.rects))
+
+    def swept_candidates(self, obj, dx, dy): # same, for everything obj passes when moving by dx,dy
+        self.query.update(min(obj.x, obj.x+dx)-1, min(obj.y, obj.y+dy)-1, obj.width+abs(dx)+3, obj.height+abs(dy)+3)
+        return self.moved(self.query.collidelistall(self.rects))
+
+class Hud:
+    def __init__(self):
+        self.fps = 0
+        self.fps_timer = 0
+        self.fps_update_time = 500 # fps text only changes this often
+        self.coins = None
+        self.quality = None
+        self.text = ""
+    def draw(self, g):
+        g.screen.blit(self.surface(g), (0,0))
+    def add_sprites(self, g, blits):
+        blits.append((self.surface(g), (0,0)))
+    def surface(self, g):
+        self.fps_timer += g.frame_time
+        if self.fps_timer >= self.fps_update_time:
+            self.fps_timer = 0
+            self.fps = int(g.clock.get_fps())
+            self.coins = None
+        if self.coins != g.player.coins or self.quality != g.quality.level:
+            self.coins = g.player.coins
+            self.quality = g.quality.level
+            self.text = "Coins:"+str(self.coins) + " FPS:" + str(self.fps)
+            if self.quality != QUALITY_FULL:
+                self.text += " Quality:-" + str(self.quality)
+        return g.text_cache.render(g.hud_font, self.text, (0,0,0))
+
+class QualityGovernor: # cuts optional work while frames take longer than the budget, brings it back when there is headroom
+    def __init__(self, budget, window=30, cooldown=1000):
+        self.enabled = True
+        self.budget = budget # ms of logic and drawing per frame
+        self.degrade_at = 1.0 # average work over budget that lowers the level
+        self.restore_at = 0.6 # and that raises it again, lower so levels don't flip back and forth
+        self.cooldown = cooldown # ms to wait after a change before judging again
+        self.work_times = deque(maxlen=window)
+        self.timer = 0
+        self.level = QUALITY_FULL
+        self.max_level = QUALITY_FROZEN_OFFSCREEN
+        self.particle_scales = (1, 0.5, 0.25, 0.1) # per level
+
+    def update(self, frame_time, work_time):
+        self.timer += frame_time
+        self.work_times.append(work_time)
+        if not self.enabled:
+            self.set_level(QUALITY_FULL)
+            return
+        if self.timer < self.cooldown or len(self.work_times) < self.work_times.maxlen:
+            return
+        average = sum(self.work_times) / len(self.work_times)
+        if average > self.budget * self.degrade_at and self.level < self.max_level:
+            self.set_level(self.level + 1)
+        elif average < self.budget * self.restore_at and self.level > QUALITY_FULL:
+            self.set_level(self.level - 1)
+
+    def set_level(self, level):
+        if level != self.level:
+            self.level = level
+            self.timer = 0
+            self.work_times.clear()
+
+    def particle_count(self, n):
+        return max(1, int(n * self.particle_scales[self.level])) if n > 0 else 0
+    def clouds(self):
+        return self.level < QUALITY_NO_TRANSLUCENCY
+    def translucency(self):
+        return self.level < QUALITY_NO_TRANSLUCENCY
+    def simulates_offscreen(self):
+        return self.level < QUALITY_FROZEN_OFFSCREEN
+    def simulated_rect(self, g): # enemies further than a screen away from the camera stand still
+        return (g.camera.x - g.width, g.camera.y - g.height, g.width*3, g.height*3)
+
+SPRITE_COLOR_KEY = (255,0,255) # transparent color of sprites that aren't filled rectangles
+class SpriteCache: # display-format surfaces for the batched renderer, keyed by what they look like
+    def __init__(self, max_size=2048, max_bytes=32*1024*1024):
+        self.surfaces = {}
+        self.max_size = max_size
+        self.max_bytes = max_bytes # cloud sprites are big, a few hundred of them would already take a lot
+        self.bytes = 0
+
+    def add(self, key, surface):
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        if len(self.surfaces) >= self.max_size or self.bytes + size > self.max_bytes: # clouds have random sizes, so don't let them pile up
+            self.surfaces.clear()
+            self.bytes = 0
+        self.surfaces[key] = surface
+        self.bytes += size
+        return surface
+
+    def rect(self, width, height, color, outline_color=None):
+        key = ("rect", width, height, color, outline_color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((width, height)).convert()
+            surface.fill(color)
+            if outline_color != None:
+                pygame.draw.rect(surface, outline_color, (0,0,width,height), 1)
+            surface = self.add(key, surface)
+        return surface
+
+    def frame(self, width, height, color, thickness): # unfilled rect
+        key = ("frame", width, height, color, thickness)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((width, height)).convert()
+            surface.fill(SPRITE_COLOR_KEY)
+            pygame.draw.rect(surface, color, (0,0,width,height), thickness)
+            surface.set_colorkey(SPRITE_COLOR_KEY, pygame.RLEACCEL)
+            surface = self.add(key, surface)
+        return surface
+
+    def translucent(self, width, height, color, alpha):
+        key = ("translucent", width, height, color, alpha)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((width, height)).convert()
+            surface.fill(color)
+            surface.set_alpha(alpha, pygame.RLEACCEL)
+            surface = self.add(key, surface)
+        return surface
+
+    def circle(self, radius, color):
+        key = ("circle", radius, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((radius*2+1, radius*2+1)).convert()
+            surface.fill(SPRITE_COLOR_KEY)
+            pygame.draw.circle(surface, color, (radius,radius), radius)
+            surface.set_colorkey(SPRITE_COLOR_KEY, pygame.RLEACCEL)
+            surface = self.add(key, surface)
+        return surface
+
+    def pipe(self, width, height, color, line_y):
+        key = ("pipe", width, height, color, line_y)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface((width, height)).convert()
+            surface.fill(SPRITE_COLOR_KEY)
+            pygame.draw.rect(surface, color, (0,0,width,height))
+            pygame.draw.rect(surface, (0,0,0), (0,0,width,height), 1)
+            pygame.draw.line(surface, (0,0,0), (0,line_y), (width,line_y), 2)
+            surface.set_colorkey(SPRITE_COLOR_KEY, pygame.RLEACCEL)
+            surface = self.add(key, surface)
+        return surface
+
+OVERLAY_CHUNK = 512 # px of the level per cached piece of the editor overlay
+OVERLAY_MAX_CHUNKS = 64 # cached pieces with something in them, all are thrown out when there are more
+class EditOverlay: # what edit mode draws on top of the level, pre-rendered so panning only blits
+    def __init__(self):
+        self.grid = None # grid lines one cell bigger than the screen each way, blitted with the scroll offset
+        self.grid_key = None
+        self.chunks = {} # (chunk x, chunk y): surface with the camera lines in that part of the level, None if there are none
+        self.heatmap = None # telemetry_heatmap.HeatmapAggregator shown under the camera lines, H goes through the kinds
+        self.heatmap_kind = 0
+        self.heatmap_key = None
+        self.heatmap_surface = None
+
+    def invalidate(self): # after an edit of the camera lines or a new level
+        self.chunks = {}
+
+    def draw(self, g):
+        if self.heatmap != None:
+            self.draw_heatmap(g)
+        self.draw_grid(g)
+        self.draw_chunks(g)
+
+    def draw_heatmap(self, g): # the cells on screen, a pixel each, scaled up
+        import telemetry_heatmap
+        size = g.camera.grid_size
+        cx, cy = int(g.camera.x // size), int(g.camera.y // size)
+        key = (g.level, self.heatmap_kind, cx, cy, self.heatmap.version)
+        if self.heatmap_key != key:
+            counts = self.heatmap.cells(g.level, self.heatmap_kind, cx, cy, g.width // size + 2, g.height // size + 2)
+            surface = telemetry_heatmap.surface(counts)
+            self.heatmap_surface = pygame.transform.scale(surface, (surface.get_width()*size, surface.get_height()*size))
+            self.heatmap_surface.set_colorkey((0,0,0))
+            self.heatmap_surface.set_alpha(160)
+            self.heatmap_key = key
+        x, y = g.camera.translate_position(cx*size, cy*size)
+        g.screen.blit(self.heatmap_surface, (math.floor(x),math.floor(y)))
+        text = TELEMETRY_NAMES[self.heatmap_kind] + ": " + str(self.heatmap.totals.get((g.level, self.heatmap_kind), 0))
+        label = g.text_cache.render(g.hud_font, text, (0,0,0))
+        g.screen.blit(label, (g.width - label.get_width() - 5, 5))
+
+    def draw_grid(self, g):
+        size = g.camera.grid_size
+        key = (g.width, g.height, size)
+        if self.grid_key != key:
+            self.grid = pygame.Surface((g.width + size, g.height + size))
+            self.grid.fill(SPRITE_COLOR_KEY)
+            self.grid.set_colorkey(SPRITE_COLOR_KEY)
+            for x in range(size, g.width + size, size):
+                pygame.draw.line(self.grid, (0,0,0), (x,0), (x,g.height+size))
+            for y in range(size, g.height + size, size):
+                pygame.draw.line(self.grid, (0,0,0), (0,y), (g.width+size,y))
+            self.grid_key = key
+        g.screen.blit(self.grid, (int(-g.camera.x % size) - size, int(-g.camera.y % size) - size))
+
+    def draw_chunks(self, g):
+        camera = g.camera
+        for cx in range(int(camera.x // OVERLAY_CHUNK), int((camera.x + g.width) // OVERLAY_CHUNK) + 1):
+            for cy in range(int(camera.y // OVERLAY_CHUNK), int((camera.y + g.height) // OVERLAY_CHUNK) + 1):
+                if (cx, cy) not in self.chunks:
+                    self.chunks[(cx, cy)] = self.render_chunk(g, cx, cy)
+                surface = self.chunks[(cx, cy)]
+                if surface != None:
+                    x, y = camera.translate_position(cx*OVERLAY_CHUNK, cy*OVERLAY_CHUNK)
+                    g.screen.blit(surface, (math.floor(x),math.floor(y))) # floor, where the lines are on screen it's the same as int
+
+    def render_chunk(self, g, cx, cy):
+        x0, y0 = cx*OVERLAY_CHUNK, cy*OVERLAY_CHUNK
+        margin = 2 # half the line width
+        lines = [cl for cl in g.camera_lines
+                 if min(cl.start_pos[0], cl.end_pos[0]) - margin < x0 + OVERLAY_CHUNK and max(cl.start_pos[0], cl.end_pos[0]) + margin > x0
+                 and min(cl.start_pos[1], cl.end_pos[1]) - margin < y0 + OVERLAY_CHUNK and max(cl.start_pos[1], cl.end_pos[1]) + margin > y0]
+        if not lines:
+            return None
+        if sum(1 for surface in self.chunks.values() if surface != None) >= OVERLAY_MAX_CHUNKS:
+            self.chunks = {}
+        surface = pygame.Surface((OVERLAY_CHUNK, OVERLAY_CHUNK))
+        surface.fill(SPRITE_COLOR_KEY)
+        surface.set_colorkey(SPRITE_COLOR_KEY)
+        for cl in lines:
+            pygame.draw.line(surface, (255,0,0), (int(cl.start_pos[0] - x0),int(cl.start_pos[1] - y0)),
+                             (int(cl.end_pos[0] - x0),int(cl.end_pos[1] - y0)), 3)
+        return surface
+
+EDIT_ACTIONS = 8 # how many different objects there are to place, and selecting a region
+EDIT_COL_RECT, EDIT_MOVING_COL_RECT, EDIT_ENEMY, EDIT_CAM_LINE, EDIT_PIPE, EDIT_COIN, EDIT_FLAG, EDIT_SELECT = range(EDIT_ACTIONS)
+
+EDIT_OPTIONS = [2, 1, 8, 0, 1, 0, 1, 1]
+EDIT_TEXTS = [["Collision Rect","Has item?","Climbing?"],["Moving Collsion Rect, first width, then start+end pos","Speed?"],
+              ["Enemy","Turns at edges?","Jumps?","Jump: walks on ground?", "Jump: walks in air?", "Throws?","Flying?",
+               "Flying Speed", "Flying Range"],["Camera Line"],["Pipe","Color?"],["Coin"],["Flag","Respawn/Win?"],
+              ["Region, two corners. Ctrl+C/X/V copy/cut/paste, Ctrl+M move, Del, Ctrl+F fill","Fill: rect/blocks/coins"]]
+EDIT_COL_RECT_ITEM, EDIT_COL_RECT_CLIMBING = range(2)
+EDIT_MOVING_COL_RECT_SPEED = 0
+EDIT_ENEMY_EDGES,EDIT_ENEMY_JUMPS,EDIT_ENEMY_JUMP_WALKS_GROUND,EDIT_ENEMY_JUMP_WALKS_AIR,EDIT_ENEMY_THROW, \
+    EDIT_ENEMY_FLYING, EDIT_ENEMY_FLYING_SPEED, EDIT_ENEMY_FLYING_RANGE = range(8)
+EDIT_PIPE_COLOR = 0
+EDIT_FLAG_RESPAWN_WIN = 0
+EDIT_SELECT_FILL = 0
+EDIT_FILL_RECT, EDIT_FILL_BLOCKS, EDIT_FILL_COINS = range(3) # one rect over the region, a rect or a coin in every grid cell
+EDIT_REGION_CATEGORIES = ("collision_rects","climbing_rects","enemies","camera_lines","pipes","coins","flags") # what the level is made of
+class Camera:
+    def __init__(self, g):
+        self.x = -g.width/2
+        self.y = -g.height/2
+        self.grid_size = 30
+        self.x_offset = 0
+        self.x_offset_max = g.width*0.1
+        """self.x_vel = 0
+        self.y_vel = 0"""
+        self.cloud_timer = 0
+        
+        self.edit_action = EDIT_COL_RECT # what object to place
+        self.edit_y_place = 0 # 0 is the category, others are options
+        self.options = []
+        for i in range(EDIT_ACTIONS):
+            self.options.append([])
+            for _ in range(EDIT_OPTIONS[i]):
+                self.options[i].append(0)
+
+        print(self.options)
+
+        self.edit_points_clicked = []
+        self.selection = EditSelection()
+
+    def bad_play_logic(self, g):
+        dif = 0.5
+
+        x_endpoint = g.player.x + g.player.width/2 - g.width/2
+        x_increase = ((x_endpoint - self.x)/300) * g.frame_time
+        if abs(self.x_vel - x_increase) > dif:
+            self.x_vel += dif if x_increase > self.x_vel else -dif
+        screen_rect = (self.x + self.x_vel, self.y, g.width, g.height)
+        
+        for cl in g.camera_lines:
+            if General.line_in_tuple_rect(cl.start_pos,cl.end_pos, screen_rect):
+                self.x_vel = 0
+                break
+        else:
+            self.x += self.x_vel
+        
+        y_endpoint = (g.player.y+g.player.height/2) - g.height/2
+        y_increase = ((y_endpoint - self.y)/150) * g.frame_time
+        if abs(self.y_vel - y_increase) > dif:
+            self.y_vel += dif if y_increase > self.y_vel else -dif
+        screen_rect = (self.x, self.y + self.y_vel, g.width, g.height)
+
+        for cl in g.camera_lines:
+            if General.line_in_tuple_rect(cl.start_pos,cl.end_pos, screen_rect):
+                self.y_vel = 0
+                break
+        else:
+            self.y += self.y_vel
+    def play_logic(self, g):
+
+        x_endpoint = g.player.x + g.player.width/2 + self.x_offset - g.width/2
+        x_increase = ((x_endpoint - self.x)/300) * g.frame_time
+        
+        self.x_offset += x_increase/3
+        self.x_offset = max(-self.x_offset_max, min(self.x_offset_max, self.x_offset))
+
+        screen_rect = (self.x + x_increase, self.y, g.width, g.height)
+        
+        for cl in g.camera_lines:
+            if General.line_in_tuple_rect(cl.start_pos,cl.end_pos, screen_rect):
+                break
+        else:
+            self.x += x_increase
+        
+        y_endpoint = (g.player.y+g.player.height/2) - g.height/2
+        y_increase = ((y_endpoint - self.y)/150) * g.frame_time
+        screen_rect = (self.x, self.y + y_increase, g.width, g.height)
+
+        for cl in g.camera_lines:
+            if General.line_in_tuple_rect(cl.start_pos,cl.end_pos, screen_rect):
+                break
+        else:
+            self.y += y_increase
+
+        # handle clouds
+        self.cloud_timer += g.frame_time
+        if self.cloud_timer > 2000:
+            if g.quality.clouds():
+                g.objects_to_add.append(Cloud(g))
+            self.cloud_timer = 0
+
+    def edit_logic(self, g):
+        pressed_keys = g.pressed_keys() # move
+        vel = 0.3*g.frame_time
+        if pressed_keys[pygame.K_RIGHT] or pressed_keys[pygame.K_d]:
+            self.x += vel
+        if pressed_keys[pygame.K_LEFT] or pressed_keys[pygame.K_a]:
+            self.x -= vel
+        if pressed_keys[pygame.K_UP] or pressed_keys[pygame.K_w]:
+            self.y -= vel
+        if pressed_keys[pygame.K_DOWN] or pressed_keys[pygame.K_s]:
+            self.y += vel
+
+        
+        # place objects
+        m_pos = g.target.mouse_position()
+        exact_x = m_pos[0]+self.x
+        exact_y = m_pos[1]+self.y
+        x = exact_x - (exact_x % self.grid_size) # moved to grind lines
+        y = exact_y - (exact_y % self.grid_size)
+        if g.mouse_clicked_this_frame[0]: # left mouse button = create object in game
+            if self.edit_action == EDIT_COL_RECT:
+                if len(self.edit_points_clicked) == 0:
+                    self.edit_points_clicked.append((x, y))
+                else:
+                    x_, y_, w, h = General.get_rect_of_two_points((x,y), self.edit_points_clicked[0], self.grid_size)
+
+                    if bool(self.options[EDIT_COL_RECT][EDIT_COL_RECT_CLIMBING]):
+                        g.objects_to_add.append(ClimbingRect(x_,y_,w,h))
+                    elif self.options[EDIT_COL_RECT][EDIT_COL_RECT_ITEM] == 0:
+                        g.objects_to_add.append(CollisionRect(x_, y_, w, h))
+                    elif self.options[EDIT_COL_RECT][EDIT_COL_RECT_ITEM] == 1:
+                        g.objects_to_add.append(ItemizedCollisionRect(x_, y_, w, h))
+                    self.edit_points_clicked = []
+
+            elif self.edit_action == EDIT_MOVING_COL_RECT:
+                if len(self.edit_points_clicked) < 3:
+                    self.edit_points_clicked.append((x, y))
+                else:
+                    x1, y1 = self.edit_points_clicked[0]
+                    x2, y2 = self.edit_points_clicked[1]
+                    if x2 >= x1 and y2 >= y1: # legal
+                        w, h = (x2 - x1 + self.grid_size, y2 - y1 + self.grid_size)
+                        start_pos = self.edit_points_clicked[2]
+                        end_pos = (x, y)
+                        speed = 0.02 + self.options[EDIT_MOVING_COL_RECT][EDIT_MOVING_COL_RECT_SPEED] * 0.02
+                        g.objects_to_add.append(MovingCollisionRect(start_pos, end_pos, w, h, speed))
+                    self.edit_points_clicked = []
+
+            elif self.edit_action == EDIT_ENEMY:
+                turns = bool(self.options[EDIT_ENEMY][EDIT_ENEMY_EDGES])
+                throws = bool(self.options[EDIT_ENEMY][EDIT_ENEMY_THROW])
+                if self.options[EDIT_ENEMY][EDIT_ENEMY_FLYING]:
+                    speed = self.options[EDIT_ENEMY][EDIT_ENEMY_FLYING_SPEED]
+                    f_range = self.options[EDIT_ENEMY][EDIT_ENEMY_FLYING_RANGE]
+                    g.objects_to_add.append(FlyingEnemy(x, y, speed, f_range, throws))
+
+                elif self.options[EDIT_ENEMY][EDIT_ENEMY_JUMPS]:
+                    if throws:
+                        g.objects_to_add.append(JumpThrowEnemy(x, y))
+                    else:
+                        walks_on_ground = bool(self.options[EDIT_ENEMY][EDIT_ENEMY_JUMP_WALKS_GROUND])
+                        walks_in_air = bool(self.options[EDIT_ENEMY][EDIT_ENEMY_JUMP_WALKS_AIR])
+                        g.objects_to_add.append(JumpEnemy(x, y, walks_on_ground, walks_in_air))
+                else:
+                    g.objects_to_add.append(WalkEnemy(x, y, turns))
+
+            elif self.edit_action == EDIT_CAM_LINE:
+                if len(self.edit_points_clicked) == 0:
+                    self.edit_points_clicked.append((x, y))
+                else:
+                    g.objects_to_add.append(CameraLine(self.edit_points_clicked[0], (x,y)))
+                    self.edit_points_clicked = []
+            
+            elif self.edit_action == EDIT_PIPE:
+                if len(self.edit_points_clicked) < 3:
+                    self.edit_points_clicked.append((x, y))
+                else:
+                    x1, y1, w1, h1 = General.get_rect_of_two_points(self.edit_points_clicked[0], self.edit_points_clicked[1], self.grid_size)
+                    x2, y2, w2, h2 = General.get_rect_of_two_points(self.edit_points_clicked[2], (x, y), self.grid_size)
+                    color_value = self.options[EDIT_PIPE][EDIT_PIPE_COLOR]
+                    g.objects_to_add.append(Pipe(x1, y1, w1, h1, color_value,(x2+w2/2,y2)))
+                    g.objects_to_add.append(Pipe(x2, y2, w2, h2, color_value, (x1+w1/2,y1)))
+                    self.edit_points_clicked = []
+
+            elif self.edit_action == EDIT_COIN:
+                g.objects_to_add.append(Coin(g,x,y))
+
+            elif self.edit_action == EDIT_FLAG:
+                if self.options[EDIT_FLAG][EDIT_FLAG_RESPAWN_WIN] == 0:
+                    g.objects_to_add.append(RespawnFlag(g, x, y))
+                else:
+                    g.objects_to_add.append(WinFlag(g, x, y))
+
+            elif self.edit_action == EDIT_SELECT:
+                if len(self.edit_points_clicked) == 0:
+                    self.edit_points_clicked.append((x, y))
+                else:
+                    self.selection.region = General.get_rect_of_two_points((x, y), self.edit_points_clicked[0], self.grid_size)
+                    self.edit_points_clicked = []
+                
+        elif g.mouse_clicked_this_frame[2]: # right = remove object in game
+            for r in g.collision_rects + g.climbing_rects + g.pipes + g.enemies:
+                if General.point_in_rect((exact_x, exact_y), r):
+                    g.objects_to_remove.append(r)
+                    break # only remove one per frame, (nicer)
+            else:
+                for cl in g.camera_lines: # camera line
+                    if cl.start_pos[0] == x and cl.start_pos[1] == y:
+                        g.objects_to_remove.append(cl)
+                        break
+                else:
+                    for f in g.flags: # respawn flag
+                        if General.rects_collide_tuples((f.x,f.y,self.grid_size,self.grid_size),(x,y+self.grid_size,10,10)):
+                            g.objects_to_remove.append(f)
+                            break
+                    else:
+                        for coin in g.coins:
+                            if General.rects_collide_tuples((coin.x,coin.y,0,0),(x,y,self.grid_size,self.grid_size)):
+                                g.objects_to_remove.append(coin)
+                                break
+
+    def translate_position(self, x, y): # translates real position to position in relation to the camera
+        return x - self.x, y - self.y
+
+    def draw_edit_things(self, g):
+        g.edit_overlay.draw(g)
+        self.selection.draw(g)
+        self.draw_edit_action(g)
+
+    def grid_position(self, g): # grid cell under the mouse
+        x, y = g.target.mouse_position()
+        x, y = x + self.x, y + self.y
+        return x - x % self.grid_size, y - y % self.grid_size
+
+    def draw_edit_action(self, g):
+        for i in range(EDIT_OPTIONS[self.edit_action] + 1):
+            if i == 0:
+                text = EDIT_TEXTS[self.edit_action][0]
+            else:
+                text = EDIT_TEXTS[self.edit_action][i] + ": " + str(self.options[self.edit_action][i-1])
+            color = (0,255,0) if self.edit_y_place == i else (0,0,0)
+            if g.edit_action_font == None:
+                g.edit_action_font = pygame.font.Font(None, 25)
+            text_surface = g.text_cache.render(g.edit_action_font, text, color)
+            pos = (0,i*15)
+            g.screen.blit(text_surface, pos)
+
+    def change_edit_action(self, way):
+        if self.edit_y_place == 0:
+            self.edit_action += way
+            if self.edit_action < 0: self.edit_action = EDIT_ACTIONS - 1
+            elif self.edit_action >= EDIT_ACTIONS: self.edit_action = 0
+        else:
+            self.options[self.edit_action][self.edit_y_place-1] += way
+
+    def change_edit_y_place(self, way):
+        self.edit_y_place += way
+        if self.edit_y_place < 0: self.edit_y_place = EDIT_OPTIONS[self.edit_action]
+        elif self.edit_y_place > EDIT_OPTIONS[self.edit_action]: self.edit_y_place = 0
+
+    def teleport_to(self, pos):
+        self.x = pos[0]
+        self.y = pos[1]
+
+def edit_anchor(g, obj): # where an object was placed, a region holds the object when this is in it
+    if isinstance(obj, CameraLine) or isinstance(obj, MovingCollisionRect):
+        return obj.start_pos
+    if isinstance(obj, Flag): # stands on the bottom of the cell it was placed in
+        return obj.x, obj.y - g.camera.grid_size
+    return obj.x, obj.y
+
+def move_object(obj, dx, dy, exits=()): # exits: where the pipes moved along with it come out
+    if isinstance(obj, CameraLine):
+        obj.start_pos = (obj.start_pos[0] + dx, obj.start_pos[1] + dy)
+        obj.end_pos = (obj.end_pos[0] + dx, obj.end_pos[1] + dy)
+        return
+    obj.x += dx
+    obj.y += dy
+    if isinstance(obj, MovingCollisionRect):
+        obj.start_pos = (obj.start_pos[0] + dx, obj.start_pos[1] + dy)
+        obj.end_pos = (obj.end_pos[0] + dx, obj.end_pos[1] + dy)
+    elif isinstance(obj, Pipe) and tuple(obj.teleport_pos) in exits: # the pipe it leads to moves too, otherwise it still leads there
+        obj.teleport_pos = (obj.teleport_pos[0] + dx, obj.teleport_pos[1] + dy)
+
+class EditSelection: # a region of the level picked in edit mode, and what was last copied out of one
+    def __init__(self):
+        self.region = None # x, y, width, height, on the grid
+        self.clipboard = None # pickled objects
+        self.clipboard_region = None # the region they were copied from
+
+    def objects(self, g):
+        x, y, width, height = self.region
+        found = []
+        for category in EDIT_REGION_CATEGORIES:
+            for obj in g.objects[category]:
+                ox, oy = edit_anchor(g, obj)
+                if x <= ox < x + width and y <= oy < y + height:
+                    found.append(obj)
+        return found
+
+    def copies(self, data, dx, dy): # fresh objects from pickled ones, moved by dx,dy
+        objs = LevelUnpickler(io.BytesIO(data)).load()
+        exits = {(obj.x + obj.width/2, obj.y) for obj in objs if isinstance(obj, Pipe)} # a pipe's teleport_pos is the top of its partner
+        for obj in objs:
+            move_object(obj, dx, dy, exits)
+        return objs
+
+    def command(self, g, key): # a key pressed with ctrl in edit mode
+        if key == pygame.K_v and self.clipboard != None:
+            self.paste(g, g.camera.grid_position(g))
+        elif self.region == None:
+            return
+        elif key == pygame.K_c:
+            self.copy(g)
+        elif key == pygame.K_x:
+            self.copy(g)
+            self.delete(g)
+        elif key == pygame.K_m:
+            self.move(g, g.camera.grid_position(g))
+        elif key == pygame.K_f:
+            self.fill(g, g.camera.options[EDIT_SELECT][EDIT_SELECT_FILL] % 3)
+
+    def copy(self, g):
+        objs = self.objects(g)
+        self.clipboard = pickle.dumps(objs, pickle.HIGHEST_PROTOCOL)
+        self.clipboard_region = self.region
+        print("copied " + str(len(objs)) + " objects")
+
+    def delete(self, g):
+        if self.region != None:
+            g.bulk_update([], self.objects(g))
+
+    def paste(self, g, pos): # the corner of the copied region goes to pos, the pasted objects are selected then
+        x, y, width, height = self.clipboard_region
+        g.bulk_update(self.copies(self.clipboard, pos[0] - x, pos[1] - y), [])
+        self.region = (pos[0], pos[1], width, height)
+
+    def move(self, g, pos): # moved copies replace the objects, so everything that indexes them sees one change
+        x, y, width, height = self.region
+        objs = self.objects(g)
+        g.bulk_update(self.copies(pickle.dumps(objs, pickle.HIGHEST_PROTOCOL), pos[0] - x, pos[1] - y), objs)
+        self.region = (pos[0], pos[1], width, height)
+
+    def fill(self, g, kind):
+        x, y, width, height = self.region
+        size = g.camera.grid_size
+        if kind == EDIT_FILL_RECT:
+            objs = [CollisionRect(x, y, width, height)]
+        else:
+            cells = [(x + i*size, y + j*size) for j in range(int(height // size)) for i in range(int(width // size))]
+            if kind == EDIT_FILL_BLOCKS:
+                objs = [CollisionRect(cx, cy, size, size) for cx, cy in cells]
+            else:
+                objs = [Coin(g, cx, cy) for cx, cy in cells]
+        g.bulk_update(objs, [])
+
+    def draw(self, g):
+        if self.region != None:
+            x, y = g.camera.translate_position(self.region[0], self.region[1])
+            pygame.draw.rect(g.screen, (0,120,255), (int(x), int(y), int(self.region[2]), int(self.region[3])), 2)
+
+class CameraLine:
+    def __init__(self, start_pos, end_pos): # cl_type = camera line type
+        self.start_pos = start_pos
+        self.end_pos = end_pos
+    def draw(self, g):
+        x1, y1 = g.camera.translate_position(self.start_pos[0], self.start_pos[1])
+        x2, y2 = g.camera.translate_position(self.end_pos[0], self.end_pos[1])
+        pygame.draw.line(g.screen, (255,0,0), (int(x1),int(y1)), (int(x2),int(y2)), 3)
+
+class InteractiveObject:
+    collides_with_rects = True # false for things that fly through everything
+    landed_while_moving = False # set by swept movement, read by interact_with_collision_rects
+    def __init__(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.y_vel = 0
+        self.x_vel = 0
+        self.stood_on_ground_previous_frame = False
+    def closest_side_of_rect(self, r): # requires x,y,width,height
+        left_x_dif = abs((self.x)-(r.x-self.width))
+        right_x_dif = abs((self.x)-(r.x+r.width))
+        up_y_dif = abs((self.y)-(r.y-self.height))
+        down_y_dif = abs((self.y)-(r.y+r.height))
+
+        if up_y_dif < down_y_dif: # closest to up
+            if right_x_dif < left_x_dif:
+                if up_y_dif < right_x_dif:
+                    return SIDE_UP
+                else:
+                    return SIDE_RIGHT
+            else:
+                if up_y_dif < left_x_dif:
+                    return SIDE_UP
+                else:
+                    return SIDE_LEFT
+        else: 
+            if right_x_dif < left_x_dif: # closest to down
+                if down_y_dif < right_x_dif:
+                    return SIDE_DOWN
+                else:
+                    return SIDE_RIGHT
+            else:
+                if down_y_dif < left_x_dif:
+                    return SIDE_DOWN
+                else:
+                    return SIDE_LEFT
+    def handle_moving_like_physical_object(self, r, collide_part):
+        if collide_part == SIDE_UP:
+            self.y = r.y - self.height
+            self.y_vel = min(0, self.y_vel)
+            self.stood_on_ground_previous_frame = True
+            if type(r) == MovingCollisionRect:
+                self.x_vel += r.x_vel
+                self.y_vel += max(0, r.y_vel)
+        elif collide_part == SIDE_DOWN:
+            self.y = r.y + r.height
+            self.y_vel = max(0, self.y_vel)   
+        elif collide_part == SIDE_RIGHT:
+            self.x = r.x + r.width
+            self.x_vel = max(0, self.x_vel)
+        elif collide_part == SIDE_LEFT:
+            self.x = r.x - self.width
+            self.x_vel = min(0, self.x_vel)
+    def move_by(self, g, dx, dy):
+        if g.collision_mode == COLLISION_SWEPT and self.collides_with_rects:
+            self.sweep(g, dx, dy)
+        else:
+            self.x += dx
+            self.y += dy
+    def sweep(self, g, dx, dy): # moves until the first rect in the way, then slides along it
+        index = g.collision_index
+        for _ in range(3): # a corner can stop it twice
+            if dx == 0 and dy == 0:
+                break
+            hit, hit_time, hit_side = None, 1, None
+            for i in index.swept_candidates(self, dx, dy):
+                r = index.objects[i]
+                t, side = self.time_of_impact(r, dx, dy)
+                if t != None and (t < hit_time or (t == hit_time and (side == SIDE_UP or side == SIDE_DOWN))):
+                    hit, hit_time, hit_side = r, t, side
+            if hit == None:
+                self.x += dx
+                self.y += dy
+                break
+            self.x += dx * hit_time
+            self.y += dy * hit_time
+            self.collide_rect_handle_before(hit, hit_side, g)
+            self.handle_moving_like_physical_object(hit, hit_side)
+            if hit_side == SIDE_UP:
+                self.landed_while_moving = True
+            if hit_side == SIDE_UP or hit_side == SIDE_DOWN:
+                dx, dy = dx * (1 - hit_time), 0
+            else:
+                dx, dy = 0, dy * (1 - hit_time)
+    def time_of_impact(self, r, dx, dy): # fraction of dx,dy until touching r, and which side of r. None if it doesn't
+        if dx > 0:
+            x_entry, x_exit = (r.x - (self.x+self.width))/dx, (r.x+r.width - self.x)/dx
+        elif dx < 0:
+            x_entry, x_exit = (r.x+r.width - self.x)/dx, (r.x - (self.x+self.width))/dx
+        elif self.x+self.width > r.x and self.x < r.x+r.width:
+            x_entry, x_exit = -math.inf, math.inf
+        else:
+            return None, None
+        if dy > 0:
+            y_entry, y_exit = (r.y - (self.y+self.height))/dy, (r.y+r.height - self.y)/dy
+        elif dy < 0:
+            y_entry, y_exit = (r.y+r.height - self.y)/dy, (r.y - (self.y+self.height))/dy
+        elif self.y+self.height > r.y and self.y < r.y+r.height:
+            y_entry, y_exit = -math.inf, math.inf
+        else:
+            return None, None
+        entry = max(x_entry, y_entry)
+        if entry < 0 or entry >= 1 or entry > min(x_exit, y_exit): # already inside is left to interact_with_collision_rects
+            return None, None
+        if x_entry > y_entry:
+            return entry, SIDE_LEFT if dx > 0 else SIDE_RIGHT
+        return entry, SIDE_UP if dy > 0 else SIDE_DOWN
+    def interact_with_collision_rects(self, g):
+        self.stood_on_ground_previous_frame = self.landed_while_moving
+        self.landed_while_moving = False
+
+        # VERB: correct placement, if it's illegal
+        index = g.collision_index
+        for i in index.candidates(self): # rect = r
+            r = index.objects[i]
+            if General.rects_collide(self,r):
+                collide_part = self.closest_side_of_rect(r)
+                self.collide_rect_handle_before(r, collide_part, g)
+                self.handle_moving_like_physical_object(r, collide_part)
+                
+    def collide_rect_handle_before(self, r, collide_part, g):
+        pass
+    def got_jumped_on(self, g):
+        for _ in range(g.quality.particle_count(random.randint(10,30))):
+            g.objects_to_add.append(Particle(self.x,self.y,self.width,self.height, self.color))
+        g.objects_to_remove.append(self)
+
+class Player(InteractiveObject):
+    def __init__(self):
+        super().__init__(0, 0, PLAYER_WIDTH, PLAYER_SMALL_HEIGHT)
+
+        self.jump_mode = False
+        self.jump_time = PLAYER_JUMP_TIME
+        self.jump_timer = self.jump_time
+
+        self.climb_mode = False
+
+        self.big = False # you get big when you eat a mushroom
+
+        self.invincibility_timer = 0
+        self.invincibility_time = 1500
+
+        self.respawn_point = (0,0)
+
+        self.pipe_player_is_on = None
+
+        self.color = (255,255,255)
+        self.visible = True
+
+        self.coins = 0
+
+    def set_position_to(self, x, y):
+        self.x = x
+        self.y = y
+        self.x_vel = 0
+        self.y_vel = 0
+        self.jump_mode = False
+
+    def logic(self, g):
+        # move according to player input and physics
+
+        pressed_keys = g.pressed_keys()
+        # interact with climbable rects
+        if self.climb_mode:
+            if self.allowed_to_climb(g):
+                # climb
+                speed = PLAYER_CLIMB_SPEED
+                self.y_vel = 0
+                if pressed_keys[pygame.K_RIGHT] or pressed_keys[pygame.K_d]:
+                    self.x_vel = speed
+                if pressed_keys[pygame.K_LEFT] or pressed_keys[pygame.K_a]:
+                    self.x_vel = -speed
+                if pressed_keys[pygame.K_UP] or pressed_keys[pygame.K_w]:
+                    self.y_vel = -speed
+                if pressed_keys[pygame.K_DOWN] or pressed_keys[pygame.K_s]:
+                    self.y_vel = speed
+            else:
+                self.climb_mode = False
+        else:
+            speed = PLAYER_SPEED # move regularly
+        
+            if pressed_keys[pygame.K_RIGHT] or pressed_keys[pygame.K_d]:
+                self.x_vel += speed
+            if pressed_keys[pygame.K_LEFT] or pressed_keys[pygame.K_a]:
+                self.x_vel -= speed
+
+            # possibly climb
+            if g.up_pressed_this_frame and self.allowed_to_climb(g):
+                self.climb_mode = True
+                self.jump_mode = False
+
+        # jump stuff
+        if self.jump_mode:
+            self.jump_timer += g.frame_time
+            if self.jump_timer >= self.jump_time or not pressed_keys[pygame.K_SPACE]:
+                self.jump_mode = False
+                self.jump_timer = self.jump_time
+        if (True if self.climb_mode else self.stood_on_ground_previous_frame) and g.space_pressed_this_frame:
+            self.y_vel = PLAYER_JUMP_VELOCITY
+            self.jump_mode = True
+            self.jump_timer = 0
+            self.climb_mode = False
+
+        if not self.climb_mode:
+            gravity = PLAYER_GRAVITY
+            if self.jump_mode:
+                self.y_vel += pow(self.jump_timer/self.jump_time,1)*gravity
+            else:
+                self.y_vel += gravity
+
+        dx = self.x_vel * g.frame_time
+        self.x_vel = 0
+        self.move_by(g, dx, self.y_vel * g.frame_time)
+        
+        self.interact_with_collision_rects(g)
+
+        # die from being bad stuff
+        if self.y_vel > PLAYER_DEADLY_FALL_VELOCITY:
+            self.die(g)
+
+        # invincibility stuff
+        if self.invincibility_timer > 0:
+            self.invincibility_timer -= g.frame_time
+            self.invincibility_timer = max(0, self.invincibility_timer)
+
+        # interact with enemies
+        for e in g.enemies:
+            if General.rects_collide(self, e):
+                if e.can_be_jumped_on:
+                    # check who attacks who
+                    if General.rect_overlaps(self, e.x, e.y+e.height/2, e.width, e.height/2):
+                        # player touched bottom half => player dies
+                        self.get_hit(g)
+                    else:
+                        # player is on top => enemy dies
+                        self.y_vel = PLAYER_STOMP_VELOCITY
+                        self.jump_mode = True
+                        self.jump_timer = 0.2*self.jump_time
+                        self.climb_mode = False
+                        e.got_jumped_on(g) # removes enemy from array
+                else:
+                    self.get_hit(g) # without recourse
+                break
+        # interact with mushrooms
+        for m in g.mushrooms:
+            if General.rects_collide(self, m):
+                self.eat_mushroom(g, m)
+
+        # interact with pipes
+        if g.down_pressed_this_frame:
+            if self.pipe_player_is_on != None:
+                g.track(TELEMETRY_PIPE, self.x + self.width/2, self.y + self.height)
+                g.game_stopping_animation = GameStoppingAnimationPlayerInPipe(g, self.pipe_player_is_on.teleport_pos)
+        self.pipe_player_is_on = None # reset
+
+        # interact with coins
+        for coin in g.coins:
+            if General.circle_in_rect(coin.x, coin.y, coin.radius, self):
+                # collect coin
+                coin.got_picked_up(g) # increases coins and kills coin
+        
+        # interact with flags
+        for flag in g.flags:
+            if General.rect_overlaps(self, flag.x, flag.y-flag.length, 0, flag.length):
+                flag.get_raised(g)
+                if type(flag) == RespawnFlag:
+                    self.respawn_point = (flag.x - 0.01,flag.y-self.height)
+                if type(flag) == WinFlag:
+                    pass
+
+    def allowed_to_climb(self, g):
+        for r in g.climbing_rects:
+            if General.rects_collide(self,r):
+                return True
+        return False
+
+    def collide_rect_handle_before(self, r, collide_part, g):
+        if collide_part == SIDE_DOWN:
+            if self.y_vel < 0: # It only gets hit when jumped at from below, not above
+                r.got_hit(g)
+            self.jump_mode = False
+        if collide_part == SIDE_UP:
+            if hasattr(r, "teleport_pos") and self.x > r.x and self.x+self.width < r.x+r.width: # pipes, and the proxies of shared ones
+                self.pipe_player_is_on = r
+
+    def get_hit(self, g):
+        if self.invincibility_timer == 0:
+            if self.big:
+                g.track(TELEMETRY_HIT, self.x + self.width/2, self.y + self.height/2)
+                self.big = False
+                self.invincibility_timer = self.invincibility_time
+                g.game_stopping_animation = GameStoppingAnimation(GS_ANIMATION_PLAYER_GET_SMALLER)
+            else:
+                # die
+                self.die(g)
+
+    def die(self, g):
+        print("die")
+        g.track(TELEMETRY_DEATH, self.x + self.width/2, self.y + self.height/2)
+        g.game_stopping_animation = GameStoppingAnimation(GS_ANIMATION_PLAYER_DIES)
+
+    def respawn(self, g):
+        self.coins = 0
+        g.load_saved_object_state()
+        self.set_position_to(self.respawn_point[0], self.respawn_point[1])
+
+    def eat_mushroom(self, g, m): # m = mushroom
+        g.track(TELEMETRY_MUSHROOM, m.x + m.width/2, m.y + m.height/2)
+        if not self.big:
+            self.big = True
+            g.game_stopping_animation = GameStoppingAnimation(GS_ANIMATION_PLAYER_GET_BIGGER)
+        g.objects_to_remove.append(m)
+
+    def draw(self, g):
+        if self.visible:
+            x, y = g.camera.translate_position(self.x, self.y)
+            if self.invincibility_timer == 0 or self.invincibility_timer % 2 == 0:
+                pygame.draw.rect(g.screen, (0,0,0), (int(x),int(y),int(self.width),int(self.height)), 1)
+
+    def add_sprites(self, g, blits):
+        if self.visible:
+            x, y = g.camera.translate_position(self.x, self.y)
+            if self.invincibility_timer == 0 or self.invincibility_timer % 2 == 0:
+                blits.append((g.sprite_cache.frame(int(self.width), int(self.height), (0,0,0), 1), (int(x),int(y))))
+
+class SelfSovereignBeing(InteractiveObject): # moves around freely, turns at walls, possibly turns at edges
+    def __init__(self, x, y, width, height, x_speed, y_speed, turns_around_at_edges=False, color=(50,50,255), can_be_jumped_on=False):
+        super().__init__(x, y, width, height)
+
+        self.x_speed = x_speed
+        self.y_speed = y_speed
+        self.color = color
+
+        self.x_dir = -1
+        self.turn_around_at_edges = turns_around_at_edges
+        self.turn_around = False
+
+        self.turned_on = False
+
+        self.can_be_jumped_on = can_be_jumped_on
+
+    def logic(self, g):
+        if self.turned_on:
+            if not g.quality.simulates_offscreen() and not General.rect_overlaps(self, *g.quality.simulated_rect(g)):
+                return
+            self.logic_movement(g)
+            self.logic_interacting(g)
+        else:
+            if General.rect_overlaps(self, g.camera.x, g.camera.y, g.width, g.height):
+                self.turned_on = True
+        
+    def logic_movement(self, g):
+        self.x_vel += self.x_dir * self.x_speed
+        dx = self.x_vel * g.frame_time
+        self.x_vel = 0
+
+        self.y_vel += self.y_speed
+        self.move_by(g, dx, self.y_vel * g.frame_time)
+
+    def logic_interacting(self, g):
+        self.interact_with_collision_rects(g)
+        if self.turn_around:
+            self.x_dir *= -1
+            self.turn_around = False
+
+    def collide_rect_handle_before(self, r, collide_part, g):
+        if collide_part == SIDE_UP:
+            # turn around at edges
+            if self.turn_around_at_edges:
+                if (self.x < r.x and self.x_dir < 0) or (self.x+self.width > r.x+r.width and self.x_dir > 0):
+                    self.turn_around = True
+        elif collide_part == SIDE_RIGHT:
+            self.turn_around = True
+        elif collide_part == SIDE_LEFT:
+            self.turn_around = True
+    
+    def remove_self_if_under_camera(self, g):
+        x, y = g.camera.translate_position(self.x, self.y)
+        if y > g.height: #or x > g.width or x < 0:
+            # remove
+            g.objects_to_remove.append(self)
+
+    def draw(self, g):
+        x, y = g.camera.translate_position(self.x, self.y)
+        pygame.draw.rect(g.screen, self.color, (int(x),int(y),self.width,self.height))
+
+    def add_sprites(self, g, blits):
+        x, y = g.camera.translate_position(self.x, self.y)
+        blits.append((g.sprite_cache.rect(int(self.width), int(self.height), self.color), (int(x),int(y))))
+
+class WalkEnemy(SelfSovereignBeing):
+    def __init__(self, x, y, turns_around_at_edges=False):
+        super().__init__(x, y, 25, 30, 0.1, 0.005, turns_around_at_edges, (50,50,255), True)
+
+class JumpEnemy(SelfSovereignBeing):
+    jump_velocity = -0.5
+    def __init__(self, x, y, walks_on_ground=True, walks_in_air=True):
+        super().__init__(x, y, 25, 40, 0.1, 0.01, True, (50,100,255), True)
+
+        self.wait_timer = 0
+        self.wait_time = 750 # time to wait on ground til next jump
+        self.walks_on_ground = walks_on_ground
+        self.walks_in_air = walks_in_air
+
     def logic_movement(self, g):
         should_walk = False
-        if self.stood_on_ground_previous_frame:
-            if self.walks_on_ground:
-                should_walk = True
-
-            self.wait_timer += g.frame_time
-            if self.wait_timer >= self.wait_time:
-                # jump
-                self.y_vel = -0.5
-                self.wait_timer = 0
-        elif self.walks_in_air:
-            should_walk = True
-
-        if should_walk:
-            self.x_vel += self.x_dir * self.x_speed
-            self.x += self.x_vel * g.frame_time
-            self.x_vel = 0
-
-        self.y_vel += self.y_speed
-        self.y += self.y_vel * g.frame_time
-class JumpThrowEnemy(SelfSovereignBeing): # Throws axes
-    def __init__(self, x, y):
-        super().__init__(x, y, 20, 30, 0.075, 0.01, True, (0,255,255), True)
-        self.mode = 0
-        self.timer = 0
-        self.time = 1000
-        self.has_thrown = False
-
-    def logic_movement(self, g):
-        self.timer += g.frame_time
-        if self.mode == 0: # walk around
-
-            if random.uniform(0,1) < 0.0005 * g.frame_time:
-                self.x_dir *= -1
-            
-            if self.timer > self.time:
-                self.mode = 1
-                self.timer = 0
-                self.y_vel -= 0.3
-        elif self.mode == 1: # jump and throw
-            if self.y_vel > 0 and not self.has_thrown:
-                # throw
-                g.objects_to_add.append(Axe(self.x+self.width/2,self.y, g.player.x-self.x))
-                self.has_thrown = True
-            if self.stood_on_ground_previous_frame:
-                self.mode = 0
-                self.timer = 0
-                self.has_thrown = False
-        self.x_vel += self.x_dir * self.x_speed * (0 if self.mode == 1 else 1)
-        self.x += self.x_vel * g.frame_time
-        self.x_vel = 0
-
-        self.y_vel += self.y_speed
-        self.y += self.y_vel * g.frame_time
-class FlyingEnemy(SelfSovereignBeing):
-    def __init__(self, x, y, speed, f_range, throws):
-        super().__init__(x, y, 25,35, 0, 0, False, (100,0,200),True)
-        self.timer = 0
-        self.speed = (1 + speed)
-        self.range = (1 + f_range)
-        self.throws = throws
-        if throws:
-            self.throw_time = 2000
-            self.throw_timer = 0
-
-    def logic_movement(self, g): # flying logic
-        self.timer += g.frame_time
-        self.y_vel = math.cos((self.speed*self.timer)/1000) * self.range
-        self.y += self.y_vel
-        self.x += self.x_vel
-        self.x_vel = 0
-
-        if self.throws: # throw logic
-            self.throw_timer += g.frame_time
-            if self.throw_timer > self.throw_time:
-                self.throw_timer = 0
-                g.objects_to_add.append(Axe(self.x+self.width/2,self.y, g.player.x-self.x))
-
-class Axe(SelfSovereignBeing):
-    def __init__(self, x, y, x_distance_to_player):
-        max_x_speed = 0.5
-        x_speed = max(-max_x_speed, min(max_x_speed, -x_distance_to_player/700))
-        super().__init__(x, y, 15, 15, x_speed, 0.01, False, (255,100,0), False)
-        self.y_vel = -0.1
-
-    def logic(self, g):
-        self.logic_movement(g)
-        self.remove_self_if_under_camera(g)
-
-class Mushroom(SelfSovereignBeing):
-    def __init__(self, x, y):
-        super().__init__(x, y, MUSHROOM_WIDTH, MUSHROOM_HEIGHT, 0.11, 0.01, False, MUSHROOM_COLOR) # walks of edges
-        self.x_dir = 1
-    def logic(self, g):
-        super().logic(g)
-        self.remove_self_if_under_camera(g)
-
-class CollisionRect:
-    def __init__(self, x, y, width, height, color=(50,50,50)):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.color = color
-    def logic(self, g):
-        pass
-    def got_hit(self, g): # played jumped up into self
-        print("bruh")
-    def draw(self, g):
-        x, y = g.camera.translate_position(self.x, self.y)
-        pygame.draw.rect(g.screen, self.color, (int(x),int(y),int(self.width),int(self.height)))
-        pygame.draw.rect(g.screen, (0,0,0), (int(x),int(y),int(self.width),int(self.height)),1)
-class Cloud:
-    def __init__(self, g):
-        self.x = g.camera.x + g.width * random.uniform(1,1.25)
-        self.y = g.camera.y + g.height * random.uniform(-0.25,1.25)
-        self.width = g.width * random.uniform(0.2, 0.8)
-        self.height = g.height * random.uniform(0.2, 0.5)
-        self.x_vel = -random.uniform(0.1,0.2)
-        self.y_vel = random.uniform(-0.01,0.01)
-        self.color = (127,127,127)
-    def logic(self, g):
-        self.x += self.x_vel * g.frame_time
-        self.y += self.y_vel * g.frame_time
-        if self.x + g.width < g.camera.x:
-            g.objects_to_remove.append(self)
-    def draw(self, g):
-        x, y = g.camera.translate_position(self.x, self.y)
-
-        s = pygame.Surface((int(self.width),int(self.height)))
-        s.set_alpha(50)
-        s.fill(self.color)
-        g.screen.blit(s, (int(x),int(y)))
-class Pipe(CollisionRect):
-    def __init__(self, x, y, width, height, color_value, teleport_pos):
-        color = (0,0,0)
-        if color_value == 0: color = (0,0,255)
-        elif color_value == 1: color = (0,255,0)
-        elif color_value == 2: color = (255,0,0)
-        else: color == (255,255,0)
-        super().__init__(x, y, width, height, color)
-
-        self.teleport_pos = teleport_pos
-
-    def draw(self, g):
-        x, y = g.camera.translate_position(self.x, self.y)
-        pygame.draw.rect(g.screen, self.color, (int(x),int(y),int(self.width),int(self.height)))
-        pygame.draw.rect(g.screen, (0,0,0), (int(x),int(y),int(self.width),int(self.height)),1)
-
-        y_ = int(y+g.camera.grid_size*0.75)
-        pygame.draw.line(g.screen, (0,0,0), (int(x), y_),(int(x+self.width),y_), 2)
-
-class ClimbingRect(CollisionRect):
-    def __init__(self, x, y, width, height):
-        super().__init__(x, y, width, height, (20,150,20))
-
-    def draw(self, g):
-        x, y = g.camera.translate_position(self.x, self.y)
-
-        s = pygame.Surface((int(self.width),int(self.height)))
-        s.set_alpha(100)
-        s.fill(self.color)
-        g.screen.blit(s, (int(x),int(y)))    
-
-
-class MovingCollisionRect(CollisionRect):
-    def __init__(self, start_pos, end_pos, width, height, speed=0.1, color=(50,100,100)):
-        super().__init__(start_pos[0],start_pos[1],width,height,color)
-        self.start_pos = start_pos
-        self.end_pos = end_pos
-
-        self.x_distance = self.end_pos[0] - self.start_pos[0]
-        self.y_distance = self.end_pos[1] - self.start_pos[1]
-        self.distance = math.sqrt(self.x_distance*self.x_distance + self.y_distance*self.y_distance)
-        self.x_normalized = self.x_distance/self.distance
-        self.y_normalized = self.y_distance/self.distance
-
-        self.speed = speed
-        self.x_vel = 0
-        self.y_vel = 0
-
-        self.way = 1 # 1 == to end, -1 == to start
-
-    def logic(self, g):
-        self.x_vel = self.x_normalized * self.speed * self.way 
-        self.y_vel = self.y_normalized * self.speed * self.way 
-        self.x += self.x_vel * g.frame_time
-        self.y += self.y_vel * g.frame_time
-
-        # is x or y more than it should
-        pos = self.end_pos if self.way == 1 else self.start_pos
-        x_dif = pos[0] - self.x
-        x_sign = 1 if self.x_distance > 0 else -1
-        
-        y_dif = pos[1] - self.y
-        y_sign = 1 if self.y_distance > 0 else -1
-        if x_dif * x_sign * self.way <= 0 and y_dif * y_sign * self.way <= 0:
-            # over
-            self.way *= -1
-class ItemizedCollisionRect(CollisionRect):
-    def __init__(self, x, y, width, height):
-        super().__init__(x, y, width, height, (255,255,0))
-        self.items = 1
-    def got_hit(self, g):
-        if self.items > 0 :
-            print("ITEM GOT")
-            g.objects_to_add.append(AnimationMushroom((self.x+self.width/2-MUSHROOM_WIDTH/2,self.y),MUSHROOM_WIDTH, MUSHROOM_HEIGHT, MUSHROOM_COLOR))
-            self.items -= 1
-            if self.items == 0:
-                self.color = (189, 113, 28)
-
-class AnimationMushroom(MovingCollisionRect):
-    def __init__(self, start_pos, width, height, color):
-        end_pos = (start_pos[0], start_pos[1] - height)
-
-        super().__init__(start_pos,end_pos,width,height,0.025,color)
-    def logic(self, g):
-        super().logic(g)
-        if self.way == -1: # done
-            g.objects_to_remove.append(self)
-            g.objects_to_add.append(Mushroom(self.x,self.y))
-
-ANIMATION_PLAYER_PIPE_IN, ANIMATION_PLAYER_PIPE_OUT = range(2)
-class AnimationPlayerInPipe(MovingCollisionRect): # in game.objects.animations, also in GameStoppingAnimationPlayerInPipe.animation
-    def __init__(self, start_pos, player, a_type): # a_type == animation_type
-        end_pos = (start_pos[0], start_pos[1] + player.height)
-        if a_type == ANIMATION_PLAYER_PIPE_OUT:
-            start_pos, end_pos = end_pos, start_pos
-
-        super().__init__(start_pos,end_pos,player.width,player.height,0.025,player.color)
-        self.alive = True
-    def logic(self, g):
-        if self.alive:
-            super().logic(g)
-            if self.way == -1: # done
-                g.objects_to_remove.append(self)
-                self.alive = False
-
-GS_ANIMATION_PLAYER_GET_SMALLER, GS_ANIMATION_PLAYER_GET_BIGGER, GS_ANIMATION_PLAYER_DIES = range(3)
-class GameStoppingAnimation:
-    def __init__(self, animation):
-        self.animation = animation
-        self.timer = 0
-    def logic(self, g):
-        
-        if self.animation == GS_ANIMATION_PLAYER_GET_BIGGER:
-            increase = 0.03 * g.frame_time
-            g.player.height += increase
-            g.player.y -= increase
-            if g.player.height >= PLAYER_BIG_HEIGHT:
-                g.player.height = PLAYER_BIG_HEIGHT
-                g.game_stopping_animation = None
-
-        elif self.animation == GS_ANIMATION_PLAYER_GET_SMALLER:
-            decrease = 0.03 * g.frame_time
-            g.player.height -= decrease
-            g.player.y += decrease
-            if g.player.height <= PLAYER_SMALL_HEIGHT:
-                g.player.height = PLAYER_SMALL_HEIGHT
-                g.game_stopping_animation = None
-
-        elif self.animation == GS_ANIMATION_PLAYER_DIES:
-            for obj in g.particles:
-                obj.logic(g)
-            if self.timer == 0: # create particles
-                for _ in range(100):
-                    g.objects_to_add.append(Particle(g.player.x,g.player.y,PLAYER_WIDTH,PLAYER_SMALL_HEIGHT,(0,0,0),1))
-                g.player.visible = False
-            if self.timer > 1000:
-                g.player.set_position_to(g.player.respawn_point[0], g.player.respawn_point[1])
-                g.camera.play_logic(g)
-            if self.timer > 2000:
-                g.player.visible = True
-                g.player.respawn(g)
-                g.game_stopping_animation = None
-            
-        else:
-            print("ERROR, no such animation")
-
-        self.timer += g.frame_time
-class GameStoppingAnimationPlayerInPipe:
-    def __init__(self, g, teleport_pos):
-        self.timer = 0
-        self.teleport_pos = teleport_pos
-        self.mode = 0 # 0 == into pipe, 1 == out of pipe
-        g.objects_to_add.append(AnimationPlayerInPipe((g.player.x,g.player.y),g.player, ANIMATION_PLAYER_PIPE_IN))
-        self.animation = g.objects_to_add[-1]
-        g.player.visible = False
-
-    def logic(self, g):
-        if self.mode == 0:
-            self.animation.logic(g)
-
-            if self.timer > 1000:
-                self.mode = 1
-                g.camera.teleport_to((self.teleport_pos[0]-g.width/2,self.teleport_pos[1]-g.height/2))
-                g.objects_to_add.append(AnimationPlayerInPipe((self.teleport_pos[0]-g.player.width/2,self.teleport_pos[1]-g.player.height), g.player, ANIMATION_PLAYER_PIPE_OUT))
-                self.animation = g.objects_to_add[-1]
-                
-                self.timer = 0
-
-        elif self.mode == 1:
-            self.animation.logic(g)
-            if self.timer > 1000:
-                g.player.x = self.animation.x
-                g.player.y = self.animation.y
-                g.player.visible = True
-                g.game_stopping_animation = None
-
-        self.timer += g.frame_time
-class GameStoppingAnimationPlayerWinsLevel:
-    def __init__(self, g):
-        self.timer = 0
-    def logic(self, g):
-
-        for obj in g.flags + g.particles:
-            obj.logic(g)
-        g.player.logic(g)
-        self.timer += g.frame_time
-        if self.timer > 6000:
-            # next level
-            g.load_new_level(1)
-            
-
-class Particle(SelfSovereignBeing):
-    def __init__(self, x, y, width, height, color=(0,0,0), thickness=1):
-        
-        width = random.randint(int(width*0.5), int(width*0.75))
-        height = random.randint(int(height*0.5), int(height*0.75))
-
-        speed = random.uniform(0.2,1)
-        angle = random.uniform(0, 2*math.pi)
-        x_speed = math.cos(angle) * speed
-        
-        super().__init__(x, y, width, height, x_speed, 0.01, False, color, False)
-
-        self.y_vel = math.sin(angle) * speed
-        self.thickness = thickness
-
-    def logic(self, g):
-        self.logic_movement(g)
-        self.remove_self_if_under_camera(g)
-        
-    def draw(self, g):
-        x, y = g.camera.translate_position(self.x, self.y)
-        pygame.draw.rect(g.screen, self.color, (int(x),int(y),int(self.width),int(self.height)), self.thickness)
-class Coin:
-    def __init__(self, g, x, y):
-        self.x = x + g.camera.grid_size/2
-        self.y = y + g.camera.grid_size/2
-        self.radius = int(g.camera.grid_size/2)
-        self.color = (255,255,51)
-    def draw(self, g):
-        x, y = g.camera.translate_position(self.x, self.y)
-        pygame.draw.circle(g.screen, self.color, (int(x),int(y)),self.radius)
-        #pygame.draw.circle(g.screen, (200,200,200), (int(x),int(y)), self.radius,1)
-    def got_picked_up(self, g):
-        for _ in range(18):
-            g.objects_to_add.append(Particle(self.x,self.y,self.radius,self.radius,self.color,3))
-        g.objects_to_remove.append(self)
-        g.player.coins += 1
-
-class Flag:
-    def __init__(self, g, x, y, length, flag_width, flag_height):
-        self.x = x
-        self.y = y
-        self.length = length
-
-        self.flag_width = flag_width
-        self.flag_height = flag_height
-        self.flag_raisedness = 0
-        self.flag_raise_velocity = 1
-
-        self.color = (42, 196, 76)
-        
-        self.mode = 0# 0 = not getting raised, 1 = getting raised, 2 = already raised
-    def logic(self, g):
-        if self.mode == 1:
-            self.flag_raisedness += self.flag_raise_velocity*(math.sin(g.frame_time*0.05)+0.01)
-            if self.flag_raisedness >= self.length - self.flag_height:
-                self.mode = 2
-                self.particle_effect(g)
-    def get_raised(self, g):
-        if self.mode == 0:
-            self.mode = 1
-    def particle_effect(self, g):
-        for _ in range(100):
-            g.objects_to_add.append(Particle(self.x,self.y-self.length,1,1,self.color,2))
-    def draw(self, g):
-        x, y  = g.camera.translate_position(self.x, self.y)
-
-        # flag rect
-        y_ = int(y-self.flag_height-self.flag_raisedness)
-        pygame.draw.rect(g.screen, self.color, (int(x),y_,self.flag_width,self.flag_height))
-
-        # flag pole
-        pygame.draw.line(g.screen, (0,0,0), (int(x), int(y)), (int(x),int(y-self.length)), 2)
-class RespawnFlag(Flag): # goes up from x,y to length
-    def __init__(self, g, x, y):
-        super().__init__(g, x, y + g.camera.grid_size, g.camera.grid_size * 2.5, 40, 28)
-class WinFlag(Flag):
-    def __init__(self, g, x, y):
-        super().__init__(g, x, y + g.camera.grid_size, g.camera.grid_size * 7.5, 80, 57)
-    def get_raised(self, g):
-        if self.mode == 0:
-            self.mode = 1
-            g.game_stopping_animation = GameStoppingAnimationPlayerWinsLevel(g)
-    def particle_effect(self, g):
-        for _ in range(200):
-            g.objects_to_add.append(Particle(self.x,self.y-self.length,10,10,self.color,5))
-def main():
-    pygame.init()
-    Game()
-    pygame.quit()
-
-if __name__ == "__main__":
+        if self.stood_on_ground_previous_frame:
+            if self.walks_on_ground:
+                should_walk = True
+
+            self.wait_timer += g.frame_time
+            if self.wait_timer >= self.wait_time:
+                # jump
+                self.y_vel = self.jump_velocity
+                self.wait_timer = 0
+        elif self.walks_in_air:
+            should_walk = True
+
+        dx = 0
+        if should_walk:
+            self.x_vel += self.x_dir * self.x_speed
+            dx = self.x_vel * g.frame_time
+            self.x_vel = 0
+
+        self.y_vel += self.y_speed
+        self.move_by(g, dx, self.y_vel * g.frame_time)
+class JumpThrowEnemy(SelfSovereignBeing): # Throws axes
+    jump_velocity = -0.3
+    def __init__(self, x, y):
+        super().__init__(x, y, 20, 30, 0.075, 0.01, True, (0,255,255), True)
+        self.mode = 0
+        self.timer = 0
+        self.time = 1000
+        self.has_thrown = False
+
+    def logic_movement(self, g):
+        self.timer += g.frame_time
+        if self.mode == 0: # walk around
+
+            if random.uniform(0,1) < 0.0005 * g.frame_time:
+                self.x_dir *= -1
+            
+            if self.timer > self.time:
+                self.mode = 1
+                self.timer = 0
+                self.y_vel += self.jump_velocity
+        elif self.mode == 1: # jump and throw
+            if self.y_vel > 0 and not self.has_thrown:
+                # throw
+                g.objects_to_add.append(Axe(self.x+self.width/2,self.y, g.player.x-self.x))
+                self.has_thrown = True
+            if self.stood_on_ground_previous_frame:
+                self.mode = 0
+                self.timer = 0
+                self.has_thrown = False
+        self.x_vel += self.x_dir * self.x_speed * (0 if self.mode == 1 else 1)
+        dx = self.x_vel * g.frame_time
+        self.x_vel = 0
+
+        self.y_vel += self.y_speed
+        self.move_by(g, dx, self.y_vel * g.frame_time)
+class FlyingEnemy(SelfSovereignBeing):
+    def __init__(self, x, y, speed, f_range, throws):
+        super().__init__(x, y, 25,35, 0, 0, False, (100,0,200),True)
+        self.timer = 0
+        self.speed = (1 + speed)
+        self.range = (1 + f_range)
+        self.throws = throws
+        if throws:
+            self.throw_time = 2000
+            self.throw_timer = 0
+
+    def logic_movement(self, g): # flying logic
+        self.timer += g.frame_time
+        self.y_vel = math.cos((self.speed*self.timer)/1000) * self.range
+        dx = self.x_vel
+        self.x_vel = 0
+        self.move_by(g, dx, self.y_vel)
+
+        if self.throws: # throw logic
+            self.throw_timer += g.frame_time
+            if self.throw_timer > self.throw_time:
+                self.throw_timer = 0
+                g.objects_to_add.append(Axe(self.x+self.width/2,self.y, g.player.x-self.x))
+
+class Axe(SelfSovereignBeing):
+    collides_with_rects = False
+    def __init__(self, x, y, x_distance_to_player):
+        max_x_speed = 0.5
+        x_speed = max(-max_x_speed, min(max_x_speed, -x_distance_to_player/700))
+        super().__init__(x, y, 15, 15, x_speed, 0.01, False, (255,100,0), False)
+        self.y_vel = -0.1
+
+    def logic(self, g):
+        self.logic_movement(g)
+        self.remove_self_if_under_camera(g)
+
+ENEMY_WALK, ENEMY_JUMP, ENEMY_THROW, ENEMY_FLY = range(4)
+class EnemyEngine: # simulates the regular enemies as numpy arrays, grouped by type, instead of one object at a time
+    kinds = {WalkEnemy:ENEMY_WALK, JumpEnemy:ENEMY_JUMP, JumpThrowEnemy:ENEMY_THROW, FlyingEnemy:ENEMY_FLY}
+    # (array, attribute, kinds that have the attribute)
+    fields = [("x","x",None),("y","y",None),("w","width",None),("h","height",None),("x_vel","x_vel",None),("y_vel","y_vel",None),
+              ("x_dir","x_dir",None),("x_speed","x_speed",None),("y_speed","y_speed",None),
+              ("turns","turn_around_at_edges",None),("turned_on","turned_on",None),("stood","stood_on_ground_previous_frame",None),
+              ("timer","wait_timer",(ENEMY_JUMP,)),("period","wait_time",(ENEMY_JUMP,)),
+              ("walks_ground","walks_on_ground",(ENEMY_JUMP,)),("walks_air","walks_in_air",(ENEMY_JUMP,)),
+              ("timer","timer",(ENEMY_THROW,ENEMY_FLY)),("period","time",(ENEMY_THROW,)),
+              ("mode","mode",(ENEMY_THROW,)),("has_thrown","has_thrown",(ENEMY_THROW,)),
+              ("fly_speed","speed",(ENEMY_FLY,)),("fly_range","range",(ENEMY_FLY,)),("throws","throws",(ENEMY_FLY,)),
+              ("throw_timer","throw_timer",(ENEMY_FLY,)),("period","throw_time",(ENEMY_FLY,))]
+    bool_arrays = ("turns","turned_on","stood","walks_ground","walks_air","has_thrown","throws")
+
+    def __init__(self):
+        if load_numpy() == None:
+            raise RuntimeError("the enemy engine needs numpy")
+        self.enemies = None # the list the arrays were built from
+        self.objects = []
+        self.others = [] # enemies without array logic, like axes
+        self.rows = {}
+        self.dirty = True
+        self.rects_dirty = True
+        self.rect_objects = []
+        self.moving = []
+
+    def objects_changed(self, g, added, removed):
+        for obj in removed:
+            category = g.object_mappings[type(obj)]
+            row = self.rows.pop(obj, None)
+            if row != None:
+                self.alive[row] = False
+            elif category == "enemies" and obj in self.others:
+                self.others.remove(obj)
+            elif category == "collision_rects" or category == "pipes":
+                self.rects_dirty = True
+        for obj in added:
+            category = g.object_mappings[type(obj)]
+            if type(obj) in self.kinds:
+                self.dirty = True
+            elif category == "enemies":
+                self.others.append(obj)
+            elif category == "collision_rects" or category == "pipes":
+                self.rects_dirty = True
+        if len(self.rows) < len(self.objects) // 2: # too many dead rows
+            self.dirty = True
+
+    def rebuild(self, g):
+        self.sync_to_objects()
+        self.enemies = g.enemies
+        order = list(self.kinds.values())
+        managed = sorted((e for e in g.enemies if type(e) in self.kinds), key=lambda e: order.index(self.kinds[type(e)]))
+        self.objects = managed
+        self.others = [e for e in g.enemies if type(e) not in self.kinds]
+        self.rows = {obj:i for i, obj in enumerate(managed)}
+        n = len(managed)
+        self.kind = np.array([self.kinds[type(e)] for e in managed], dtype=np.int8)
+        self.slices = {}
+        for k in order:
+            where = np.nonzero(self.kind == k)[0]
+            self.slices[k] = slice(int(where[0]), int(where[-1])+1) if len(where) else slice(0,0)
+        for name in set(f[0] for f in self.fields):
+            setattr(self, name, np.zeros(n, dtype=bool if name in self.bool_arrays else np.float64))
+        self.mode = self.mode.astype(np.int8)
+        for name, attr, kinds in self.fields:
+            array = getattr(self, name)
+            for i, e in enumerate(managed):
+                if kinds == None or self.kinds[type(e)] in kinds:
+                    array[i] = getattr(e, attr, 0) # flying enemies only have throw timers if they throw
+        self.alive = np.ones(n, dtype=bool)
+        self.turn_around = np.zeros(n, dtype=bool)
+        self.dirty = False
+
+    def rebuild_rects(self, g):
+        self.rect_objects = g.collision_rects + g.pipes
+        self.rx, self.ry, self.rw, self.rh = (np.array([getattr(r, a) for r in self.rect_objects], dtype=np.float64) for a in ("x","y","width","height"))
+        self.rvx = np.zeros(len(self.rect_objects))
+        self.rvy = np.zeros(len(self.rect_objects))
+        self.moving = [i for i, r in enumerate(self.rect_objects) if isinstance(r, MovingCollisionRect)]
+        self.moving_index = np.array(self.moving, dtype=np.intp)
+        self.rects_dirty = False
+
+    def sync_to_objects(self): # write all state back, so objects are up to date when the arrays get dropped
+        if self.enemies == None:
+            return
+        for name, attr, kinds in self.fields:
+            values = getattr(self, name).tolist()
+            for i, e in enumerate(self.objects):
+                if kinds == None or self.kinds[type(e)] in kinds:
+                    setattr(e, attr, values[i])
+
+    def logic(self, g):
+        if self.dirty or self.enemies is not g.enemies:
+            self.rebuild(g)
+            self.rects_dirty = True
+        if self.rects_dirty:
+            self.rebuild_rects(g)
+        for i in self.moving:
+            r = self.rect_objects[i]
+            r.update_to(g.level_time)
+            self.rx[i], self.ry[i], self.rvx[i], self.rvy[i] = r.x, r.y, r.x_vel, r.y_vel
+
+        simulated_rect = None if g.quality.simulates_offscreen() else g.quality.simulated_rect(g)
+        throwers = self.step(g.frame_time, (g.camera.x, g.camera.y, g.width, g.height), simulated_rect)
+        for i in throwers.tolist(): # throwing stays with the objects
+            g.objects_to_add.append(Axe(self.x[i]+self.w[i]/2, self.y[i], g.player.x-self.x[i]))
+
+        for e, x, y in zip(self.objects, self.x.tolist(), self.y.tolist()): # others read positions from the objects
+            e.x = x
+            e.y = y
+        for e in self.others:
+            e.logic(g)
+
+    def step(self, frame_time, camera_rect=None, simulated_rect=None): # returns rows of enemies that throw an axe this frame
+        x, y, w, h = self.x, self.y, self.w, self.h
+        if camera_rect == None:
+            self.turned_on[:] = True
+            active = self.alive.copy()
+        else:
+            active = self.turned_on & self.alive
+            cx, cy, cw, ch = camera_rect
+            self.turned_on |= self.alive & (cx+cw > x) & (cx < x+w) & (cy+ch > y) & (cy < y+h)
+        if simulated_rect != None: # the rest stands still
+            sx, sy, sw, sh = simulated_rect
+            active &= (sx+sw > x) & (sx < x+w) & (sy+sh > y) & (sy < y+h)
+        throwers = []
+
+        s = self.slices[ENEMY_WALK]
+        a = active[s]
+        self.x_vel[s] += np.where(a, self.x_dir[s]*self.x_speed[s], 0)
+        x[s] += np.where(a, self.x_vel[s]*frame_time, 0)
+        self.x_vel[s][a] = 0
+        self.y_vel[s] += np.where(a, self.y_speed[s], 0)
+        y[s] += np.where(a, self.y_vel[s]*frame_time, 0)
+
+        s = self.slices[ENEMY_JUMP]
+        a = active[s]
+        stood = self.stood[s] & a
+        walk = a & ((stood & self.walks_ground[s]) | (~stood & self.walks_air[s]))
+        self.timer[s] += np.where(stood, frame_time, 0)
+        jump = stood & (self.timer[s] >= self.period[s])
+        self.y_vel[s][jump] = JumpEnemy.jump_velocity
+        self.timer[s][jump] = 0
+        self.x_vel[s] += np.where(walk, self.x_dir[s]*self.x_speed[s], 0)
+        x[s] += np.where(walk, self.x_vel[s]*frame_time, 0)
+        self.x_vel[s][walk] = 0
+        self.y_vel[s] += np.where(a, self.y_speed[s], 0)
+        y[s] += np.where(a, self.y_vel[s]*frame_time, 0)
+
+        s = self.slices[ENEMY_THROW]
+        a = active[s]
+        if a.any():
+            self.timer[s] += np.where(a, frame_time, 0)
+            walking = a & (self.mode[s] == 0)
+            jumping = a & (self.mode[s] == 1)
+            flip = walking & (np.random.uniform(0, 1, len(a)) < 0.0005 * frame_time)
+            self.x_dir[s][flip] *= -1
+            start_jump = walking & (self.timer[s] > self.period[s])
+            self.mode[s][start_jump] = 1
+            self.timer[s][start_jump] = 0
+            self.y_vel[s][start_jump] += JumpThrowEnemy.jump_velocity
+            throw = jumping & (self.y_vel[s] > 0) & ~self.has_thrown[s]
+            self.has_thrown[s][throw] = True
+            throwers.append(np.nonzero(throw)[0] + s.start)
+            land = jumping & self.stood[s]
+            self.mode[s][land] = 0
+            self.timer[s][land] = 0
+            self.has_thrown[s][land] = False
+            self.x_vel[s] += np.where(a & (self.mode[s] != 1), self.x_dir[s]*self.x_speed[s], 0)
+            x[s] += np.where(a, self.x_vel[s]*frame_time, 0)
+            self.x_vel[s][a] = 0
+            self.y_vel[s] += np.where(a, self.y_speed[s], 0)
+            y[s] += np.where(a, self.y_vel[s]*frame_time, 0)
+
+        s = self.slices[ENEMY_FLY]
+        a = active[s]
+        if a.any():
+            self.timer[s] += np.where(a, frame_time, 0)
+            self.y_vel[s] = np.where(a, np.cos((self.fly_speed[s]*self.timer[s])/1000) * self.fly_range[s], self.y_vel[s])
+            y[s] += np.where(a, self.y_vel[s], 0)
+            x[s] += np.where(a, self.x_vel[s], 0)
+            self.x_vel[s][a] = 0
+            t = a & self.throws[s]
+            self.throw_timer[s] += np.where(t, frame_time, 0)
+            throw = t & (self.throw_timer[s] > self.period[s])
+            self.throw_timer[s][throw] = 0
+            throwers.append(np.nonzero(throw)[0] + s.start)
+
+        self.resolve_collisions(active)
+        turn = active & self.turn_around
+        self.x_dir[turn] *= -1
+        self.turn_around[:] = False
+        return np.concatenate(throwers) if throwers else np.zeros(0, dtype=np.intp)
+
+    def resolve_collisions(self, active):
+        self.stood[active] = False
+        rows = np.nonzero(active)[0]
+        if len(rows) == 0 or len(self.rx) == 0:
+            return
+        # candidates: rects sorted by left edge that can reach over each enemy
+        order = np.argsort(self.rx, kind="stable")
+        left = self.rx[order]
+        lo = np.searchsorted(left, self.x[rows] - self.rw.max(), "right")
+        hi = np.searchsorted(left, self.x[rows] + self.w[rows], "left")
+        counts = np.maximum(hi - lo, 0)
+        pair_row = np.repeat(rows, counts)
+        pair_rect = order[np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(len(pair_row))]
+        hit = self.overlapping(pair_row, pair_rect)
+        pair_row, pair_rect = pair_row[hit], pair_rect[hit]
+        if len(pair_row) == 0:
+            return
+        sort = np.lexsort((pair_rect, pair_row)) # every enemy goes through its rects in level order
+        pair_row, pair_rect = pair_row[sort], pair_rect[sort]
+        index = np.arange(len(pair_row))
+        first = np.concatenate(([True], pair_row[1:] != pair_row[:-1]))
+        rank = index - np.maximum.accumulate(np.where(first, index, 0))
+        for k in range(int(rank.max()) + 1):
+            i, j = pair_row[rank == k], pair_rect[rank == k]
+            if k > 0: # an earlier rect may have pushed it out already
+                still = self.overlapping(i, j)
+                i, j = i[still], j[still]
+            self.apply_contacts(i, j)
+
+    def overlapping(self, i, j):
+        return (self.x[i]+self.w[i] > self.rx[j]) & (self.x[i] < self.rx[j]+self.rw[j]) & \
+               (self.y[i]+self.h[i] > self.ry[j]) & (self.y[i] < self.ry[j]+self.rh[j])
+
+    def apply_contacts(self, i, j): # collide_rect_handle_before and handle_moving_like_physical_object for arrays
+        x, y, w, h = self.x[i], self.y[i], self.w[i], self.h[i]
+        rx, ry, rw, rh = self.rx[j], self.ry[j], self.rw[j], self.rh[j]
+        side = self.closest_sides(x, y, w, h, rx, ry, rw, rh)
+        up, down, left, right = (side == SIDE_UP), (side == SIDE_DOWN), (side == SIDE_LEFT), (side == SIDE_RIGHT)
+        x_dir = self.x_dir[i]
+        edge = self.turns[i] & (((x < rx) & (x_dir < 0)) | ((x+w > rx+rw) & (x_dir > 0)))
+        self.turn_around[i[(up & edge) | left | right]] = True
+
+        u = i[up]
+        self.y[u] = ry[up] - h[up]
+        self.y_vel[u] = np.minimum(0, self.y_vel[u])
+        self.stood[u] = True
+        self.x_vel[u] += self.rvx[j[up]]
+        self.y_vel[u] += np.maximum(0, self.rvy[j[up]])
+        d = i[down]
+        self.y[d] = ry[down] + rh[down]
+        self.y_vel[d] = np.maximum(0, self.y_vel[d])
+        r = i[right]
+        self.x[r] = rx[right] + rw[right]
+        self.x_vel[r] = np.maximum(0, self.x_vel[r])
+        l = i[left]
+        self.x[l] = rx[left] - w[left]
+        self.x_vel[l] = np.minimum(0, self.x_vel[l])
+
+    @staticmethod
+    def closest_sides(x, y, w, h, rx, ry, rw, rh): # InteractiveObject.closest_side_of_rect for arrays
+        left = np.abs(x-(rx-w))
+        right = np.abs(x-(rx+rw))
+        up = np.abs(y-(ry-h))
+        down = np.abs(y-(ry+rh))
+        right_closer = right < left
+        x_dif = np.where(right_closer, right, left)
+        x_side = np.where(right_closer, SIDE_RIGHT, SIDE_LEFT)
+        return np.where(up < down, np.where(up < x_dif, SIDE_UP, x_side), np.where(down < x_dif, SIDE_DOWN, x_side))
+
+class Mushroom(SelfSovereignBeing):
+    def __init__(self, x, y):
+        super().__init__(x, y, MUSHROOM_WIDTH, MUSHROOM_HEIGHT, 0.11, 0.01, False, MUSHROOM_COLOR) # walks of edges
+        self.x_dir = 1
+    def logic(self, g):
+        super().logic(g)
+        self.remove_self_if_under_camera(g)
+
+class CollisionRect:
+    def __init__(self, x, y, width, height, color=(50,50,50)):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.color = color
+    def logic(self, g):
+        pass
+    def got_hit(self, g): # played jumped up into self
+        print("bruh")
+    def draw(self, g):
+        x, y = g.camera.translate_position(self.x, self.y)
+        pygame.draw.rect(g.screen, self.color, (int(x),int(y),int(self.width),int(self.height)))
+        pygame.draw.rect(g.screen, (0,0,0), (int(x),int(y),int(self.width),int(self.height)),1)
+    def add_sprites(self, g, blits):
+        x, y = g.camera.translate_position(self.x, self.y)
+        blits.append((g.sprite_cache.rect(int(self.width), int(self.height), self.color, (0,0,0)), (int(x),int(y))))
+class Cloud:
+    def __init__(self, g):
+        self.x = g.camera.x + g.width * random.uniform(1,1.25)
+        self.y = g.camera.y + g.height * random.uniform(-0.25,1.25)
+        self.width = g.width * random.uniform(0.2, 0.8)
+        self.height = g.height * random.uniform(0.2, 0.5)
+        self.x_vel = -random.uniform(0.1,0.2)
+        self.y_vel = random.uniform(-0.01,0.01)
+        self.color = (127,127,127)
+    def logic(self, g):
+        self.x += self.x_vel * g.frame_time
+        self.y += self.y_vel * g.frame_time
+        if self.x + g.width < g.camera.x:
+            g.objects_to_remove.append(self)
+    def draw(self, g):
+        if not g.quality.translucency():
+            return
+        x, y = g.camera.translate_position(self.x, self.y)
+
+        s = pygame.Surface((int(self.width),int(self.height)))
+        s.set_alpha(50)
+        s.fill(self.color)
+        g.screen.blit(s, (int(x),int(y)))
+    def add_sprites(self, g, blits):
+        if not g.quality.translucency():
+            return
+        x, y = g.camera.translate_position(self.x, self.y)
+        blits.append((g.sprite_cache.translucent(int(self.width), int(self.height), self.color, 50), (int(x),int(y))))
+class Pipe(CollisionRect):
+    def __init__(self, x, y, width, height, color_value, teleport_pos):
+        color = (0,0,0)
+        if color_value == 0: color = (0,0,255)
+        elif color_value == 1: color = (0,255,0)
+        elif color_value == 2: color = (255,0,0)
+        else: color == (255,255,0)
+        super().__init__(x, y, width, height, color)
+
+        self.teleport_pos = teleport_pos
+
+    def draw(self, g):
+        x, y = g.camera.translate_position(self.x, self.y)
+        pygame.draw.rect(g.screen, self.color, (int(x),int(y),int(self.width),int(self.height)))
+        pygame.draw.rect(g.screen, (0,0,0), (int(x),int(y),int(self.width),int(self.height)),1)
+
+        y_ = int(y+g.camera.grid_size*0.75)
+        pygame.draw.line(g.screen, (0,0,0), (int(x), y_),(int(x+self.width),y_), 2)
+
+    def add_sprites(self, g, blits):
+        x, y = g.camera.translate_position(self.x, self.y)
+        line_y = int(y+g.camera.grid_size*0.75) - int(y)
+        blits.append((g.sprite_cache.pipe(int(self.width), int(self.height), self.color, line_y), (int(x),int(y))))
+
+class ClimbingRect(CollisionRect):
+    def __init__(self, x, y, width, height):
+        super().__init__(x, y, width, height, (20,150,20))
+
+    def draw(self, g):
+        x, y = g.camera.translate_position(self.x, self.y)
+        if not g.quality.translucency(): # outline only
+            pygame.draw.rect(g.screen, self.color, (int(x),int(y),int(self.width),int(self.height)), 1)
+            return
+
+        s = pygame.Surface((int(self.width),int(self.height)))
+        s.set_alpha(100)
+        s.fill(self.color)
+        g.screen.blit(s, (int(x),int(y)))    
+
+    def add_sprites(self, g, blits):
+        x, y = g.camera.translate_position(self.x, self.y)
+        if not g.quality.translucency():
+            blits.append((g.sprite_cache.frame(int(self.width), int(self.height), self.color, 1), (int(x),int(y))))
+            return
+        blits.append((g.sprite_cache.translucent(int(self.width), int(self.height), self.color, 100), (int(x),int(y))))
+
+
+class MovingCollisionRect(CollisionRect): # goes back and forth between start_pos and end_pos, where depends only on the level time
+    time = None # level time x and y are for, levels saved before don't have it
+    def __init__(self, start_pos, end_pos, width, height, speed=0.1, color=(50,100,100)):
+        super().__init__(start_pos[0],start_pos[1],width,height,color)
+        self.start_pos = start_pos
+        self.end_pos = end_pos
+
+        self.x_distance = self.end_pos[0] - self.start_pos[0]
+        self.y_distance = self.end_pos[1] - self.start_pos[1]
+        self.distance = math.sqrt(self.x_distance*self.x_distance + self.y_distance*self.y_distance)
+        self.x_normalized = self.x_distance/self.distance
+        self.y_normalized = self.y_distance/self.distance
+
+        self.speed = speed
+        self.x_vel = 0
+        self.y_vel = 0
+
+        self.way = 1 # 1 == to end, -1 == to start
+
+    def logic(self, g):
+        self.update_to(g.level_time)
+
+    def update_to(self, t): # position at level time t, straight from the time so nothing drifts and skipped frames cost nothing
+        if t == self.time:
+            return
+        self.time = t
+        travelled = (t * self.speed) % (2 * self.distance)
+        self.way = 1 if travelled < self.distance else -1
+        if self.way == -1:
+            travelled = 2 * self.distance - travelled
+        self.x = self.start_pos[0] + self.x_normalized * travelled
+        self.y = self.start_pos[1] + self.y_normalized * travelled
+        self.x_vel = self.x_normalized * self.speed * self.way # for carrying what stands on it
+        self.y_vel = self.y_normalized * self.speed * self.way
+
+    def path_rect(self): # everywhere it can be
+        return (min(self.start_pos[0], self.end_pos[0]), min(self.start_pos[1], self.end_pos[1]),
+                abs(self.x_distance) + self.width, abs(self.y_distance) + self.height)
+
+    def step(self, g): # moves one frame further, for animations that end when they reach end_pos
+        self.x_vel = self.x_normalized * self.speed * self.way 
+        self.y_vel = self.y_normalized * self.speed * self.way 
+        self.x += self.x_vel * g.frame_time
+        self.y += self.y_vel * g.frame_time
+
+        # is x or y more than it should
+        pos = self.end_pos if self.way == 1 else self.start_pos
+        x_dif = pos[0] - self.x
+        x_sign = 1 if self.x_distance > 0 else -1
+        
+        y_dif = pos[1] - self.y
+        y_sign = 1 if self.y_distance > 0 else -1
+        if x_dif * x_sign * self.way <= 0 and y_dif * y_sign * self.way <= 0:
+            # over
+            self.way *= -1
+class ItemizedCollisionRect(CollisionRect):
+    def __init__(self, x, y, width, height):
+        super().__init__(x, y, width, height, (255,255,0))
+        self.items = 1
+    def got_hit(self, g):
+        if self.items > 0 :
+            print("ITEM GOT")
+            g.objects_to_add.append(AnimationMushroom((self.x+self.width/2-MUSHROOM_WIDTH/2,self.y),MUSHROOM_WIDTH, MUSHROOM_HEIGHT, MUSHROOM_COLOR))
+            self.items -= 1
+            if self.items == 0:
+                self.color = (189, 113, 28)
+
+class AnimationMushroom(MovingCollisionRect):
+    def __init__(self, start_pos, width, height, color):
+        end_pos = (start_pos[0], start_pos[1] - height)
+
+        super().__init__(start_pos,end_pos,width,height,0.025,color)
+    def logic(self, g):
+        self.step(g)
+        if self.way == -1: # done
+            g.objects_to_remove.append(self)
+            g.objects_to_add.append(Mushroom(self.x,self.y))
+
+ANIMATION_PLAYER_PIPE_IN, ANIMATION_PLAYER_PIPE_OUT = range(2)
+class AnimationPlayerInPipe(MovingCollisionRect): # in game.objects.animations, also in GameStoppingAnimationPlayerInPipe.animation
+    def __init__(self, start_pos, player, a_type): # a_type == animation_type
+        end_pos = (start_pos[0], start_pos[1] + player.height)
+        if a_type == ANIMATION_PLAYER_PIPE_OUT:
+            start_pos, end_pos = end_pos, start_pos
+
+        super().__init__(start_pos,end_pos,player.width,player.height,0.025,player.color)
+        self.alive = True
+    def logic(self, g):
+        if self.alive:
+            self.step(g)
+            if self.way == -1: # done
+                g.objects_to_remove.append(self)
+                self.alive = False
+
+GS_ANIMATION_PLAYER_GET_SMALLER, GS_ANIMATION_PLAYER_GET_BIGGER, GS_ANIMATION_PLAYER_DIES = range(3)
+class GameStoppingAnimation:
+    def __init__(self, animation):
+        self.animation = animation
+        self.timer = 0
+    def logic(self, g):
+        
+        if self.animation == GS_ANIMATION_PLAYER_GET_BIGGER:
+            increase = 0.03 * g.frame_time
+            g.player.height += increase
+            g.player.y -= increase
+            if g.player.height >= PLAYER_BIG_HEIGHT:
+                g.player.height = PLAYER_BIG_HEIGHT
+                g.game_stopping_animation = None
+
+        elif self.animation == GS_ANIMATION_PLAYER_GET_SMALLER:
+            decrease = 0.03 * g.frame_time
+            g.player.height -= decrease
+            g.player.y += decrease
+            if g.player.height <= PLAYER_SMALL_HEIGHT:
+                g.player.height = PLAYER_SMALL_HEIGHT
+                g.game_stopping_animation = None
+
+        elif self.animation == GS_ANIMATION_PLAYER_DIES:
+            for obj in g.particles:
+                obj.logic(g)
+            if self.timer == 0: # create particles
+                for _ in range(g.quality.particle_count(100)):
+                    g.objects_to_add.append(Particle(g.player.x,g.player.y,PLAYER_WIDTH,PLAYER_SMALL_HEIGHT,(0,0,0),1))
+                g.player.visible = False
+            if self.timer > 1000:
+                g.player.set_position_to(g.player.respawn_point[0], g.player.respawn_point[1])
+                g.camera.play_logic(g)
+            if self.timer > 2000:
+                g.player.visible = True
+                g.player.respawn(g)
+                g.game_stopping_animation = None
+            
+        else:
+            print("ERROR, no such animation")
+
+        self.timer += g.frame_time
+class GameStoppingAnimationPlayerInPipe:
+    def __init__(self, g, teleport_pos):
+        self.timer = 0
+        self.teleport_pos = teleport_pos
+        self.mode = 0 # 0 == into pipe, 1 == out of pipe
+        g.objects_to_add.append(AnimationPlayerInPipe((g.player.x,g.player.y),g.player, ANIMATION_PLAYER_PIPE_IN))
+        self.animation = g.objects_to_add[-1]
+        g.player.visible = False
+
+    def logic(self, g):
+        if self.mode == 0:
+            self.animation.logic(g)
+
+            if self.timer > 1000:
+                self.mode = 1
+                g.camera.teleport_to((self.teleport_pos[0]-g.width/2,self.teleport_pos[1]-g.height/2))
+                g.objects_to_add.append(AnimationPlayerInPipe((self.teleport_pos[0]-g.player.width/2,self.teleport_pos[1]-g.player.height), g.player, ANIMATION_PLAYER_PIPE_OUT))
+                self.animation = g.objects_to_add[-1]
+                
+                self.timer = 0
+
+        elif self.mode == 1:
+            self.animation.logic(g)
+            if self.timer > 1000:
+                g.player.x = self.animation.x
+                g.player.y = self.animation.y
+                g.player.visible = True
+                g.game_stopping_animation = None
+
+        self.timer += g.frame_time
+class GameStoppingAnimationPlayerWinsLevel:
+    def __init__(self, g):
+        self.timer = 0
+    def logic(self, g):
+
+        for obj in g.flags + g.particles:
+            obj.logic(g)
+        g.player.logic(g)
+        self.timer += g.frame_time
+        if self.timer > 6000:
+            # next level
+            g.load_new_level(1)
+            
+
+class Particle(SelfSovereignBeing):
+    collides_with_rects = False
+    def __init__(self, x, y, width, height, color=(0,0,0), thickness=1):
+        
+        width = random.randint(int(width*0.5), int(width*0.75))
+        height = random.randint(int(height*0.5), int(height*0.75))
+
+        speed = random.uniform(0.2,1)
+        angle = random.uniform(0, 2*math.pi)
+        x_speed = math.cos(angle) * speed
+        
+        super().__init__(x, y, width, height, x_speed, 0.01, False, color, False)
+
+        self.y_vel = math.sin(angle) * speed
+        self.thickness = thickness
+
+    def logic(self, g):
+        self.logic_movement(g)
+        self.remove_self_if_under_camera(g)
+        
+    def draw(self, g):
+        x, y = g.camera.translate_position(self.x, self.y)
+        pygame.draw.rect(g.screen, self.color, (int(x),int(y),int(self.width),int(self.height)), self.thickness)
+    def add_sprites(self, g, blits):
+        if self.width > 0 and self.height > 0:
+            x, y = g.camera.translate_position(self.x, self.y)
+            blits.append((g.sprite_cache.frame(int(self.width), int(self.height), self.color, self.thickness), (int(x),int(y))))
+class Coin:
+    def __init__(self, g, x, y):
+        self.x = x + g.camera.grid_size/2
+        self.y = y + g.camera.grid_size/2
+        self.radius = int(g.camera.grid_size/2)
+        self.color = (255,255,51)
+    def draw(self, g):
+        x, y = g.camera.translate_position(self.x, self.y)
+        pygame.draw.circle(g.screen, self.color, (int(x),int(y)),self.radius)
+        #pygame.draw.circle(g.screen, (200,200,200), (int(x),int(y)), self.radius,1)
+    def add_sprites(self, g, blits):
+        x, y = g.camera.translate_position(self.x, self.y)
+        blits.append((g.sprite_cache.circle(self.radius, self.color), (int(x)-self.radius,int(y)-self.radius)))
+    def got_picked_up(self, g):
+        for _ in range(g.quality.particle_count(18)):
+            g.objects_to_add.append(Particle(self.x,self.y,self.radius,self.radius,self.color,3))
+        g.objects_to_remove.append(self)
+        g.player.coins += 1
+        g.track(TELEMETRY_COIN, self.x, self.y)
+
+class Flag:
+    def __init__(self, g, x, y, length, flag_width, flag_height):
+        self.x = x
+        self.y = y
+        self.length = length
+
+        self.flag_width = flag_width
+        self.flag_height = flag_height
+        self.flag_raisedness = 0
+        self.flag_raise_velocity = 1
+
+        self.color = (42, 196, 76)
+        
+        self.mode = 0# 0 = not getting raised, 1 = getting raised, 2 = already raised
+    def logic(self, g):
+        if self.mode == 1:
+            self.flag_raisedness += self.flag_raise_velocity*(math.sin(g.frame_time*0.05)+0.01)
+            if self.flag_raisedness >= self.length - self.flag_height:
+                self.mode = 2
+                self.particle_effect(g)
+    def get_raised(self, g):
+        if self.mode == 0:
+            self.mode = 1
+    def particle_effect(self, g):
+        for _ in range(g.quality.particle_count(100)):
+            g.objects_to_add.append(Particle(self.x,self.y-self.length,1,1,self.color,2))
+    def draw(self, g):
+        x, y  = g.camera.translate_position(self.x, self.y)
+
+        # flag rect
+        y_ = int(y-self.flag_height-self.flag_raisedness)
+        pygame.draw.rect(g.screen, self.color, (int(x),y_,self.flag_width,self.flag_height))
+
+        # flag pole
+        pygame.draw.line(g.screen, (0,0,0), (int(x), int(y)), (int(x),int(y-self.length)), 2)
+    def add_sprites(self, g, blits):
+        x, y  = g.camera.translate_position(self.x, self.y)
+        y_ = int(y-self.flag_height-self.flag_raisedness)
+        blits.append((g.sprite_cache.rect(self.flag_width, self.flag_height, self.color), (int(x),y_)))
+        pole_top = int(y-self.length)
+        blits.append((g.sprite_cache.rect(2, int(y)-pole_top+1, (0,0,0)), (int(x)-1,pole_top)))
+class RespawnFlag(Flag): # goes up from x,y to length
+    def __init__(self, g, x, y):
+        super().__init__(g, x, y + g.camera.grid_size, g.camera.grid_size * 2.5, 40, 28)
+class WinFlag(Flag):
+    def __init__(self, g, x, y):
+        super().__init__(g, x, y + g.camera.grid_size, g.camera.grid_size * 7.5, 80, 57)
+    def get_raised(self, g):
+        if self.mode == 0:
+            self.mode = 1
+            g.save_ghost()
+            for coin in g.coins: # the ones left behind
+                g.track(TELEMETRY_MISSED_COIN, coin.x, coin.y)
+            g.game_stopping_animation = GameStoppingAnimationPlayerWinsLevel(g)
+    def particle_effect(self, g):
+        for _ in range(g.quality.particle_count(200)):
+            g.objects_to_add.append(Particle(self.x,self.y-self.length,10,10,self.color,5))
+def main():
+    trace = StartupTrace()
+    trace.mark("pygame import", PYGAME_IMPORTED)
+    trace.mark("imports")
+    pygame.display.init() # pygame.init would also start audio, joysticks and the rest, which the game doesn't use
+    pygame.font.init()
+    trace.mark("pygame init")
+    Game(fullscreen="--fullscreen" in sys.argv, startup_trace=trace)
+    pygame.quit()
+
+if __name__ == "__main__":
     main()
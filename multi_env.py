@@ -0,0 +1,633 @@
+import os, io, sys, time, pickle, types
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # coins and flags want a game, which wants a display
+
+import numpy as np
+import pygame
+import main
+
+# Many copies of one level played at once, for bots and tests. Every copy is a row in numpy arrays, all of them take a
+# step together from a row of held keys each. The player moves like Player.logic with discrete collisions. Enemies
+# don't depend on the player, so where each one is some frames after it got switched on is recorded once up front, and
+# a copy only keeps when the camera switched it on. That doesn't hold for enemies that come near moving rects, where
+# they are depends on the level time, or for jump throw enemies, which turn around at random. Those live enemies get an
+# EnemyEngine row per copy. Axes fly the same way from any throw, only their speed depends on the player. Left out:
+# mushrooms and getting big and respawn flags (dying ends the episode).
+
+FRAME_TIME = 1000 / 60
+MAX_STEPS = 60 * 120 # frames an episode may take, two minutes of play
+ACTION_RIGHT, ACTION_LEFT, ACTION_UP, ACTION_DOWN, ACTION_SPACE = range(5)
+ACTIONS = 5
+REWARD_PROGRESS = 0.01 # per px further right than the episode got before
+REWARD_COIN = 1
+REWARD_WIN = 100
+REWARD_DEATH = -10
+CANDIDATE_MARGIN = 2 # px around the player rects are looked for in, like CollisionIndex
+NOT_SWITCHED_ON = 1 << 30
+PER_COPY = ("x","y","x_vel","y_vel","jump_timer","time","best_x","camera_x","camera_y","camera_offset","jump_mode","climb_mode","stood",
+            "frame","steps","frozen","pipe_used","coins_taken","enemy_alive","switched_on","previous","axe_x","axe_y","axe_speed",
+            "axe_y_vel","axe_on","axe_next","won","died","done")
+AXES = 16 # axes in the air per copy, a new one takes the place of the oldest
+WIDE_RECT = 1000 # px, rects wider than this, or moving over more, are looked at for every row
+RIDER_MARGIN = 1 # px around the paths of moving rects an enemy counts as a rider in
+
+def load_level(path):
+    with open(path, "rb") as f:
+        return main.LevelUnpickler(f).load()
+
+def level_game(objects): # a game of its own playing a copy of objects
+    g = main.Game(start=False)
+    g.set_objects(main.LevelUnpickler(io.BytesIO(pickle.dumps(objects))).load())
+    g.ghost_recorder.start(False) # its runs aren't level0 runs, winning must not save a ghost
+    return g
+
+def pairs(left, order, low, high, rows): # rows and objects whose left edge, sorted in left, is between low and high
+    lo = np.searchsorted(left, low, "right")
+    hi = np.searchsorted(left, high, "left")
+    counts = np.maximum(hi - lo, 0)
+    pair_row = np.repeat(rows, counts)
+    pair_obj = order[np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(len(pair_row))]
+    return pair_row, pair_obj
+
+def line_in_rects(x1, y1, x2, y2, rx, ry, rw, rh): # General.line_in_tuple_rect for many rects
+    min_x, min_y, max_x, max_y = rx, ry, rx+rw, ry+rh
+    start = (x1 > min_x) & (x1 < max_x) & (y1 > min_y) & (y1 < max_y)
+    end = (x2 > min_x) & (x2 < max_x) & (y2 > min_y) & (y2 < max_y)
+    outside = ((x1 <= min_x) & (x2 <= min_x)) | ((y1 <= min_y) & (y2 <= min_y)) | ((x1 >= max_x) & (x2 >= max_x)) | ((y1 >= max_y) & (y2 >= max_y))
+    m = 0 if x2 - x1 == 0 else (y2 - y1) / (x2 - x1)
+    crosses = False
+    for y in (m * (min_x - x1) + y1, m * (max_x - x1) + y1):
+        crosses = crosses | ((y > min_y) & (y < max_y))
+    for edge in (min_y, max_y):
+        x = x1 if m == 0 else (edge - y1) / m + x1
+        crosses = crosses | ((x > min_x) & (x < max_x))
+    return start | end | (~outside & crosses)
+
+def pipe_animation(teleport_pos, frame_time): # frames GameStoppingAnimationPlayerInPipe stops the game for, where the player ends
+    player = main.Player()
+    g = types.SimpleNamespace(frame_time=frame_time, objects_to_remove=[])
+    animation = None
+    timer, mode, frames = 0, 0, 0
+    while True:
+        frames += 1
+        if mode == 0:
+            if timer > 1000:
+                mode = 1
+                animation = main.AnimationPlayerInPipe((teleport_pos[0]-player.width/2,teleport_pos[1]-player.height), player, main.ANIMATION_PLAYER_PIPE_OUT)
+                timer = 0
+        else:
+            animation.logic(g)
+            if timer > 1000:
+                return frames, animation.x, animation.y
+        timer += frame_time
+
+def record_enemies(g, steps, frame_time): # where every enemy is 0..steps frames after it got switched on and when it throws, in g.enemies order
+    engine = main.EnemyEngine()
+    engine.rebuild(g)
+    engine.rebuild_rects(g)
+    rows = np.array([engine.rows[e] for e in g.enemies if e in engine.rows], dtype=np.intp)
+    index = np.zeros(len(engine.objects), dtype=np.intp)
+    index[rows] = np.arange(len(rows))
+    xs = np.empty((steps + 1, len(rows)))
+    ys = np.empty((steps + 1, len(rows)))
+    throws = np.zeros((steps + 1, len(rows)), dtype=bool)
+    xs[0], ys[0] = engine.x[rows], engine.y[rows]
+    g.level_time = frame_time # enemies in view at the start get switched on in the first frame and move from the second
+    for k in range(1, steps + 1):
+        g.level_time += frame_time
+        for j in engine.moving:
+            r = engine.rect_objects[j]
+            r.update_to(g.level_time)
+            engine.rx[j], engine.ry[j], engine.rvx[j], engine.rvy[j] = r.x, r.y, r.x_vel, r.y_vel
+        throws[k, index[engine.step(frame_time)]] = True
+        xs[k], ys[k] = engine.x[rows], engine.y[rows]
+    return xs, ys, throws
+
+class LiveEngine(main.EnemyEngine): # live enemies, enemies[k] of copy c is row row_of[c,k], every row at the level time of its copy
+    def __init__(self, env, enemies, n):
+        super().__init__()
+        self.env = env
+        self.rebuild(types.SimpleNamespace(enemies=enemies))
+        base = np.array([self.rows[e] for e in enemies], dtype=np.intp)
+        self.state = sorted(set(f[0] for f in self.fields)) + ["alive", "turn_around"]
+        for name in self.state + ["kind"]: # every row n times in a row, so kinds stay in one slice
+            setattr(self, name, np.repeat(getattr(self, name), n))
+        self.slices = {k:slice(s.start*n, s.stop*n) for k, s in self.slices.items()}
+        self.row_of = base[None,:]*n + np.arange(n)[:,None]
+        self.initial = {name:getattr(self, name).copy() for name in self.state}
+        self.level_time = np.zeros(len(self.x))
+
+    def reset(self, rows):
+        for name in self.state:
+            getattr(self, name)[rows] = self.initial[name][rows]
+
+    def clone(self, dst, src, other):
+        for name in self.state:
+            getattr(self, name)[self.row_of[dst]] = getattr(other, name)[other.row_of[src]]
+
+    def resolve_collisions(self, active): # the rects where they are at each row's level time, one pair at a time
+        self.stood[active] = False
+        env = self.env
+        rows = np.nonzero(active)[0]
+        pair_row, pair_rect = env.rect_pairs(self.x[rows], self.x[rows] + self.w[rows], rows)
+        b = env.bounds[pair_rect]
+        near = (b[:,0]+b[:,2] > self.x[pair_row]) & (b[:,1]+b[:,3] > self.y[pair_row]) & (b[:,1] < self.y[pair_row]+self.h[pair_row])
+        pair_row, pair_rect = pair_row[near], pair_rect[near]
+        self.rx, self.ry, self.rvx, self.rvy = env.rects_at(pair_rect, self.level_time[pair_row])
+        self.rw, self.rh = env.rw[pair_rect], env.rh[pair_rect]
+        hit = np.nonzero(self.overlapping(pair_row, np.arange(len(pair_row))))[0]
+        if len(hit) == 0:
+            return
+        pair = hit[np.lexsort((pair_rect[hit], pair_row[hit]))]
+        pair_row = pair_row[pair]
+        index = np.arange(len(pair))
+        first = np.concatenate(([True], pair_row[1:] != pair_row[:-1]))
+        rank = index - np.maximum.accumulate(np.where(first, index, 0))
+        for k in range(int(rank.max()) + 1):
+            i, j = pair_row[rank == k], pair[rank == k]
+            if k > 0:
+                still = self.overlapping(i, j)
+                i, j = i[still], j[still]
+            self.apply_contacts(i, j)
+
+class BatchedEnv:
+    def __init__(self, objects, n, frame_time=FRAME_TIME, max_steps=MAX_STEPS, like=None): # like: an env of the level whose recorded enemies get reused
+        self.n = n
+        self.frame_time = frame_time
+        self.max_steps = max_steps
+        g = level_game(objects)
+        self.width, self.height = g.width, g.height
+        self.player_width, self.player_height = main.PLAYER_WIDTH, main.PLAYER_SMALL_HEIGHT
+
+        # collision rects and pipes in level order, moving ones by their whole path for finding candidates
+        rects = g.collision_rects + g.pipes
+        self.rx, self.ry, self.rw, self.rh = (np.array([getattr(r, a) for r in rects], dtype=np.float64) for a in ("x","y","width","height"))
+        self.moving = np.array([isinstance(r, main.MovingCollisionRect) for r in rects], dtype=bool)
+        self.carries = np.array([type(r) == main.MovingCollisionRect for r in rects], dtype=bool)
+        self.pipe = np.array([hasattr(r, "teleport_pos") for r in rects], dtype=bool) # shared pipes are proxies
+        columns = ("start_x","start_y","x_normalized","y_normalized","speed","distance")
+        self.start_x, self.start_y, self.x_normalized, self.y_normalized, self.speed, self.distance = (np.zeros(len(rects)) for _ in columns)
+        bounds = np.stack((self.rx, self.ry, self.rw, self.rh), axis=1) if rects else np.zeros((0, 4))
+        for j, r in enumerate(rects):
+            if self.moving[j]:
+                self.start_x[j], self.start_y[j] = r.start_pos
+                self.x_normalized[j], self.y_normalized[j], self.speed[j], self.distance[j] = r.x_normalized, r.y_normalized, r.speed, r.distance
+                bounds[j] = r.path_rect()
+        self.bounds = bounds
+        wide = bounds[:,2] > WIDE_RECT # a few very wide ones would make every row look far to the left
+        self.wide = np.nonzero(wide)[0]
+        self.rect_order = np.nonzero(~wide)[0][np.argsort(bounds[~wide,0], kind="stable")]
+        self.rect_left = bounds[self.rect_order,0]
+        self.rect_reach = bounds[~wide,2].max() if (~wide).any() else 0
+        self.pipe_frames = np.zeros(len(rects), dtype=np.int64)
+        self.pipe_exit = np.zeros((len(rects), 2))
+        for j, r in enumerate(rects):
+            if self.pipe[j]:
+                frames, x, y = pipe_animation(r.teleport_pos, frame_time)
+                self.pipe_frames[j], self.pipe_exit[j] = frames, (x, y)
+        self.teleport = np.array([r.teleport_pos if self.pipe[j] else (0, 0) for j, r in enumerate(rects)], dtype=np.float64).reshape(-1, 2)
+
+        self.climbing = np.array([(r.x, r.y, r.width, r.height) for r in g.climbing_rects], dtype=np.float64).reshape(-1, 4)
+        self.climb_order = np.argsort(self.climbing[:,0], kind="stable")
+        self.climb_left = self.climbing[self.climb_order,0]
+        self.climb_reach = self.climbing[:,2].max() if len(self.climbing) else 0
+
+        self.coin_x, self.coin_y, self.coin_radius = (np.array([getattr(c, a) for c in g.coins], dtype=np.float64) for a in ("x","y","radius"))
+        self.coin_order = np.argsort(self.coin_x, kind="stable")
+        self.coin_left = self.coin_x[self.coin_order]
+        self.coin_reach = self.coin_radius.max()*1.5 if len(g.coins) else 0
+
+        self.win_flags = np.array([(f.x, f.y, f.length) for f in g.flags if type(f) == main.WinFlag], dtype=np.float64).reshape(-1, 3)
+        self.camera_lines = [tuple(cl.start_pos) + tuple(cl.end_pos) for cl in g.camera_lines]
+
+        enemies = [e for e in g.enemies if type(e) in main.EnemyEngine.kinds]
+        self.enemy_w = np.array([e.width for e in enemies], dtype=np.float64)
+        self.enemy_h = np.array([e.height for e in enemies], dtype=np.float64)
+        self.jumpable = np.array([e.can_be_jumped_on for e in enemies], dtype=bool)
+        if like != None and like.frame_time == frame_time and like.max_steps >= max_steps: # recording takes most of the setup
+            self.enemy_x, self.enemy_y, self.throws = (a[:max_steps + 1] for a in (like.enemy_x, like.enemy_y, like.throws))
+        elif enemies:
+            self.enemy_x, self.enemy_y, self.throws = record_enemies(level_game(objects), max_steps, frame_time)
+        else:
+            self.enemy_x = self.enemy_y = np.zeros((max_steps + 1, 0))
+            self.throws = np.zeros((max_steps + 1, 0), dtype=bool)
+        # a jump throw enemy throws before it moves, a flying one after
+        self.throw_delay = np.array([type(e) == main.JumpThrowEnemy for e in enemies], dtype=np.intp)
+        self.axe = main.Axe(0, 0, 0) # size, throw velocity and gravity of every axe
+
+        # live enemies: jump throw ones and riders, which came near a moving rect's path while recorded. The rest never touch one
+        live = np.array([type(e) == main.JumpThrowEnemy for e in enemies], dtype=bool)
+        m = RIDER_MARGIN
+        for bx, by, bw, bh in bounds[self.moving]:
+            live |= ((self.enemy_x+self.enemy_w > bx-m) & (self.enemy_x < bx+bw+m) & (self.enemy_y+self.enemy_h > by-m) & (self.enemy_y < by+bh+m)).any(axis=0)
+        self.live = np.nonzero(live)[0]
+        self.live_slot = np.full(len(enemies), -1, dtype=np.intp)
+        self.live_slot[self.live] = np.arange(len(self.live))
+        self.live_engine = LiveEngine(self, [enemies[e] for e in self.live], n) if len(self.live) else None
+        self.enemy_order = np.argsort(self.enemy_x[0], kind="stable") # where they start, for the ones nobody switched on yet
+        self.enemy_left = self.enemy_x[0, self.enemy_order]
+        self.enemy_reach = self.enemy_w.max() if enemies else 0
+
+        self.x, self.y, self.x_vel, self.y_vel, self.jump_timer, self.time, self.best_x = (np.zeros(n) for _ in range(7))
+        self.camera_x, self.camera_y, self.camera_offset = np.zeros(n), np.zeros(n), np.zeros(n)
+        self.jump_mode, self.climb_mode, self.stood = (np.zeros(n, dtype=bool) for _ in range(3))
+        self.frame, self.steps, self.frozen = (np.zeros(n, dtype=np.int64) for _ in range(3)) # played frames, frames with the pipe ones
+        self.pipe_used = np.zeros(n, dtype=np.intp)
+        self.coins_taken = np.zeros((n, len(g.coins)), dtype=bool)
+        self.enemy_alive = np.ones((n, len(enemies)), dtype=bool)
+        self.switched_on = np.full((n, len(enemies)), NOT_SWITCHED_ON, dtype=np.int64) # frame each enemy got switched on at
+        self.previous = np.zeros((n, ACTIONS), dtype=bool)
+        self.axe_x, self.axe_y, self.axe_speed, self.axe_y_vel = (np.zeros((n, AXES)) for _ in range(4))
+        self.axe_on = np.zeros((n, AXES), dtype=bool)
+        self.axe_next = np.zeros(n, dtype=np.intp) # slot the next axe goes into
+        self.won, self.died, self.done = (np.zeros(n, dtype=bool) for _ in range(3))
+        self.reset()
+
+    def reset(self, envs=None): # all copies, or those where envs is True, back to the start of the level
+        envs = slice(None) if envs is None else np.asarray(envs, dtype=bool)
+        for array in (self.x, self.y, self.x_vel, self.y_vel, self.time, self.best_x, self.camera_offset, self.frame, self.steps, self.frozen):
+            array[envs] = 0
+        for array in (self.jump_mode, self.climb_mode, self.stood, self.won, self.died, self.coins_taken, self.previous, self.axe_on):
+            array[envs] = False
+        self.jump_timer[envs] = main.PLAYER_JUMP_TIME
+        self.camera_x[envs] = -self.width/2
+        self.camera_y[envs] = -self.height/2
+        self.enemy_alive[envs] = True
+        self.switched_on[envs] = NOT_SWITCHED_ON
+        if self.live_engine != None:
+            self.live_engine.reset(self.live_engine.row_of[envs].ravel())
+
+    def clone(self, dst, src, other=None): # rows src, of other if given, copied into rows dst, so a search can go on from its best copies
+        other = self if other == None else other
+        for name in PER_COPY:
+            getattr(self, name)[dst] = getattr(other, name)[src]
+        if self.live_engine != None:
+            self.live_engine.clone(dst, src, other.live_engine)
+
+    def observe(self): # a row per copy: x, y, y velocity, stood, climbing, jumping, level time
+        return np.stack((self.x, self.y, self.y_vel, self.stood, self.climb_mode, self.jump_mode, self.time), axis=1).astype(np.float64)
+
+    def step(self, actions): # actions: n x ACTIONS of held keys. Returns rewards and which copies ended, those start over next step
+        if self.done.any():
+            self.reset(self.done)
+        actions = np.asarray(actions, dtype=bool)
+        pressed = actions & ~self.previous
+        self.previous = actions.copy()
+        rewards = np.zeros(self.n)
+        self.steps += 1
+
+        frozen = self.frozen > 0 # in a pipe, the game stands still
+        if frozen.any():
+            self.frozen[frozen] -= 1
+            out = np.nonzero(frozen & (self.frozen == 0))[0]
+            j = self.pipe_used[out]
+            self.x[out], self.y[out] = self.pipe_exit[j,0], self.pipe_exit[j,1]
+            self.camera_x[out] = self.teleport[j,0] - self.width/2
+            self.camera_y[out] = self.teleport[j,1] - self.height/2
+            rows = np.nonzero(~frozen)[0]
+        else:
+            rows = np.arange(self.n)
+        if len(rows):
+            self.play(rows, actions[rows], pressed[rows], rewards)
+
+        self.done = self.won | self.died | (self.steps >= self.max_steps)
+        return rewards, self.done
+
+    def play(self, i, held, pressed, rewards): # one frame of Player.logic, enemies and the camera for rows i
+        ft = self.frame_time
+        w, h = self.player_width, self.player_height
+        x, y, x_vel, y_vel, jump_timer = self.x[i], self.y[i], self.x_vel[i], self.y_vel[i], self.jump_timer[i]
+        jump_mode, climb_mode, stood = self.jump_mode[i], self.climb_mode[i], self.stood[i]
+        t = self.time[i] + ft
+        frame = self.frame[i] + 1
+        right, left, up, down, space = held.T
+        up_pressed, down_pressed, space_pressed = pressed[:,ACTION_UP], pressed[:,ACTION_DOWN], pressed[:,ACTION_SPACE]
+
+        # walking and climbing
+        allowed = self.climbable(x, y)
+        climbing = climb_mode & allowed
+        walking = ~climb_mode
+        speed = main.PLAYER_CLIMB_SPEED
+        x_vel = np.where(climbing & right, speed, x_vel)
+        x_vel = np.where(climbing & left, -speed, x_vel)
+        y_vel = np.where(climbing, 0, y_vel)
+        y_vel = np.where(climbing & up, -speed, y_vel)
+        y_vel = np.where(climbing & down, speed, y_vel)
+        climb_mode = climbing
+        x_vel = x_vel + np.where(walking & right, main.PLAYER_SPEED, 0)
+        x_vel = x_vel - np.where(walking & left, main.PLAYER_SPEED, 0)
+        start_climb = walking & up_pressed & allowed
+        climb_mode = climb_mode | start_climb
+        jump_mode = jump_mode & ~start_climb
+
+        # jumping and gravity
+        jump_timer = np.where(jump_mode, jump_timer + ft, jump_timer)
+        end = jump_mode & ((jump_timer >= main.PLAYER_JUMP_TIME) | ~space)
+        jump_mode = jump_mode & ~end
+        jump_timer = np.where(end, main.PLAYER_JUMP_TIME, jump_timer)
+        jump = (climb_mode | stood) & space_pressed
+        y_vel = np.where(jump, main.PLAYER_JUMP_VELOCITY, y_vel)
+        jump_mode = jump_mode | jump
+        jump_timer = np.where(jump, 0, jump_timer)
+        climb_mode = climb_mode & ~jump
+        gravity = np.where(jump_mode, (jump_timer/main.PLAYER_JUMP_TIME)*main.PLAYER_GRAVITY, main.PLAYER_GRAVITY)
+        y_vel = y_vel + np.where(climb_mode, 0, gravity)
+        x = x + x_vel*ft
+        x_vel = np.zeros(len(i))
+        y = y + y_vel*ft
+
+        # collision rects, every copy goes through its rects in level order
+        stood = np.zeros(len(i), dtype=bool)
+        on_pipe = np.full(len(i), -1, dtype=np.intp)
+        m = CANDIDATE_MARGIN
+        pair_row, pair_rect = self.rect_pairs(x - m, x + w + m, np.arange(len(i)))
+        b = self.bounds[pair_rect]
+        near = (b[:,0]+b[:,2] > x[pair_row]-m) & (b[:,1]+b[:,3] > y[pair_row]-m) & (b[:,1] < y[pair_row]+h+m)
+        pair_row, pair_rect = pair_row[near], pair_rect[near]
+        if len(pair_row):
+            rx, ry, rvx, rvy = self.rects_at(pair_rect, t[pair_row])
+            rw, rh = self.rw[pair_rect], self.rh[pair_rect]
+            sort = np.lexsort((pair_rect, pair_row))
+            pair_row, pair_rect, rx, ry, rw, rh, rvx, rvy = (a[sort] for a in (pair_row, pair_rect, rx, ry, rw, rh, rvx, rvy))
+            index = np.arange(len(pair_row))
+            first = np.concatenate(([True], pair_row[1:] != pair_row[:-1]))
+            rank = index - np.maximum.accumulate(np.where(first, index, 0))
+            for k in range(int(rank.max()) + 1):
+                p = np.nonzero(rank == k)[0]
+                r = pair_row[p]
+                hit = (x[r]+w > rx[p]) & (x[r] < rx[p]+rw[p]) & (y[r]+h > ry[p]) & (y[r] < ry[p]+rh[p])
+                p, r = p[hit], r[hit]
+                if len(p) == 0:
+                    continue
+                side = main.EnemyEngine.closest_sides(x[r], y[r], w, h, rx[p], ry[p], rw[p], rh[p])
+                u, d = side == main.SIDE_UP, side == main.SIDE_DOWN
+                jump_mode[r[d]] = False
+                pipe = u & self.pipe[pair_rect[p]] & (x[r] > rx[p]) & (x[r]+w < rx[p]+rw[p])
+                on_pipe[r[pipe]] = pair_rect[p[pipe]]
+                ru, pu = r[u], p[u]
+                y[ru] = ry[pu] - h
+                y_vel[ru] = np.minimum(0, y_vel[ru])
+                stood[ru] = True
+                carry = self.carries[pair_rect[pu]]
+                x_vel[ru] += np.where(carry, rvx[pu], 0)
+                y_vel[ru] += np.where(carry, np.maximum(0, rvy[pu]), 0)
+                y[r[d]] = ry[p[d]] + rh[p[d]]
+                y_vel[r[d]] = np.maximum(0, y_vel[r[d]])
+                s = side == main.SIDE_RIGHT
+                x[r[s]] = rx[p[s]] + rw[p[s]]
+                x_vel[r[s]] = np.maximum(0, x_vel[r[s]])
+                s = side == main.SIDE_LEFT
+                x[r[s]] = rx[p[s]] - w
+                x_vel[r[s]] = np.minimum(0, x_vel[r[s]])
+        died = y_vel > main.PLAYER_DEADLY_FALL_VELOCITY
+
+        # the first enemy touched, where it was after the last frame. Only the ones a copy switched on have moved
+        local = np.full(self.n, -1, dtype=np.intp)
+        local[i] = np.arange(len(i))
+        on_row, on_e = np.nonzero(self.switched_on < NOT_SWITCHED_ON)
+        keep = (local[on_row] >= 0) & self.enemy_alive[on_row, on_e]
+        on_row, on_e = on_row[keep], on_e[keep] # these move this frame, even if they get stomped
+        touched = np.zeros(len(i), dtype=bool)
+        if len(self.enemy_w):
+            ew, eh = self.enemy_w, self.enemy_h
+            since = np.minimum(self.frame[on_row] - self.switched_on[on_row, on_e], self.max_steps)
+            still_row, still_e = pairs(self.enemy_left, self.enemy_order, x - self.enemy_reach, x + w, np.arange(len(i)))
+            keep = (self.switched_on[i[still_row], still_e] == NOT_SWITCHED_ON) & self.enemy_alive[i[still_row], still_e]
+            still_row, still_e = still_row[keep], still_e[keep]
+            r = np.concatenate((local[on_row], still_row))
+            e = np.concatenate((on_e, still_e))
+            ex = np.concatenate((self.enemy_x[since, on_e], self.enemy_x[0, still_e]))
+            ey = np.concatenate((self.enemy_y[since, on_e], self.enemy_y[0, still_e]))
+            live = np.nonzero(self.live_slot[on_e] >= 0)[0] # live ones are where their engine rows are
+            if len(live):
+                row = self.live_engine.row_of[on_row[live], self.live_slot[on_e[live]]]
+                ex[live], ey[live] = self.live_engine.x[row], self.live_engine.y[row]
+            touching = (x[r]+w > ex) & (x[r] < ex+ew[e]) & (y[r]+h > ey) & (y[r] < ey+eh[e])
+            r, e, ey = r[touching], e[touching], ey[touching]
+            sort = np.lexsort((e, r)) # the game looks at its enemies in level order
+            r, e, ey = r[sort], e[sort], ey[sort]
+            first = np.concatenate((np.ones(min(len(r), 1), dtype=bool), r[1:] != r[:-1]))
+            r, e, ey = r[first], e[first], ey[first]
+            touched[r] = True
+            top = ey+eh[e]/2
+            below = (y[r]+h > top) & (y[r] < top+eh[e]/2) # the bottom half, touching already holds for x
+            stomp = self.jumpable[e] & ~below
+            died[r[~stomp]] = True
+            r, e = r[stomp], e[stomp]
+            y_vel[r] = main.PLAYER_STOMP_VELOCITY
+            jump_mode[r] = True
+            jump_timer[r] = 0.2*main.PLAYER_JUMP_TIME
+            climb_mode[r] = False
+            self.enemy_alive[i[r], e] = False
+        # axes come after the enemies that were in the level, touching one is deadly
+        r, slot = np.nonzero(self.axe_on[i])
+        ax, ay = self.axe_x[i[r], slot], self.axe_y[i[r], slot]
+        hit = r[(x[r]+w > ax) & (x[r] < ax+self.axe.width) & (y[r]+h > ay) & (y[r] < ay+self.axe.height)]
+        died[hit[~touched[hit]]] = True
+
+        # pipes, the game stands still until the player comes out of the other end
+        enter = down_pressed & (on_pipe >= 0)
+        self.frozen[i[enter]] = self.pipe_frames[on_pipe[enter]]
+        self.pipe_used[i[enter]] = on_pipe[enter]
+
+        # coins
+        centre_x, centre_y = x + w/2, y + h/2
+        r, c = pairs(self.coin_left, self.coin_order, centre_x - self.coin_reach - 1, centre_x + self.coin_reach + 1, np.arange(len(i)))
+        got = ~self.coins_taken[i[r], c] & (np.abs(self.coin_x[c] - centre_x[r]) + np.abs(self.coin_y[c] - centre_y[r]) <= self.coin_radius[c]*1.5)
+        r, c = r[got], c[got]
+        self.coins_taken[i[r], c] = True
+        np.add.at(rewards, i[r], REWARD_COIN)
+
+        won = np.zeros(len(i), dtype=bool)
+        for fx, fy, length in self.win_flags:
+            won |= (x+w > fx) & (x < fx) & (y+h > fy-length) & (y < fy-length+length)
+
+        # enemies move, from their recordings or their engine rows, and throw axes
+        live = self.live_slot[on_e] >= 0
+        k = self.frame[on_row] + 1 - self.switched_on[on_row, on_e] # how many frames they have moved after this one
+        throw = ~live & (k <= self.max_steps)
+        throw[throw] = self.throws[k[throw], on_e[throw]]
+        throw_row, throw_e = local[on_row[throw]], on_e[throw]
+        k = k[throw] - self.throw_delay[throw_e]
+        throw_x, throw_y = self.enemy_x[k, throw_e], self.enemy_y[k, throw_e]
+        throw_w = self.enemy_w[throw_e]
+        if self.live_engine != None:
+            engine = self.live_engine
+            row = engine.row_of[on_row[live], self.live_slot[on_e[live]]]
+            engine.alive[:] = False
+            engine.alive[row] = True
+            engine.level_time[row] = t[local[on_row[live]]]
+            before_x, before_y = engine.x.copy(), engine.y.copy()
+            throwers = engine.step(ft)
+            delayed = engine.kind[throwers] == main.ENEMY_THROW
+            throw_row = np.concatenate((throw_row, local[throwers % self.n])) # rows of an enemy are one per copy in a row
+            throw_x = np.concatenate((throw_x, np.where(delayed, before_x[throwers], engine.x[throwers])))
+            throw_y = np.concatenate((throw_y, np.where(delayed, before_y[throwers], engine.y[throwers])))
+            throw_w = np.concatenate((throw_w, engine.w[throwers]))
+        self.move_axes(i)
+        if len(throw_row):
+            self.throw_axes(i[throw_row], throw_x + throw_w/2, throw_y, x[throw_row] - throw_x)
+
+        # enemies the camera sees get switched on, they move from the next frame
+        if len(self.enemy_w):
+            cx, cy = self.camera_x[i], self.camera_y[i]
+            r, e = pairs(self.enemy_left, self.enemy_order, cx - self.enemy_reach, cx + self.width, np.arange(len(i)))
+            ex, ey = self.enemy_x[0, e], self.enemy_y[0, e] # enemies that aren't switched on are still where they started
+            seen = (self.switched_on[i[r], e] == NOT_SWITCHED_ON) & self.enemy_alive[i[r], e] & \
+                   (cx[r] < ex+ew[e]) & (cy[r]+self.height > ey) & (cy[r] < ey+eh[e])
+            self.switched_on[i[r[seen]], e[seen]] = frame[r[seen]]
+
+        self.move_camera(i, x, y)
+        progress = np.maximum(x - self.best_x[i], 0)
+        rewards[i] += progress*REWARD_PROGRESS + np.where(won, REWARD_WIN, 0) + np.where(died, REWARD_DEATH, 0)
+
+        self.x[i], self.y[i], self.x_vel[i], self.y_vel[i], self.jump_timer[i] = x, y, x_vel, y_vel, jump_timer
+        self.jump_mode[i], self.climb_mode[i], self.stood[i] = jump_mode, climb_mode, stood
+        self.time[i], self.frame[i], self.best_x[i] = t, frame, self.best_x[i] + progress
+        self.won[i], self.died[i] = won, died
+
+    def move_axes(self, i): # Axe.logic, the ones under the camera are gone
+        r, slot = np.nonzero(self.axe_on[i])
+        c = i[r]
+        self.axe_x[c, slot] -= self.axe_speed[c, slot]*self.frame_time
+        self.axe_y_vel[c, slot] += self.axe.y_speed
+        self.axe_y[c, slot] += self.axe_y_vel[c, slot]*self.frame_time
+        self.axe_on[c, slot] = self.axe_y[c, slot] - self.camera_y[c] <= self.height
+
+    def throw_axes(self, c, x, y, x_distance_to_player): # new axes for copies c, they move from the next frame
+        sort = np.argsort(c, kind="stable")
+        c, x, y, x_distance_to_player = c[sort], x[sort], y[sort], x_distance_to_player[sort]
+        index = np.arange(len(c))
+        first = np.concatenate(([True], c[1:] != c[:-1]))
+        rank = index - np.maximum.accumulate(np.where(first, index, 0))
+        slot = (self.axe_next[c] + rank) % AXES
+        np.add.at(self.axe_next, c, 1)
+        self.axe_x[c, slot], self.axe_y[c, slot] = x, y
+        self.axe_speed[c, slot] = np.clip(-x_distance_to_player/700, -0.5, 0.5) # like Axe.__init__
+        self.axe_y_vel[c, slot] = self.axe.y_vel
+        self.axe_on[c, slot] = True
+
+    def rect_pairs(self, low, high, rows): # rows and the rects whose bounds start between low, less how wide they are, and high
+        pair_row, pair_rect = pairs(self.rect_left, self.rect_order, low - self.rect_reach, high, rows)
+        if len(self.wide):
+            wide_row, wide_rect = np.repeat(rows, len(self.wide)), np.tile(self.wide, len(rows))
+            keep = self.bounds[wide_rect,0] < np.repeat(high, len(self.wide))
+            pair_row, pair_rect = np.concatenate((pair_row, wide_row[keep])), np.concatenate((pair_rect, wide_rect[keep]))
+        return pair_row, pair_rect
+
+    def rects_at(self, j, t): # where rects j are at level times t, and how fast they move, like MovingCollisionRect.update_to
+        x, y = self.rx[j], self.ry[j]
+        x_vel, y_vel = np.zeros(len(j)), np.zeros(len(j))
+        m = self.moving[j]
+        if m.any():
+            k = j[m]
+            distance = self.distance[k]
+            travelled = np.remainder(t[m] * self.speed[k], 2 * distance)
+            way = np.where(travelled < distance, 1, -1)
+            travelled = np.where(way == -1, 2 * distance - travelled, travelled)
+            x, y = x.copy(), y.copy()
+            x[m] = self.start_x[k] + self.x_normalized[k] * travelled
+            y[m] = self.start_y[k] + self.y_normalized[k] * travelled
+            x_vel[m] = self.x_normalized[k] * self.speed[k] * way
+            y_vel[m] = self.y_normalized[k] * self.speed[k] * way
+        return x, y, x_vel, y_vel
+
+    def climbable(self, x, y): # Player.allowed_to_climb
+        w, h = self.player_width, self.player_height
+        r, c = pairs(self.climb_left, self.climb_order, x - self.climb_reach, x + w, np.arange(len(x)))
+        cr = self.climbing[c]
+        hit = (x[r] < cr[:,0]+cr[:,2]) & (y[r]+h > cr[:,1]) & (y[r] < cr[:,1]+cr[:,3])
+        allowed = np.zeros(len(x), dtype=bool)
+        allowed[r[hit]] = True
+        return allowed
+
+    def move_camera(self, i, x, y): # Camera.play_logic
+        ft = self.frame_time
+        cx, cy, offset = self.camera_x[i], self.camera_y[i], self.camera_offset[i]
+        x_increase = ((x + self.player_width/2 + offset - self.width/2 - cx)/300) * ft
+        offset = np.clip(offset + x_increase/3, -self.width*0.1, self.width*0.1)
+        blocked = self.camera_blocked(cx + x_increase, cy)
+        cx = np.where(blocked, cx, cx + x_increase)
+        y_increase = (((y + self.player_height/2) - self.height/2 - cy)/150) * ft
+        blocked = self.camera_blocked(cx, cy + y_increase)
+        cy = np.where(blocked, cy, cy + y_increase)
+        self.camera_x[i], self.camera_y[i], self.camera_offset[i] = cx, cy, offset
+
+    def camera_blocked(self, cx, cy):
+        blocked = np.zeros(len(cx), dtype=bool)
+        for x1, y1, x2, y2 in self.camera_lines:
+            blocked |= line_in_rects(x1, y1, x2, y2, cx, cy, self.width, self.height)
+        return blocked
+
+class KeyInput: # the keys of one copy's actions, for playing them in a real game
+    keys = (pygame.K_RIGHT, pygame.K_LEFT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE)
+    def __init__(self):
+        self.keys_state = main.KeyState()
+
+    def update(self, g, action):
+        held = set(key for key, on in zip(self.keys, action) if on)
+        new = held - self.keys_state.keys
+        self.keys_state.keys = held
+        g.space_pressed_this_frame = pygame.K_SPACE in new
+        g.up_pressed_this_frame = pygame.K_UP in new
+        g.down_pressed_this_frame = pygame.K_DOWN in new
+
+def compare(objects, actions, frame_time=FRAME_TIME): # biggest distance between the player of one copy and of a real game given the same actions
+    env = BatchedEnv(objects, 1, frame_time, len(actions))
+    g = level_game(objects)
+    g.frame_time = frame_time
+    keys = KeyInput()
+    g.input_keys = keys.keys_state
+    worst = 0
+    for frame, action in enumerate(actions):
+        keys.update(g, action)
+        g.do_game_logic()
+        env.step(action[None])
+        worst = max(worst, abs(g.player.x - env.x[0]), abs(g.player.y - env.y[0]))
+        if env.done[0] or not isinstance(g.game_stopping_animation, (type(None), main.GameStoppingAnimationPlayerInPipe)):
+            return worst, frame + 1
+    return worst, len(actions)
+
+def random_actions(rng, actions, change=1/30): # every copy holds its keys for a while, mostly running right and jumping
+    redraw = rng.random(len(actions)) < change
+    k = int(redraw.sum())
+    direction = rng.random(k)
+    fresh = np.zeros((k, ACTIONS), dtype=bool)
+    fresh[:,ACTION_RIGHT] = direction < 0.65
+    fresh[:,ACTION_LEFT] = (direction >= 0.65) & (direction < 0.9)
+    fresh[:,ACTION_SPACE] = rng.random(k) < 0.5
+    fresh[:,ACTION_UP] = rng.random(k) < 0.15
+    fresh[:,ACTION_DOWN] = rng.random(k) < 0.1
+    actions[redraw] = fresh
+    return actions
+
+def run(): # multi_env.py [level path] [copies] [steps]
+    path = sys.argv[1] if len(sys.argv) > 1 else "level1.pickle"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    steps = int(sys.argv[3]) if len(sys.argv) > 3 else 600
+    pygame.init()
+    objects = load_level(path)
+    rng = np.random.default_rng(0)
+
+    start = time.perf_counter()
+    env = BatchedEnv(objects, n)
+    setup = time.perf_counter() - start
+    actions = random_actions(rng, np.zeros((n, ACTIONS), dtype=bool), 1)
+    episodes = wins = deaths = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        rewards, done = env.step(random_actions(rng, actions))
+        episodes += int(done.sum())
+        wins += int(env.won.sum())
+        deaths += int(env.died.sum())
+    elapsed = time.perf_counter() - start
+    print(f"{path}: {n} copies, set up in {setup:.2f} s, {n*steps/elapsed:,.0f} env-steps/s")
+    print(f"  {episodes} episodes ended, {wins} won, {deaths} died")
+
+    held = random_actions(rng, np.zeros((1, ACTIONS), dtype=bool), 1)
+    script = [random_actions(rng, held)[0].copy() for _ in range(steps)]
+    worst, frames = compare(objects, script)
+    print(f"  first {frames} frames of one copy against the game: {worst:.6f} px apart at most")
+    pygame.quit()
+
+if __name__ == "__main__":
+    run()
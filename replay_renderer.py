@@ -0,0 +1,123 @@
+import os, sys, io, time, pickle, zlib, contextlib
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # runs without a window
+from multiprocessing import Pool, cpu_count
+import pygame
+import main
+
+# Renders a session recorded with R in the game to numbered images, for trailers and for comparing against a baseline.
+# The session has the input of every frame and a snapshot every main.RECORDING_CHECKPOINT frames. The frames from one
+# snapshot to the next are a segment, which a worker process plays back and draws on its own, so segments render in
+# parallel. A worker that reaches the next snapshot compares the game with it, to catch a replay that went a different way.
+
+def load_session(path):
+    with open(path, "rb") as f:
+        if f.read(len(main.RECORDING_MAGIC)) != main.RECORDING_MAGIC:
+            raise ValueError(path + " is not a recorded session")
+        return pickle.loads(zlib.decompress(f.read()))
+
+def newest_session(directory=main.RECORDING_DIR):
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".rec")) if os.path.isdir(directory) else []
+    return os.path.join(directory, names[-1]) if names else None
+
+def segments(session): # (checkpoint, first frame, frame after the last) of every stretch between snapshots
+    checkpoints = session["checkpoints"]
+    count = len(session["frames"]) // main.RECORDING_FRAME.size
+    found = []
+    for i, checkpoint in enumerate(checkpoints):
+        end = checkpoints[i+1][0] if i+1 < len(checkpoints) else count
+        if end > checkpoint[0]:
+            found.append((i, checkpoint[0], end))
+    return found
+
+class ReplayGame(main.Game): # levels come from the session, as they were when it was recorded
+    def __init__(self, levels, **kwargs):
+        self.levels = levels
+        super().__init__(**kwargs)
+
+    def load_saved_object_state(self):
+        if self.level in self.levels:
+            self.level_cache[self.level] = self.levels[self.level]
+        super().load_saved_object_state()
+        self.ghost_recorder.start(False) # a replay must not save its win as a ghost
+
+def replay_game(session):
+    with contextlib.redirect_stdout(io.StringIO()): # the camera prints its edit options
+        g = ReplayGame(session["levels"], start=False)
+    g.show_ghosts = False # they depend on what's in the ghost folder now
+    g.load_ghosts()
+    g.quality.enabled = False # the recorded levels are used instead
+    g.render_mode = session["render_mode"]
+    g.use_enemy_engine(session["enemy_engine"])
+    g.input_keys = main.KeyState()
+    return g
+
+def play_frame(g, frames, index): # the logic of a frame with its recorded input
+    frame_time, held, pressed, quality = main.RECORDING_FRAME.unpack_from(frames, index * main.RECORDING_FRAME.size)
+    g.frame_time = frame_time
+    g.input_keys.keys = {keys[0] for bit, keys in enumerate(main.RECORDING_KEYS) if held & 1 << bit}
+    g.space_pressed_this_frame = bool(pressed & 1)
+    g.up_pressed_this_frame = bool(pressed & 2)
+    g.down_pressed_this_frame = bool(pressed & 4)
+    g.quality.level = quality
+    with contextlib.redirect_stdout(io.StringIO()): # the player prints when it dies
+        g.do_game_logic()
+
+def render_segment(job): # in a worker: (session path, segment, output pattern, every nth frame)
+    path, (checkpoint, first, end), pattern, step = job
+    begin = time.perf_counter()
+    pygame.init()
+    session = load_session(path)
+    g = replay_game(session)
+    frame, snapshot, numpy_state, played = session["checkpoints"][checkpoint]
+    g.restore(snapshot)
+    if numpy_state != None:
+        main.np.random.set_state(numpy_state)
+    drawn = 0
+    for index in range(first, end):
+        play_frame(g, session["frames"], index)
+        if index % step == 0:
+            g.do_game_drawing()
+            pygame.image.save(g.screen, pattern % index)
+            drawn += 1
+    drift = None # how far the player ended up from where the recording has it
+    if checkpoint+1 < len(session["checkpoints"]) and session["checkpoints"][checkpoint+1][3]:
+        state = pickle.loads(zlib.decompress(session["checkpoints"][checkpoint+1][1]))
+        player = state["player"]
+        drift = 1e9 if state["level"] != g.level else max(abs(player.x - g.player.x), abs(player.y - g.player.y))
+    pygame.quit() # SDL's signal handlers would keep the pool from stopping the worker
+    return checkpoint, drawn, time.perf_counter() - begin, drift
+
+def run(): # replay_renderer.py [session, the newest one] [output dir] [workers] [every nth frame] [image format]
+    path = sys.argv[1] if len(sys.argv) > 1 else newest_session()
+    output = sys.argv[2] if len(sys.argv) > 2 else "frames"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else cpu_count()
+    step = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    extension = sys.argv[5] if len(sys.argv) > 5 else "png" # writing a png takes most of a frame, tga is lossless too and far quicker
+    if path == None:
+        print("no recorded session, R in the game records one")
+        return
+    session = load_session(path)
+    frames = len(session["frames"]) // main.RECORDING_FRAME.size
+    played = sum(main.RECORDING_FRAME.unpack_from(session["frames"], i * main.RECORDING_FRAME.size)[0] for i in range(frames)) / 1000
+    os.makedirs(output, exist_ok=True)
+    pattern = os.path.join(output, "frame_%06d." + extension)
+    jobs = [(path, segment, pattern, step) for segment in segments(session)]
+    jobs.sort(key=lambda job: job[1][1] - job[1][2]) # longest first, so no long one is left for the end
+    print(f"{path}: {frames} frames, {played:.1f} s of play, {len(jobs)} segments on {workers} workers")
+    begin = time.perf_counter()
+    drawn = 0
+    drifted = []
+    with Pool(workers) as pool:
+        for checkpoint, count, seconds, drift in pool.imap_unordered(render_segment, jobs):
+            drawn += count
+            if drift != None and drift > 0.5:
+                drifted.append((checkpoint, drift))
+    elapsed = time.perf_counter() - begin
+    print(f"{drawn} images in {output} in {elapsed:.1f} s, {drawn/elapsed:.0f} per s, {elapsed/max(played, 1e-9):.2f}x real time")
+    for checkpoint, drift in sorted(drifted):
+        print(f"  segment {checkpoint} ended {drift:.1f} px from the recording")
+    if not drifted:
+        print("  every segment ended where the recording did")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,237 @@
+import io, sys, pickle, tracemalloc
+from multiprocessing import Pool, shared_memory
+import numpy as np
+import main
+
+# Static level geometry in one shared memory block, so parallel simulations don't each keep their own copy.
+# Plain collision rects, pipes, climbing rects, camera lines and coins become rows of float64 tables. Workers attach to
+# the block and get small proxy objects that read their fields straight from it, a coin that's picked up just leaves
+# the worker's list. Everything that changes while playing (enemies, flags, moving and itemized rects) is pickled
+# into the block as well, and every worker unpickles its own copy of that.
+
+RECT_COLUMNS = 7 # x, y, width, height, r, g, b
+PIPE_COLUMNS = 9 # and teleport x, y
+LINE_COLUMNS = 4 # start x, y, end x, y
+COIN_COLUMNS = 6 # x, y, radius, r, g, b
+
+class SharedRect: # geometry of a rect, read from the shared block
+    __slots__ = ("data", "base") # no __dict__, a proxy is just these two references
+    def __init__(self, data, base):
+        self.data = data
+        self.base = base
+    x = property(lambda self: self.data[self.base])
+    y = property(lambda self: self.data[self.base+1])
+    width = property(lambda self: self.data[self.base+2])
+    height = property(lambda self: self.data[self.base+3])
+    color = property(lambda self: (int(self.data[self.base+4]), int(self.data[self.base+5]), int(self.data[self.base+6])))
+
+# the proxies take the game's methods instead of subclassing, a subclass of a class without __slots__ gets a __dict__ anyway
+# pickling, for snapshots, turns them back into regular objects
+class SharedCollisionRect(SharedRect):
+    __slots__ = ()
+    logic = main.CollisionRect.logic
+    got_hit = main.CollisionRect.got_hit
+    draw = main.CollisionRect.draw
+    add_sprites = main.CollisionRect.add_sprites
+    def __reduce__(self):
+        return (main.CollisionRect, (self.x, self.y, self.width, self.height, self.color))
+
+class SharedClimbingRect(SharedCollisionRect):
+    __slots__ = ()
+    draw = main.ClimbingRect.draw
+    add_sprites = main.ClimbingRect.add_sprites
+    def __reduce__(self):
+        return (main.ClimbingRect, (self.x, self.y, self.width, self.height))
+
+class SharedPipe(SharedCollisionRect):
+    __slots__ = ()
+    draw = main.Pipe.draw
+    add_sprites = main.Pipe.add_sprites
+    teleport_pos = property(lambda self: (self.data[self.base+7], self.data[self.base+8]))
+    def __reduce__(self): # a Pipe gets its color from a color value, so the state is set directly
+        state = {"x":self.x, "y":self.y, "width":self.width, "height":self.height, "color":self.color, "teleport_pos":self.teleport_pos}
+        return (main.Pipe.__new__, (main.Pipe,), state)
+
+class SharedCameraLine:
+    __slots__ = ("data", "base")
+    def __init__(self, data, base):
+        self.data = data
+        self.base = base
+    start_pos = property(lambda self: (self.data[self.base], self.data[self.base+1]))
+    end_pos = property(lambda self: (self.data[self.base+2], self.data[self.base+3]))
+    draw = main.CameraLine.draw
+    def __reduce__(self):
+        return (main.CameraLine, (self.start_pos, self.end_pos))
+
+class SharedCoin:
+    __slots__ = ("data", "base")
+    def __init__(self, data, base):
+        self.data = data
+        self.base = base
+    x = property(lambda self: self.data[self.base])
+    y = property(lambda self: self.data[self.base+1])
+    radius = property(lambda self: int(self.data[self.base+2]))
+    color = property(lambda self: (int(self.data[self.base+3]), int(self.data[self.base+4]), int(self.data[self.base+5])))
+    draw = main.Coin.draw
+    add_sprites = main.Coin.add_sprites
+    got_picked_up = main.Coin.got_picked_up
+    def __reduce__(self): # a Coin is made from a grid cell, so the state is set directly
+        return (main.Coin.__new__, (main.Coin,), {"x":self.x, "y":self.y, "radius":self.radius, "color":self.color})
+
+PROXIES = {"collision_rects":SharedCollisionRect, "climbing_rects":SharedClimbingRect, "pipes":SharedPipe,
+           "camera_lines":SharedCameraLine, "coins":SharedCoin}
+OBJECT_MAPPINGS = {proxy:category for category, proxy in PROXIES.items()}
+
+def static_objects(objects): # what can be shared, everything else stays regular objects
+    return {"collision_rects":[r for r in objects["collision_rects"] if type(r) == main.CollisionRect],
+            "climbing_rects":[r for r in objects["climbing_rects"] if type(r) == main.ClimbingRect],
+            "pipes":[p for p in objects["pipes"] if type(p) == main.Pipe],
+            "camera_lines":[cl for cl in objects["camera_lines"] if type(cl) == main.CameraLine],
+            "coins":[c for c in objects["coins"] if type(c) == main.Coin]}
+
+def rect_rows(rects):
+    return [(r.x, r.y, r.width, r.height) + tuple(r.color) for r in rects]
+
+def attach_memory(name): # the owner unlinks the block, attaching doesn't track it
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # python 3.13
+    except TypeError: # workers started by multiprocessing share the owner's resource tracker, so this is the same
+        return shared_memory.SharedMemory(name=name)
+
+class SharedLevel:
+    def __init__(self, memory, layout, owner):
+        self.memory = memory
+        self.layout = layout # (block name, {table: (offset, rows, columns)}, offset and size of the pickled rest)
+        self.owner = owner
+        floats = memory.buf[:layout[2]]
+        self.data = floats.cast("d")
+        floats.release()
+
+    @classmethod
+    def create(cls, objects):
+        static = static_objects(objects)
+        tables = {"collision_rects":np.array(rect_rows(static["collision_rects"]), dtype=np.float64).reshape(-1, RECT_COLUMNS),
+                  "climbing_rects":np.array(rect_rows(static["climbing_rects"]), dtype=np.float64).reshape(-1, RECT_COLUMNS),
+                  "pipes":np.array([(p.x, p.y, p.width, p.height) + tuple(p.color) + tuple(p.teleport_pos) for p in static["pipes"]],
+                                   dtype=np.float64).reshape(-1, PIPE_COLUMNS),
+                  "camera_lines":np.array([tuple(cl.start_pos) + tuple(cl.end_pos) for cl in static["camera_lines"]],
+                                          dtype=np.float64).reshape(-1, LINE_COLUMNS),
+                  "coins":np.array([(c.x, c.y, c.radius) + tuple(c.color) for c in static["coins"]], dtype=np.float64).reshape(-1, COIN_COLUMNS)}
+        shared = {category:set(map(id, objs)) for category, objs in static.items()}
+        rest = {} # per category the objects that aren't shared, with their places in the level order
+        for category, objs in objects.items():
+            places = [i for i, obj in enumerate(objs) if id(obj) not in shared.get(category, ())]
+            rest[category] = (places, [objs[i] for i in places])
+        rest_bytes = pickle.dumps(rest, pickle.HIGHEST_PROTOCOL)
+
+        offsets = {}
+        offset = 0 # in float64s
+        for category, table in tables.items():
+            offsets[category] = (offset, table.shape[0], table.shape[1])
+            offset += table.size
+        memory = shared_memory.SharedMemory(create=True, size=max(1, offset*8 + len(rest_bytes)))
+        floats = np.ndarray(offset, dtype=np.float64, buffer=memory.buf)
+        for category, table in tables.items():
+            start, rows, columns = offsets[category]
+            floats[start:start + rows*columns] = table.reshape(-1)
+        memory.buf[offset*8:offset*8 + len(rest_bytes)] = rest_bytes
+        del floats
+        return cls(memory, (memory.name, offsets, offset*8, len(rest_bytes)), True)
+
+    @classmethod
+    def attach(cls, layout):
+        return cls(attach_memory(layout[0]), layout, False)
+
+    def table(self, category): # numpy view of a table, for vectorized code
+        start, rows, columns = self.layout[1][category]
+        return np.ndarray((rows, columns), dtype=np.float64, buffer=self.memory.buf, offset=start*8)
+
+    def rest(self): # a fresh copy of what isn't shared, per category (places in the level order, objects)
+        rest_offset, rest_size = self.layout[2], self.layout[3]
+        return main.LevelUnpickler(io.BytesIO(self.memory.buf[rest_offset:rest_offset + rest_size])).load()
+
+    def objects(self): # a level objects dict of its own: proxies for the shared geometry and a fresh copy of the rest
+        offsets = self.layout[1]
+        objects = {}
+        for category, (places, objs) in self.rest().items():
+            if category not in offsets:
+                objects[category] = objs
+                continue
+            start, rows, columns = offsets[category]
+            proxy = PROXIES[category]
+            merged = []
+            row = 0
+            for place, obj in zip(places, objs): # shared rows fill the places in between, so the level order stays the same
+                while len(merged) < place:
+                    merged.append(proxy(self.data, start + row*columns))
+                    row += 1
+                merged.append(obj)
+            merged.extend(proxy(self.data, start + i*columns) for i in range(row, rows))
+            objects[category] = merged
+        return objects
+
+    def load_into(self, g):
+        g.object_mappings.update(OBJECT_MAPPINGS)
+        g.set_objects(self.objects())
+
+    def close(self):
+        self.data.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+class SharedLevelGame(main.Game): # a game in a worker process, the levels in shared_levels come from their blocks
+    def __init__(self, shared_levels, **kwargs):
+        self.shared_levels = shared_levels # level number: SharedLevel
+        super().__init__(**kwargs)
+
+    def load_saved_object_state(self):
+        level = self.shared_levels.get(self.level)
+        if level == None:
+            return super().load_saved_object_state()
+        self.game_stopping_animation = None
+        self.player.visible = True
+        level.load_into(self)
+        self.schedule_level_tasks()
+
+def level_memory(load): # python memory a level takes in this process
+    tracemalloc.start()
+    objects = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, sum(len(objs) for objs in objects.values())
+
+def measure_pickle(path):
+    def load():
+        with open(path, "rb") as f:
+            return main.LevelUnpickler(f).load()
+    return level_memory(load)
+
+def measure_shared(layout): # the whole attached level, and the part of it that's the unshared rest
+    level = SharedLevel.attach(layout)
+    result = level_memory(level.objects)
+    rest = level_memory(lambda: {category:objs for category, (places, objs) in level.rest().items()})
+    level.close()
+    return result, rest
+
+def run(): # shared_geometry.py [level path] [workers]
+    path = sys.argv[1] if len(sys.argv) > 1 else "level2.pickle"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with open(path, "rb") as f:
+        objects = main.LevelUnpickler(f).load()
+    level = SharedLevel.create(objects)
+    try:
+        with Pool(workers) as pool:
+            full = pool.map(measure_pickle, [path]*workers)
+            shared = pool.map(measure_shared, [level.layout]*workers)
+    finally:
+        level.close()
+    full_size, count = full[0]
+    (shared_size, count), (rest_size, rest_count) = shared[0]
+    print(f"{path}: {count} objects, {count - rest_count} of them shared, shared block {level.memory.size/1024:.0f} kB")
+    print(f"  per worker: unpickled level {full_size/1024:.0f} kB, attached {shared_size/1024:.0f} kB ({shared_size/full_size:.0%})")
+    print(f"  of that the unshared objects {rest_size/1024:.0f} kB, the proxies {(shared_size - rest_size)/1024:.0f} kB"
+          f" ({(shared_size - rest_size)/max(count - rest_count, 1):.0f} B each)")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,163 @@
+import os, sys, time, random, csv, tracemalloc
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # runs without a window
+
+import pygame
+import main
+
+# Plays the levels for a long time with random input at a fixed frame time, as fast as the computer can, and
+# samples what the game keeps in memory. Anything whose last quarter of samples is all above its first quarter,
+# after the first samples are left out as warm up, is reported as unbounded growth.
+
+FRAME_TIME = 1000 / 60
+SAMPLE_INTERVAL = 10000 # ms of game time
+DRAW_EVERY = 10 # frames, drawing is only here so the caches get used
+WARM_UP = 0.1 # part of the run not judged
+GROWTH_TOLERANCE = 0.05 # how far the last quarter may go over the first one
+GROWTH_MIN = 2 # and by how much at least, so small counts can wobble
+MEMORY_GROWTH_MIN = 1024*1024 # bytes, the interpreter's own caches creep up by a few kB over hours
+MEMORY_COLUMNS = ("traced_memory", "rss")
+
+class SoakGame(main.Game):
+    def load_new_level(self, way=1): # after the last level comes the first one
+        if not os.path.exists("level"+str(self.level+way)+".pickle"):
+            way = -self.level
+        super().load_new_level(way)
+
+class RandomInput: # holds keys for a while, mostly running right and jumping
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.keys = main.KeyState()
+        self.hold = 0
+
+    def update(self, g):
+        g.space_pressed_this_frame = False
+        g.up_pressed_this_frame = False
+        g.down_pressed_this_frame = False
+        self.hold -= 1
+        if self.hold > 0:
+            return
+        rng = self.rng
+        self.hold = rng.randint(10, 60)
+        before = set(self.keys.keys)
+        self.keys.keys = set()
+        direction = rng.random()
+        if direction < 0.65:
+            self.keys.keys.add(pygame.K_RIGHT)
+        elif direction < 0.9:
+            self.keys.keys.add(pygame.K_LEFT)
+        for key, chance in ((pygame.K_SPACE, 0.5), (pygame.K_UP, 0.15), (pygame.K_DOWN, 0.1)):
+            if rng.random() < chance:
+                self.keys.keys.add(key)
+        new = self.keys.keys - before
+        g.space_pressed_this_frame = pygame.K_SPACE in new
+        g.up_pressed_this_frame = pygame.K_UP in new
+        g.down_pressed_this_frame = pygame.K_DOWN in new
+
+class ScriptedInput: # repeats a script like "right:120,left+space:30", key names as pygame.key.key_code knows them
+    def __init__(self, script):
+        self.steps = []
+        for step in script.split(","):
+            names, frames = step.split(":")
+            self.steps.append((set(pygame.key.key_code(name) for name in names.split("+")), int(frames)))
+        self.keys = main.KeyState()
+        self.step = -1
+        self.hold = 0
+
+    def update(self, g):
+        self.hold -= 1
+        if self.hold > 0:
+            g.space_pressed_this_frame = g.up_pressed_this_frame = g.down_pressed_this_frame = False
+            return
+        self.step = (self.step + 1) % len(self.steps)
+        keys, self.hold = self.steps[self.step]
+        new = keys - self.keys.keys
+        self.keys.keys = set(keys)
+        g.space_pressed_this_frame = pygame.K_SPACE in new
+        g.up_pressed_this_frame = pygame.K_UP in new
+        g.down_pressed_this_frame = pygame.K_DOWN in new
+
+def rss(): # resident memory in bytes, 0 where it can't be read
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def traced_memory(): # python allocations of the game, without the samples kept here
+    snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)))
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+def sample(g, game_time, trace):
+    row = {"game_time":int(game_time), "level":g.level}
+    for category, objs in g.objects.items():
+        row[category] = len(objs)
+    row["objects_to_add"] = len(g.objects_to_add)
+    row["sprite_cache"] = len(g.sprite_cache.surfaces)
+    row["text_cache"] = len(g.text_cache.surfaces)
+    row["tasks"] = len(g.scheduler.tasks)
+    row["traced_memory"] = traced_memory() if trace else 0
+    row["rss"] = rss()
+    return row
+
+def growing(values, minimum): # the lowest value of the last quarter is above the highest of the first one
+    quarter = len(values) // 4
+    if quarter == 0:
+        return False
+    first, last = values[:quarter], values[-quarter:]
+    return min(last) > max(first) * (1 + GROWTH_TOLERANCE) and min(last) - max(first) >= minimum
+
+def verdict(rows):
+    judged = rows[int(len(rows) * WARM_UP):]
+    columns = [c for c in rows[0] if c not in ("game_time", "level")]
+    return [c for c in columns if growing([row[c] for row in judged], MEMORY_GROWTH_MIN if c in MEMORY_COLUMNS else GROWTH_MIN)]
+
+def soak(minutes, seed=0, path="soak.csv", script=None, trace=True):
+    random.seed(seed)
+    pygame.init()
+    g = SoakGame(start=False)
+    g.render_mode = main.RENDER_BATCHED
+    g.analyze_on_save = False
+    player_input = RandomInput(seed) if script == None else ScriptedInput(script)
+    g.input_keys = player_input.keys
+    if trace:
+        tracemalloc.start()
+    frames = int(minutes * 60000 / FRAME_TIME)
+    rows = []
+    next_sample = 0
+    start = time.perf_counter()
+    for frame in range(frames):
+        game_time = frame * FRAME_TIME
+        player_input.update(g)
+        g.frame_time = FRAME_TIME
+        g.do_game_logic()
+        if frame % DRAW_EVERY == 0:
+            g.do_game_drawing()
+        g.scheduler.run(time.perf_counter() + 0.001)
+        if game_time >= next_sample:
+            rows.append(sample(g, game_time, trace))
+            next_sample += SAMPLE_INTERVAL
+    elapsed = time.perf_counter() - start
+    if trace:
+        tracemalloc.stop()
+    pygame.quit()
+
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    grown = verdict(rows)
+    print(f"{minutes} minutes of play in {elapsed:.0f} s ({minutes*60/elapsed:.0f}x), {len(rows)} samples in {path}")
+    for column in grown:
+        print("  unbounded growth: " + column + " " + str(rows[int(len(rows)*WARM_UP)][column]) + " -> " + str(rows[-1][column]))
+    print("FAIL" if grown else "PASS")
+    return not grown
+
+def run(): # soak_test.py [minutes] [seed] [csv path] [input script], random input without a script
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    path = sys.argv[3] if len(sys.argv) > 3 else "soak.csv"
+    script = sys.argv[4] if len(sys.argv) > 4 else None
+    sys.exit(0 if soak(minutes, seed, path, script) else 1)
+
+if __name__ == "__main__":
+    run()
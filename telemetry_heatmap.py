@@ -0,0 +1,138 @@
+import os, sys, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # runs without a window
+import numpy as np
+import pygame
+import main
+
+# Bins telemetry events into heatmaps, per level and event kind. Files are read a chunk of records at a time and every
+# chunk is added to square tiles of counts, so memory depends on how much of a level events happened in, not on how
+# many there were. Past MAX_TILES, events in new tiles are only counted as dropped. The editor shows these as overlays
+# (H in edit mode), run as a script it writes them out as images.
+
+CELL = 30 # px of the level per heatmap cell, the editor grid
+TILE = 64 # cells per side of a tile
+MAX_TILES = 1024 # 16 MB of counts
+CHUNK = 65536 # records read at a time
+RECORD = np.dtype([("kind","u1"),("level","u1"),("value","<u2"),("time","<u4"),("x","<f4"),("y","<f4")]) # like main.TELEMETRY_RECORD
+
+class HeatmapAggregator:
+    def __init__(self, cell=CELL):
+        self.cell = cell
+        self.tiles = {} # (level, kind, tile x, tile y): counts, indexed [cell y, cell x]
+        self.totals = {} # (level, kind): events
+        self.events = 0
+        self.dropped = 0
+        self.version = 0 # goes up with every chunk, for whoever caches what it drew
+
+    def add(self, records):
+        cx = np.floor(records["x"] / self.cell).astype(np.int64)
+        cy = np.floor(records["y"] / self.cell).astype(np.int64)
+        # one number per record for its level, kind and tile, tiles are less than 2**19 away from 0 either way
+        tx, ty = cx // TILE, cy // TILE
+        inside = (cy - ty*TILE) * TILE + (cx - tx*TILE)
+        keys = ((records["level"].astype(np.int64) * 256 + records["kind"]) << 40) + ((tx + (1 << 19)) << 20) + (ty + (1 << 19))
+        unique, group = np.unique(keys, return_inverse=True)
+        order = np.argsort(group, kind="stable")
+        bounds = np.searchsorted(group[order], np.arange(len(unique) + 1))
+        for g, key in enumerate(unique.tolist()):
+            members = order[bounds[g]:bounds[g+1]]
+            key = (key >> 48, (key >> 40) & 0xff, ((key >> 20) & 0xfffff) - (1 << 19), (key & 0xfffff) - (1 << 19))
+            counts = self.tiles.get(key)
+            if counts is None:
+                if len(self.tiles) >= MAX_TILES:
+                    self.dropped += len(members)
+                    continue
+                counts = self.tiles[key] = np.zeros((TILE, TILE), dtype=np.uint32)
+            counts += np.bincount(inside[members], minlength=TILE*TILE).reshape(TILE, TILE).astype(np.uint32)
+            self.totals[key[:2]] = self.totals.get(key[:2], 0) + len(members)
+        self.events += len(records)
+        self.version += 1
+
+    def read_task(self, paths): # a generator that adds a chunk per step, for the game's task scheduler
+        size = RECORD.itemsize
+        for path in paths:
+            with open(path, "rb") as f:
+                if f.read(len(main.TELEMETRY_MAGIC)) != main.TELEMETRY_MAGIC:
+                    continue
+                while True:
+                    data = f.read(CHUNK * size)
+                    whole = len(data) - len(data) % size # a file still being written can end in part of a record
+                    if whole:
+                        self.add(np.frombuffer(data[:whole], dtype=RECORD))
+                        yield
+                    if len(data) < CHUNK * size:
+                        break
+
+    def read(self, paths):
+        for _ in self.read_task(paths):
+            pass
+
+    def cells(self, level, kind, cx, cy, width, height): # counts of a block of cells, indexed [y, x]
+        counts = np.zeros((height, width), dtype=np.uint32)
+        for tx in range(cx // TILE, (cx + width - 1) // TILE + 1):
+            for ty in range(cy // TILE, (cy + height - 1) // TILE + 1):
+                tile = self.tiles.get((level, kind, tx, ty))
+                if tile is None:
+                    continue
+                x0, y0 = max(cx, tx*TILE), max(cy, ty*TILE)
+                x1, y1 = min(cx + width, (tx+1)*TILE), min(cy + height, (ty+1)*TILE)
+                counts[y0-cy:y1-cy, x0-cx:x1-cx] = tile[y0-ty*TILE:y1-ty*TILE, x0-tx*TILE:x1-tx*TILE]
+        return counts
+
+    def extent(self, level, kind): # first cell and size in cells of the tiles with counts, None without any
+        keys = [(tx, ty) for (l, k, tx, ty) in self.tiles if l == level and k == kind]
+        if not keys:
+            return None
+        xs, ys = [k[0] for k in keys], [k[1] for k in keys]
+        return min(xs)*TILE, min(ys)*TILE, (max(xs) - min(xs) + 1)*TILE, (max(ys) - min(ys) + 1)*TILE
+
+    def hottest(self, level, kind, n=3): # (count, level x, level y) of the cells with the most events
+        found = []
+        for (l, k, tx, ty), tile in self.tiles.items():
+            if l == level and k == kind:
+                for i in np.argsort(tile, axis=None)[::-1][:n]:
+                    if tile.flat[i]:
+                        y, x = divmod(int(i), TILE)
+                        found.append((int(tile.flat[i]), (tx*TILE + x + 0.5)*self.cell, (ty*TILE + y + 0.5)*self.cell))
+        return sorted(found, reverse=True)[:n]
+
+def colors(counts): # black where nothing happened, then blue to red to yellow on a log scale
+    heat = np.log1p(counts.astype(np.float64))
+    heat /= max(heat.max(), 1e-9)
+    rgb = np.zeros(counts.shape + (3,), dtype=np.uint8)
+    rgb[...,0] = np.clip(heat*2, 0, 1) * 255
+    rgb[...,1] = np.clip(heat*2 - 1, 0, 1) * 255
+    rgb[...,2] = np.clip(1 - heat*2, 0, 1) * 255 * (counts > 0)
+    rgb[counts > 0] = np.maximum(rgb[counts > 0], 1) # so only empty cells are the color key
+    return rgb
+
+def surface(counts): # a cell per pixel, empty cells are transparent
+    s = pygame.surfarray.make_surface(colors(counts).transpose(1, 0, 2))
+    s.set_colorkey((0,0,0))
+    return s
+
+def telemetry_paths(directory=main.TELEMETRY_DIR):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".tel"))
+
+def run(): # telemetry_heatmap.py [telemetry dir] [output dir], an image per level and event kind
+    directory = sys.argv[1] if len(sys.argv) > 1 else main.TELEMETRY_DIR
+    output = sys.argv[2] if len(sys.argv) > 2 else "heatmaps"
+    paths = telemetry_paths(directory)
+    start = time.perf_counter()
+    aggregator = HeatmapAggregator()
+    aggregator.read(paths)
+    elapsed = time.perf_counter() - start
+    print(f"{aggregator.events:,} events from {len(paths)} files in {elapsed:.2f} s, {len(aggregator.tiles)} tiles, {aggregator.dropped} dropped")
+    os.makedirs(output, exist_ok=True)
+    for level, kind in sorted(aggregator.totals):
+        cx, cy, width, height = aggregator.extent(level, kind)
+        image = surface(aggregator.cells(level, kind, cx, cy, width, height))
+        name = "level" + str(level) + "_" + main.TELEMETRY_NAMES[kind].replace(" ", "_") + ".png"
+        pygame.image.save(pygame.transform.scale(image, (width*4, height*4)), os.path.join(output, name))
+        hot = ", ".join(f"{count} at ({x:.0f}, {y:.0f})" for count, x, y in aggregator.hottest(level, kind))
+        print(f"level{level} {main.TELEMETRY_NAMES[kind]}: {aggregator.totals[(level, kind)]:,}, most {hot}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,14 @@
+import os, sys
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # runs without a window
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pytest
+
+@pytest.fixture(scope="module")
+def game(): # a game that doesn't run its loop, levels are read from the repo
+    import pygame, main
+    os.chdir(ROOT)
+    pygame.init()
+    g = main.Game(start=False)
+    g.show_ghosts = False
+    return g
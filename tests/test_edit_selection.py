@@ -0,0 +1,38 @@
+import main
+
+def pipe_pair(g):
+    objects = {category:[] for category in g.objects}
+    a = main.Pipe(0, 300, 60, 90, 0, (330, 210))
+    b = main.Pipe(300, 210, 60, 180, 0, (30, 300))
+    objects["pipes"] += [a, b]
+    g.set_objects(objects)
+    return a, b
+
+def test_moving_one_pipe_keeps_where_it_leads(game):
+    a, b = pipe_pair(game)
+    selection = main.EditSelection()
+    selection.region = (0, 300, 60, 90)
+    selection.move(game, (600, 0))
+    moved, = [p for p in game.pipes if p is not b]
+    assert (moved.x, moved.y) == (600, 0)
+    assert moved.teleport_pos == (330, 210) # still b
+    assert b.teleport_pos == (30, 300) # b isn't told about the move
+
+def test_moving_both_pipes_moves_where_they_lead(game):
+    pipe_pair(game)
+    selection = main.EditSelection()
+    selection.region = (0, 210, 390, 180)
+    selection.move(game, (1000, 0))
+    a, b = sorted(game.pipes, key=lambda p: p.x)
+    assert a.teleport_pos == (b.x + b.width/2, b.y)
+    assert b.teleport_pos == (a.x + a.width/2, a.y)
+
+def test_pasting_one_pipe_keeps_where_it_leads(game):
+    a, b = pipe_pair(game)
+    selection = main.EditSelection()
+    selection.region = (300, 210, 60, 180)
+    selection.copy(game)
+    selection.paste(game, (900, 210))
+    pasted, = [p for p in game.pipes if p is not a and p is not b]
+    assert pasted.x == 900
+    assert pasted.teleport_pos == (30, 300) # still a
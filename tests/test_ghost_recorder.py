@@ -0,0 +1,41 @@
+import types
+import main
+
+def path(t): # where the fake player is at level time t, curved so every sample has a different velocity
+    return 40 + 0.2*t, 300 - 0.3*t + 0.0002*t*t
+
+def record(tmp_path, frame_time, duration=3000):
+    recorder = main.GhostRecorder()
+    recorder.start(True)
+    player = types.SimpleNamespace(x=0, y=0, width=main.PLAYER_WIDTH, height=main.PLAYER_SMALL_HEIGHT, visible=True)
+    g = types.SimpleNamespace(player=player, level_time=0)
+    while g.level_time <= duration:
+        player.x, player.y = path(g.level_time)
+        recorder.record(g)
+        g.level_time += frame_time
+    ghost_path = tmp_path / "recorded.ghost"
+    ghost_path.write_bytes(recorder.data)
+    return str(ghost_path)
+
+def worst_error(ghost_path, duration=3000):
+    ghost = main.Ghost(ghost_path)
+    g = types.SimpleNamespace(level_time=0)
+    worst = 0
+    for t in range(0, duration - 100, 10):
+        g.level_time = t
+        ghost.logic(g)
+        x, y = path(t)
+        worst = max(worst, abs(ghost.x - x), abs(ghost.y - y))
+    ghost.close()
+    return worst
+
+def test_playback_follows_the_path_at_sample_rate_frames(tmp_path):
+    assert worst_error(record(tmp_path, main.GHOST_INTERVAL)) < 1
+
+def test_playback_follows_the_path_with_frames_longer_than_a_sample(tmp_path):
+    for frame_time in (50, 100, 250):
+        chord = 0.0002 * frame_time * frame_time / 4 # the recorder only knows the player at frames, and goes straight between them
+        assert worst_error(record(tmp_path, frame_time)) < 1 + chord, frame_time
+
+def test_playback_follows_the_path_with_short_frames(tmp_path):
+    assert worst_error(record(tmp_path, 7)) < 1
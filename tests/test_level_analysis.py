@@ -0,0 +1,11 @@
+import os
+import pytest
+import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("level", range(5))
+def test_shipped_levels_are_completable(level): # what the editor's worker reports after a save
+    with open(os.path.join(ROOT, "level"+str(level)+".pickle"), "rb") as f:
+        report = main.analyze_level("level"+str(level), f.read())
+    assert report.startswith("level"+str(level)+": completable")
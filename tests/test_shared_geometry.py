@@ -0,0 +1,51 @@
+import contextlib, io, pickle
+import pygame
+import main
+import shared_geometry
+
+def run_right(g, frames): # holds right and jumps now and then, on level 2 that picks up a coin before the first death
+    g.input_keys = main.KeyState([pygame.K_RIGHT])
+    positions = []
+    for frame in range(frames):
+        g.frame_time = 16
+        g.space_pressed_this_frame = frame % 40 == 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            g.do_game_logic()
+        positions.append((g.player.x, g.player.y, g.player.coins))
+    return positions
+
+def test_proxies_have_no_dict(game):
+    game.level = 2
+    game.load_saved_object_state()
+    level = shared_geometry.SharedLevel.create(game.objects)
+    try:
+        objects = level.objects()
+        for category, proxy in shared_geometry.PROXIES.items():
+            for obj in objects[category]:
+                if type(obj) == proxy:
+                    assert not hasattr(obj, "__dict__")
+        assert [type(c) for c in objects["coins"]] == [shared_geometry.SharedCoin] * len(objects["coins"])
+        del objects
+    finally:
+        level.close()
+
+def test_shared_level_plays_like_the_unpickled_one(game):
+    game.level = 2
+    game.load_saved_object_state()
+    snapshot = game.snapshot()
+    render_mode = game.render_mode
+    level = shared_geometry.SharedLevel.create(game.objects)
+    try:
+        expected = run_right(game, 300)
+        game.restore(snapshot)
+        level.load_into(game)
+        assert run_right(game, 300) == expected
+        for render_mode in (main.RENDER_IMMEDIATE, main.RENDER_BATCHED): # the proxies draw with the game's methods
+            game.render_mode = render_mode
+            game.do_game_drawing()
+        copy = pickle.loads(pickle.dumps(game.objects)) # snapshots turn the proxies back into regular objects
+        assert {type(obj) for obj in copy["coins"] + copy["pipes"]} <= {main.Coin, main.Pipe}
+    finally:
+        game.render_mode = render_mode
+        game.load_saved_object_state()
+        level.close()
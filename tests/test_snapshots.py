@@ -0,0 +1,56 @@
+import os
+import main
+
+def ghost_file(level): # a short recorded run, where load_ghosts looks for it
+    recorder = main.GhostRecorder()
+    recorder.start(True)
+    os.makedirs(main.GHOST_DIR, exist_ok=True)
+    with open(os.path.join(main.GHOST_DIR, "level"+str(level)+"_00001000.ghost"), "wb") as f:
+        f.write(bytes(recorder.data) + b"\x00")
+
+def test_restoring_another_level_enters_it(game, tmp_path, monkeypatch):
+    game.level = 1
+    game.load_saved_object_state()
+    snapshot = game.snapshot()
+    game.level = 0
+    game.load_saved_object_state()
+    monkeypatch.chdir(tmp_path)
+    ghost_file(1)
+    game.show_ghosts = True
+    try:
+        game.scheduler.cancel("warm sprites")
+        game.restore(snapshot)
+        assert game.level == 1
+        assert [os.path.basename(ghost.path) for ghost in game.ghosts] == ["level1_00001000.ghost"]
+        assert game.scheduler.pending("warm sprites")
+    finally:
+        game.show_ghosts = False
+        game.load_ghosts()
+
+def test_restoring_the_same_level_keeps_its_ghosts(game):
+    game.level = 0
+    game.load_saved_object_state()
+    snapshot = game.snapshot()
+    ghosts = game.ghosts
+    game.restore(snapshot)
+    assert game.ghosts is ghosts
+
+def test_autosave_is_only_read_back_by_the_run_and_level_it_was_made_in(game, tmp_path, monkeypatch):
+    game.level = 0
+    game.load_saved_object_state()
+    monkeypatch.chdir(tmp_path)
+    for _ in game.autosave_task():
+        pass
+    data = game.read_autosave()
+    assert data != None
+    game.restore(data)
+    game.level = 1
+    assert game.read_autosave() == None
+    game.level = 0
+    session = game.session_id
+    game.session_id = os.urandom(16) # the game was started again
+    assert game.read_autosave() == None
+    game.session_id = session
+    with open(main.AUTOSAVE_PATH, "wb") as f: # from before autosaves had a header
+        f.write(game.snapshot())
+    assert game.read_autosave() == None
@@ -0,0 +1,63 @@
+import pytest
+import main
+
+LEVELS = range(5)
+FRAME_TIME = 100 # a long frame, like a hitch on a slow machine
+SPEED = 1.9 # px per ms, just under the speed that kills the player when landing
+
+def load(g, level, mode):
+    g.level = level
+    g.load_saved_object_state()
+    g.collision_mode = mode
+    return [r for r in g.collision_rects if type(r) == main.CollisionRect]
+
+def clear(g, obj): # nothing overlaps obj where it starts
+    return not any(main.General.rects_collide(obj, g.collision_index.objects[i]) for i in g.collision_index.candidates(obj))
+
+def drop(g, mover, r): # falls onto the middle of r from just above it, True if it ended up below r
+    mover.x, mover.y = r.x + (r.width - mover.width)/2, r.y - mover.height - 5
+    if not clear(g, mover):
+        return None
+    mover.x_vel, mover.y_vel = 0, SPEED
+    mover.move_by(g, 0, mover.y_vel * FRAME_TIME)
+    mover.interact_with_collision_rects(g)
+    return mover.y >= r.y + r.height
+
+def run_into(g, mover, r): # runs at the left side of r from just left of it, True if it ended up right of r
+    mover.x, mover.y = r.x - mover.width - 5, r.y + (r.height - mover.height)/2
+    if not clear(g, mover):
+        return None
+    mover.x_vel, mover.y_vel = SPEED, 0
+    mover.move_by(g, SPEED * FRAME_TIME, 0)
+    mover.interact_with_collision_rects(g)
+    return mover.x >= r.x + r.width
+
+def passed(g, mode, move, thin, mover):
+    results = []
+    for level in LEVELS:
+        for r in load(g, level, mode):
+            if thin(r):
+                result = move(g, mover(), r)
+                if result != None:
+                    results.append(result)
+    return results
+
+def player():
+    return main.Player()
+
+def jump_enemy():
+    return main.JumpEnemy(0, 0, False)
+
+PLATFORM = lambda r: r.height < SPEED * FRAME_TIME / 2 and r.width >= main.PLAYER_WIDTH
+WALL = lambda r: r.width < SPEED * FRAME_TIME / 2 and r.height >= main.PLAYER_BIG_HEIGHT
+
+@pytest.mark.parametrize("move, thin", [(drop, PLATFORM), (run_into, WALL)], ids=["platforms", "walls"])
+@pytest.mark.parametrize("mover", [player, jump_enemy], ids=["player", "jump enemy"])
+def test_swept_never_passes_through(game, move, thin, mover):
+    results = passed(game, main.COLLISION_SWEPT, move, thin, mover)
+    assert results, "the levels have thin rects to test against"
+    assert not any(results)
+
+@pytest.mark.parametrize("move, thin", [(drop, PLATFORM), (run_into, WALL)], ids=["platforms", "walls"])
+def test_discrete_passes_through(game, move, thin):
+    assert any(passed(game, main.COLLISION_DISCRETE, move, thin, player))